@@ -0,0 +1,121 @@
+"""
+Concurrent request throughput: blocking sync Session vs AsyncSession inside async handlers.
+
+Runs against a throwaway SQLite file. Every query calls a `sleep_ms()` SQL function so it behaves
+like a slow MySQL round trip, and a ticker task measures how long the event loop was stalled.
+
+Usage:
+    python -m benchmarks.bench_async_db --requests 400 --concurrency 50 --query-ms 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["MYSQL_URI"] = f"sqlite:///{db_path}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import event, text
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.config import database
+from src.config.database import SessionDep
+from src.models import Team
+
+QUERY_MS = 20
+
+
+def register_sleep(dbapi_connection, connection_record):
+    # Stand-in for a slow MySQL query: blocks the connection's thread for QUERY_MS
+    dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+sync_engine = create_engine(os.environ["MYSQL_URI"], connect_args={"check_same_thread": False})
+event.listen(sync_engine, "connect", register_sleep)
+
+database.engine.echo = False
+event.listen(database.engine.sync_engine, "connect", register_sleep)
+
+app = FastAPI()
+
+
+@app.get("/before/{team_id}")
+async def blocking_handler(team_id: int):
+    # The pre-async pattern: sync Session calls inside an `async def` handler
+    with Session(sync_engine) as session:
+        session.exec(text("SELECT sleep_ms(:ms)").bindparams(ms=QUERY_MS))
+        team = session.exec(select(Team).where(Team.id == team_id)).first()
+        return {"id": team.id, "name": team.name}
+
+
+@app.get("/after/{team_id}")
+async def async_handler(team_id: int, session: SessionDep):
+    await session.exec(text("SELECT sleep_ms(:ms)").bindparams(ms=QUERY_MS))
+    team = (await session.exec(select(Team).where(Team.id == team_id))).first()
+    return {"id": team.id, "name": team.name}
+
+
+def seed(teams: int):
+    SQLModel.metadata.create_all(sync_engine)
+    with Session(sync_engine) as session:
+        session.add_all(Team(name=f"Team {i}", city="Bench") for i in range(1, teams + 1))
+        session.commit()
+
+
+async def loop_lag_monitor(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Return the worst delay (seconds) between scheduled ticks while requests are running"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst
+
+
+async def run(path: str, total: int, concurrency: int, teams: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(stop))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"/{path}/{i % teams + 1}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+
+    stop.set()
+    return {"rps": total / elapsed, "elapsed": elapsed, "max_loop_lag_ms": await monitor * 1000}
+
+
+async def main():
+    global QUERY_MS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-ms", type=int, default=QUERY_MS)
+    parser.add_argument("--teams", type=int, default=100)
+    args = parser.parse_args()
+    QUERY_MS = args.query_ms
+
+    seed(args.teams)
+    for label, path in (("before (sync Session)", "before"), ("after (AsyncSession)", "after")):
+        result = await run(path, args.requests, args.concurrency, args.teams)
+        print(f"{label:<24} {result['rps']:8.1f} req/s  {result['elapsed']:6.2f}s  "
+              f"max loop lag {result['max_loop_lag_ms']:7.1f} ms")
+
+    await database.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
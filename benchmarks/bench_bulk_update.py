@@ -0,0 +1,70 @@
+"""
+Match update throughput: one PUT /api/matches/{id} per update vs PATCH /api/matches/ batches.
+
+A simulated data feed tick changes the score and stats of `--matches` live matches. Every tick is sent
+once as one PUT per match and once as a single bulk PATCH (split into `--batch` sized requests), and
+the updates per second and SQL statements per tick are reported for both.
+
+Usage:
+    python -m benchmarks.bench_bulk_update --matches 50 --ticks 20 --batch 50 100
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import QueryCounter, app_client, fake_redis, seed
+
+
+def feed_tick(tick: int, matches: int) -> list[dict]:
+    """One update per live match, as a data feed would push them"""
+    return [
+        {
+            "id": m,
+            "match_update": {"score_team1": (tick + m) % 5, "score_team2": tick % 3},
+            "stats_update": {"possession_team1": 40 + (tick + m) % 20, "shots_team1": tick, "corners_team2": tick // 2},
+        }
+        for m in range(1, matches + 1)
+    ]
+
+
+async def run(client, counter: QueryCounter, ticks: list[list[dict]], batch: int | None) -> tuple[float, float]:
+    """Send every tick, one PUT per update when `batch` is None. Returns updates/s and SQL statements per tick."""
+    counter.reset()
+    started = time.perf_counter()
+    for updates in ticks:
+        if batch is None:
+            for update in updates:
+                body = {"match_update": update["match_update"], "stats_update": update["stats_update"]}
+                response = await client.put(f"/api/matches/{update['id']}", json=body)
+                response.raise_for_status()
+        else:
+            for first in range(0, len(updates), batch):
+                response = await client.patch("/api/matches/", json={"updates": updates[first:first + batch]})
+                response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    return sum(map(len, ticks)) / elapsed, counter.count / len(ticks)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=50, help="Live matches updated every tick")
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--batch", type=int, nargs="+", default=[10, 50], help="Bulk request sizes to compare")
+    parser.add_argument("--redis-url", help="Real Redis instead of fakeredis")
+    args = parser.parse_args()
+
+    seed(teams=20, players_per_team=11, matches=args.matches)
+    redis = fake_redis(args.redis_url)
+    counter = QueryCounter()
+    ticks = [feed_tick(tick, args.matches) for tick in range(1, args.ticks + 1)]
+
+    print(f"{args.matches} matches x {args.ticks} ticks")
+    async with app_client(redis) as client:
+        for batch in [None, *args.batch]:
+            rate, statements = await run(client, counter, ticks, batch)
+            label = "PUT per match" if batch is None else f"PATCH batch={batch}"
+            print(f"{label:<18} {rate:9.1f} updates/s  {statements:7.1f} SQL statements/tick")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
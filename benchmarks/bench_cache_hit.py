@@ -0,0 +1,99 @@
+"""
+Cache-hit latency and memory per request: cached JSON returned as-is vs parsed and re-validated.
+
+"validated" parses the cached value and lets FastAPI validate it into the response model and
+serialize it again (the previous behaviour); "raw" is the real endpoint returning the cached
+bytes from Redis in a Response; "local" (matches only) is served from the worker's in-memory
+match cache without a Redis round trip. Memory is the tracemalloc peak above baseline while
+serving one request.
+
+Usage:
+    python -m benchmarks.bench_cache_hit --requests 2000 --players-per-team 25 [--redis-url redis://localhost:6379/15]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.common import app_client, fake_redis, seed
+
+from src.config.redis import get_redis
+from src.responses import MatchDetailResponse, PlayerResponse, TeamResponse
+from src.utils.cache import cache_key, get_or_load, orjson
+from src.utils.local_cache import match_cache
+
+endpoints = (
+    ("player", "/api/players/1", PlayerResponse),
+    ("team", "/api/teams/1", TeamResponse),
+    ("match", "/api/matches/1", MatchDetailResponse),
+)
+
+
+def add_validated_routes():
+    """Previous behaviour for comparison: return the parsed dict and let FastAPI validate it"""
+    from fastapi import Depends
+    from src.main import app
+
+    async def cached_only():
+        return None  # The cache is warmed before measuring
+
+    for name, path, response_model in endpoints:
+        async def validated(item_id: int, redis=Depends(get_redis), name=name):
+            return await get_or_load(redis, cache_key(name, item_id), cached_only)
+
+        app.add_api_route(f"/validated/{name}/{{item_id}}", validated, response_model=response_model)
+
+
+async def measure(client, url: str, requests: int) -> tuple[float, float, float]:
+    latencies = []
+    peaks = []
+    for _ in range(requests):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        response.raise_for_status()
+    latencies.sort()
+    return (
+        statistics.mean(latencies) * 1e6,
+        latencies[int(len(latencies) * 0.99) - 1] * 1e6,
+        statistics.mean(peaks) / 1024,
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--players-per-team", type=int, default=25)
+    parser.add_argument("--matches", type=int, default=40)
+    parser.add_argument("--redis-url", help="Real Redis instead of fakeredis, which has no network round trip to save")
+    args = parser.parse_args()
+    local_ttl = match_cache.ttl
+
+    seed(teams=4, players_per_team=args.players_per_team, matches=args.matches)
+    redis = fake_redis(args.redis_url)
+    add_validated_routes()
+    print(f"serializer: {'orjson' if orjson else 'json'}")
+
+    async with app_client(redis) as client:
+        for name, path, _ in endpoints:
+            await client.get(path)  # Warm the cache
+            size = len(await redis.get(cache_key(name, 1)))
+
+            tracemalloc.start()
+            runs = [("validated", f"/validated/{name}/1", 0), ("raw", path, 0)]
+            if name == "match":
+                runs.append(("local", path, local_ttl))
+            for label, url, local_ttl in runs:
+                match_cache.ttl = local_ttl  # 0 expires local entries at once, every request goes to Redis
+                mean_us, p99_us, peak_kb = await measure(client, url, args.requests)
+                print(f"{name:<7} {size:7d} B  {label:<10} mean {mean_us:8.1f} us  p99 {p99_us:8.1f} us  "
+                      f"peak {peak_kb:8.1f} KB/request")
+            tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Match update fan-out: messages/sec delivered to simulated Socket.IO clients.
+
+Compares the previous design (one Redis pubsub connection + listener per match channel,
+emitting to each SID in turn) with the pattern-subscription dispatcher in src/sockets.py
+that emits once per update to the match room.
+
+Clients are registered directly with the Socket.IO manager and the engine.io transport is
+replaced by a counter, so the numbers measure routing/encoding cost, not network I/O.
+Uses fakeredis unless --redis-url points at a real server.
+
+Usage:
+    python -m benchmarks.bench_fanout --clients 10000 --matches 300 --messages 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("REDIS_HOST", "redis://localhost")
+os.environ.setdefault("REDIS_PORT", "6379")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis.asyncio as redis
+
+from src.sockets import sio, match_room, dispatch_match_updates
+
+delivered = 0
+done = asyncio.Event()
+expected = 0
+
+
+async def count_packet(eio_sid, eio_pkt):
+    # Stand-in for the websocket write
+    global delivered
+    delivered += 1
+    if delivered >= expected:
+        done.set()
+
+
+def sample_update(match_id: int) -> dict:
+    return {
+        "id": match_id,
+        "score_team1": 1,
+        "score_team2": 0,
+        "status": "running",
+        "stats": {"match_id": match_id, "possession_team1": 55, "possession_team2": 45, "shots_team1": 7},
+    }
+
+
+async def connect_clients(clients: int, matches: int) -> dict[int, list[str]]:
+    """Register fake clients spread evenly over the matches, return {match_id: [sid, ...]}"""
+    sids_by_match = {match_id: [] for match_id in range(1, matches + 1)}
+    for i in range(clients):
+        match_id = i % matches + 1
+        sid = await sio.manager.connect(f"eio-{i}", "/")
+        await sio.enter_room(sid, match_room(match_id))
+        sids_by_match[match_id].append(sid)
+    return sids_by_match
+
+
+async def legacy_listeners(client: redis.Redis, sids_by_match: dict[int, list[str]]) -> list:
+    """The previous src/sockets.py: a pubsub + task per channel and a sequential emit per SID"""
+    pubsubs = []
+    for match_id, sids in sids_by_match.items():
+        channel = f"match_update:{match_id}"
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel)
+
+        async def listen(pubsub=pubsub, sids=sids):
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    update = json.loads(message["data"])
+                    for client_sid in sids:
+                        await sio.emit("match_update", update, to=client_sid)
+
+        pubsubs.append((pubsub, asyncio.create_task(listen())))
+    return pubsubs
+
+
+async def publish_all(client: redis.Redis, matches: int, messages: int):
+    payloads = {match_id: json.dumps(sample_update(match_id)) for match_id in range(1, matches + 1)}
+    for i in range(messages):
+        match_id = i % matches + 1
+        await client.publish(f"match_update:{match_id}", payloads[match_id])
+
+
+async def measure(client: redis.Redis, matches: int, messages: int, clients_per_match: float) -> float:
+    global delivered, expected
+    delivered = 0
+    expected = int(messages * clients_per_match)
+    done.clear()
+
+    started = time.perf_counter()
+    await publish_all(client, matches, messages)
+    await asyncio.wait_for(done.wait(), timeout=600)
+    return time.perf_counter() - started
+
+
+def make_client(url: str | None) -> redis.Redis:
+    if url:
+        return redis.from_url(url, decode_responses=True)
+    import fakeredis
+    return fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10000)
+    parser.add_argument("--matches", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=300, help="Updates published per run (round-robin over matches)")
+    parser.add_argument("--redis-url", default=None, help="Real Redis to use instead of fakeredis")
+    args = parser.parse_args()
+
+    if args.clients % args.matches:
+        parser.error("--clients must be a multiple of --matches")
+    clients_per_match = args.clients / args.matches
+
+    sio._send_eio_packet = count_packet
+    sio.logger.disabled = True  # One log line per emit would dominate the measurement
+    sids_by_match = await connect_clients(args.clients, args.matches)
+    client = make_client(args.redis_url)
+
+    # Previous design
+    legacy = await legacy_listeners(client, sids_by_match)
+    await asyncio.sleep(0.1)
+    elapsed = await measure(client, args.matches, args.messages, clients_per_match)
+    print(f"{'per-channel + per-SID emit':<30} {args.matches:4d} redis subscriptions  "
+          f"{delivered / elapsed:10.0f} deliveries/s  {args.messages / elapsed:8.1f} updates/s")
+    for pubsub, task in legacy:
+        task.cancel()
+        await pubsub.aclose()
+
+    # Pattern subscription dispatcher
+    dispatcher = asyncio.create_task(dispatch_match_updates(client))
+    await asyncio.sleep(0.1)
+    elapsed = await measure(client, args.matches, args.messages, clients_per_match)
+    print(f"{'psubscribe + room emit':<30} {1:4d} redis subscription   "
+          f"{delivered / elapsed:10.0f} deliveries/s  {args.messages / elapsed:8.1f} updates/s")
+    dispatcher.cancel()
+
+    await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
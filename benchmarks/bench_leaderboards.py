@@ -0,0 +1,116 @@
+"""
+Top-N scorers: MySQL without and with the leaderboard indexes vs the Redis sorted sets.
+
+The player table is filled with `--players` rows (500k by default, core inserts) over `--teams` teams, about a
+third of them with goals or assists. For the overall, one team's and one position's board the top `--limit` is
+read `--requests` times: with the query the fallback runs (first with the ix_player_*_goals indexes dropped, a
+full scan and sort, then with them) and through GET /api/players/leaderboards/goals once the board is loaded.
+Reported are median latencies and the time to load each board into Redis.
+
+Usage:
+    python -m benchmarks.bench_leaderboards --players 500000 --teams 500 --limit 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import create_engine, insert, text
+
+from benchmarks.common import app_client, fake_redis, positions, seed
+
+from src.config.database import async_session
+from src.models import Player
+from src.utils.leaderboards import leaderboard_statement, load_leaderboard
+
+goal_indexes = ("ix_player_goals", "ix_player_team_id_goals", "ix_player_position_goals")
+
+
+def seed_players(players: int, teams: int, chunk: int = 50_000):
+    """Bulk insert players through core executemany, the ORM would take minutes for 500k rows"""
+    seed(teams=teams, players_per_team=0, matches=0)
+    engine = create_engine(os.environ["MYSQL_URI"])
+    imported = datetime.now(timezone.utc) - timedelta(days=1)  # Not written while the boards load
+    with engine.begin() as conn:
+        for first in range(1, players + 1, chunk):
+            conn.execute(insert(Player), [
+                {"id": p, "name": f"Player {p}", "birth": "1995-01-01", "position": positions[p % len(positions)],
+                 "appearances": p % 40, "goals": max(0, p * 7919 % 61 - 40), "assists": max(0, p * 104729 % 53 - 35),
+                 "team_id": p % teams + 1, "created_at": imported, "updated_at": imported}
+                for p in range(first, min(first + chunk, players + 1))
+            ])
+    engine.dispose()
+
+
+def set_goal_indexes(create: bool):
+    engine = create_engine(os.environ["MYSQL_URI"])
+    with engine.begin() as conn:
+        for index in Player.__table__.indexes:
+            if index.name in goal_indexes:
+                index.create(conn) if create else conn.execute(text(f"DROP INDEX {index.name}"))
+    engine.dispose()
+
+
+async def measure_sql(scope: dict, limit: int, requests: int) -> float:
+    latencies = []
+    async with async_session() as session:
+        for _ in range(requests):
+            started = time.perf_counter()
+            (await session.exec(leaderboard_statement("goals", **scope).limit(limit))).all()
+            latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1e3
+
+
+async def measure_endpoint(client, url: str, requests: int) -> float:
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return statistics.median(latencies) * 1e3
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=500_000)
+    parser.add_argument("--teams", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=20, help="Reads per board and path, the median is reported")
+    parser.add_argument("--redis-url", help="Real Redis instead of fakeredis")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed_players(args.players, args.teams)
+    print(f"seeded {args.players} players in {time.perf_counter() - started:.1f} s")
+
+    scopes = {"overall": {}, "team 7": {"team_id": 7}, f"{positions[3].value}": {"position": positions[3]}}
+    redis = fake_redis(args.redis_url)
+
+    set_goal_indexes(create=False)
+    scan = {name: await measure_sql(scope, args.limit, args.requests) for name, scope in scopes.items()}
+    set_goal_indexes(create=True)
+    indexed = {name: await measure_sql(scope, args.limit, args.requests) for name, scope in scopes.items()}
+
+    loads, cached = {}, {}
+    async with app_client(redis) as client:
+        for name, scope in scopes.items():
+            started = time.perf_counter()
+            count = await load_leaderboard(redis, "goals", **scope)
+            loads[name] = (time.perf_counter() - started, count)
+            query = "&".join(f"{key}={getattr(value, 'value', value)}" for key, value in scope.items())
+            url = f"/api/players/leaderboards/goals?limit={args.limit}&{query}"
+            await client.get(url)  # Caches the players of the top
+            cached[name] = await measure_endpoint(client, url, args.requests)
+
+    print(f"\ntop {args.limit} scorers (median ms)")
+    print(f"{'board':<22} {'scan':>9} {'index':>9} {'redis':>9} {'load':>9}  players")
+    for name in scopes:
+        load_seconds, count = loads[name]
+        print(f"{name:<22} {scan[name]:9.2f} {indexed[name]:9.2f} {cached[name]:9.2f} {load_seconds * 1e3:9.0f}  {count}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""
+Database writes during live matches: stats committed to MySQL on every update vs kept in Redis (write-behind).
+
+Each of `--matches` matches kicks off, gets `--updates` stats updates through PUT /api/matches/{id} (the
+flusher runs every `--flush-every` updates, standing in for LIVE_STATS_FLUSH_INTERVAL) and ends. Both modes
+run in their own process, LIVE_STATS_WRITE_BEHIND being read at import time; reported are the INSERT/UPDATE
+statements per match, the updates per second and whether the final stats in the database are the same.
+
+Usage:
+    python -m benchmarks.bench_live_stats --matches 20 --updates 100 --flush-every 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def stats_update(match_id: int, i: int) -> dict:
+    return {"possession_team1": 40 + (match_id + i) % 20, "shots_team1": i // 3, "corners_team2": i // 7}
+
+
+async def run(args) -> dict:
+    os.environ["LIVE_STATS_WRITE_BEHIND"] = "true" if args.mode == "write-behind" else "false"
+    from sqlalchemy import event
+    from sqlmodel import Session, create_engine, select
+
+    from benchmarks.common import app_client, fake_redis, seed
+    from src.config import database
+    from src.models import MatchStats
+    from src.utils.live_stats import flush_live_stats
+
+    seed(teams=20, players_per_team=11, matches=args.matches)
+    redis = fake_redis(args.redis_url)
+    writes = 0
+
+    def count_writes(conn, cursor, statement, *rest):
+        nonlocal writes
+        writes += statement.lstrip().upper().startswith(("INSERT", "UPDATE"))
+
+    match_ids = range(1, args.matches + 1)
+    async with app_client(redis) as client:
+        for match_id in match_ids:
+            response = await client.put(f"/api/matches/{match_id}", json={"match_update": {"start_time": "2024-01-01T15:00:00"}})
+            response.raise_for_status()
+
+        event.listen(database.engine.sync_engine, "before_cursor_execute", count_writes)
+        started = time.perf_counter()
+        for i in range(1, args.updates + 1):
+            for match_id in match_ids:
+                response = await client.put(f"/api/matches/{match_id}", json={"stats_update": stats_update(match_id, i)})
+                response.raise_for_status()
+            if args.mode == "write-behind" and i % args.flush_every == 0:
+                await flush_live_stats(redis)
+        elapsed = time.perf_counter() - started
+
+        for match_id in match_ids:
+            response = await client.put(f"/api/matches/{match_id}", json={"match_update": {"end_time": "2024-01-01T16:50:00"}})
+            response.raise_for_status()
+
+    engine = create_engine(os.environ["MYSQL_URI"])
+    with Session(engine) as session:
+        final = {stats.match_id: stats.to_dict() for stats in session.exec(select(MatchStats))}
+    engine.dispose()
+    expected = {match_id: stats_update(match_id, args.updates) for match_id in match_ids}
+    return {
+        "writes_per_match": writes / args.matches,
+        "updates_per_second": args.matches * args.updates / elapsed,
+        "final_ok": all(final[m][field] == value for m, values in expected.items() for field, value in values.items()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=100, help="Stats updates per match")
+    parser.add_argument("--flush-every", type=int, default=50, help="Updates per match between two flushes")
+    parser.add_argument("--redis-url", help="Real Redis instead of fakeredis")
+    parser.add_argument("--mode", choices=("sync", "write-behind"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(asyncio.run(run(args))))
+        return
+
+    print(f"{args.matches} matches x {args.updates} stats updates, flush every {args.flush_every} updates")
+    for mode in ("sync", "write-behind"):
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_live_stats", *sys.argv[1:], "--mode", mode],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<13} {result['writes_per_match']:7.1f} DB writes/match  {result['updates_per_second']:8.1f} updates/s  "
+              f"final stats {'match' if result['final_ok'] else 'DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
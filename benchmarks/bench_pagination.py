@@ -0,0 +1,86 @@
+"""
+Latency of a /api/matches page at increasing depth: offset pagination vs keyset cursors.
+
+The table is filled with `--matches` rows (1M by default, a few seconds of core inserts). For every
+depth the same page is requested with `?offset=` and with the equivalent `?cursor=`; offset has to
+walk past every skipped row while the cursor starts from an index seek, so its latency stays flat.
+
+Usage:
+    python -m benchmarks.bench_pagination --matches 1000000 --order id start_time
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlmodel import create_engine, insert
+
+from benchmarks.common import app_client, fake_redis, seed
+
+from src.models import Match
+from src.utils.pagination import encode_cursor
+
+kick_off = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def start_time(match_id: int) -> str:
+    return (kick_off + timedelta(minutes=match_id)).isoformat()
+
+
+def seed_matches(matches: int, teams: int, chunk: int = 50_000):
+    """Bulk insert matches through core executemany, the ORM would take minutes for 1M rows"""
+    seed(teams=teams, players_per_team=1, matches=0)
+    engine = create_engine(os.environ["MYSQL_URI"])
+    now = datetime.now(timezone.utc)
+    with engine.begin() as conn:
+        for first in range(1, matches + 1, chunk):
+            conn.execute(insert(Match), [
+                {"id": m, "team1_id": m % teams + 1, "team2_id": (m + 1) % teams + 1, "score_team1": m % 4,
+                 "score_team2": m % 3, "start_time": start_time(m), "created_at": now, "updated_at": now}
+                for m in range(first, min(first + chunk, matches + 1))
+            ])
+    engine.dispose()
+
+
+async def measure(client, redis, url: str, requests: int) -> float:
+    latencies = []
+    for _ in range(requests):
+        await redis.flushdb()  # Measure the database path, not the cached page
+        started = time.perf_counter()
+        response = await client.get(url)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+    return statistics.median(latencies) * 1e3
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=5, help="Requests per depth, the median is reported")
+    parser.add_argument("--order", nargs="+", choices=("id", "start_time"), default=["id", "start_time"])
+    parser.add_argument("--redis-url", help="Real Redis instead of fakeredis")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    seed_matches(args.matches, teams=20)
+    print(f"seeded {args.matches} matches in {time.perf_counter() - started:.1f} s")
+
+    depths = sorted({0, args.matches // 100, args.matches // 10, args.matches // 2, args.matches - args.limit})
+    redis = fake_redis(args.redis_url)
+    async with app_client(redis) as client:
+        for order in args.order:
+            print(f"\norder={order}, limit={args.limit} (median ms)")
+            for depth in depths:
+                # Ids and kick-off times both increase with the id, so "after row `depth`" is the same page
+                position = {"start_time": start_time(depth), "id": depth} if order == "start_time" else {"id": depth}
+                base = f"/api/matches/?order={order}&limit={args.limit}"
+                offset_ms = await measure(client, redis, f"{base}&offset={depth}", args.requests)
+                cursor_ms = await measure(client, redis, f"{base}&cursor={encode_cursor(**position)}", args.requests)
+                print(f"depth {depth:>9}  offset {offset_ms:8.2f}  cursor {cursor_ms:8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Login throughput vs latency of everything else on the worker: bcrypt on the event loop vs the password pool.
+
+`--concurrency` clients log in as fast as they can for `--duration` seconds while a prober sends a cheap request
+(GET /api) every 10 ms and a ticker measures event loop stalls, which is what every Socket.IO client of the
+worker waits through before its next match update. Run inline (the check on the event loop, as before) and
+through src/utils/passwords.py with the pool sized by --workers and --queue; logins the full pool turns away
+with a 503 are counted and retried 100 ms later.
+
+Usage:
+    python -m benchmarks.bench_password_pool --concurrency 20 --duration 10 --workers 2 --queue 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import app_client, fake_redis, seed
+
+from fastapi_limiter import FastAPILimiter
+from sqlmodel import Session, create_engine
+from src.models import User, pwd_context
+from src.routers import auth
+from src.utils import passwords
+
+username, password = "bench", "correct horse battery staple"
+
+
+def seed_user():
+    seed(teams=0, players_per_team=0, matches=0)
+    engine = create_engine(os.environ["MYSQL_URI"])
+    with Session(engine) as session:
+        session.add(User(username=username, hashed_password=pwd_context.hash(password)))
+        session.commit()
+    engine.dispose()
+
+
+async def verify_inline(plain: str, hashed: str) -> bool:
+    """The check as it used to run: synchronously, on the event loop"""
+    return pwd_context.verify(plain, hashed)
+
+
+async def loop_lag_monitor(stop: asyncio.Event, interval: float = 0.005) -> list[float]:
+    stalls = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - started - interval)
+    return stalls
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)] if values else 0.0
+
+
+async def run(client, concurrency: int, duration: float) -> dict:
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(loop_lag_monitor(stop))
+    logins, rejected, probes = [], 0, []
+
+    async def login():
+        nonlocal rejected
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = await client.post("/api/auth/login", json={"username": username, "password": password})
+            if response.status_code == 503:
+                rejected += 1
+                await asyncio.sleep(0.1)
+                continue
+            response.raise_for_status()
+            logins.append(time.perf_counter() - started)
+
+    async def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            (await client.get("/api")).raise_for_status()
+            probes.append(time.perf_counter() - started)
+            await asyncio.sleep(0.01)
+
+    tasks = [asyncio.create_task(login()) for _ in range(concurrency)] + [asyncio.create_task(probe())]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    stalls = await monitor
+    return {
+        "logins_per_second": len(logins) / duration,
+        "login_p50_ms": statistics.median(logins) * 1e3 if logins else 0.0,
+        "rejected": rejected,
+        "probe_p50_ms": percentile(probes, 50) * 1e3,
+        "probe_p99_ms": percentile(probes, 99) * 1e3,
+        "max_stall_ms": max(stalls, default=0.0) * 1e3,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="Clients logging in at once")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per mode")
+    parser.add_argument("--workers", type=int, default=passwords.password_workers, help="Password pool threads")
+    parser.add_argument("--queue", type=int, default=passwords.password_queue, help="Password calls waiting for a thread")
+    args = parser.parse_args()
+
+    seed_user()
+    redis = fake_redis()
+
+    async def unique_identifier(request):
+        return str(uuid.uuid4())  # Every login is its own rate limit bucket, the limiter isn't what's measured
+
+    await FastAPILimiter.init(redis, identifier=unique_identifier)
+    passwords.password_workers, passwords.password_queue = args.workers, args.queue
+    passwords.password_pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="bcrypt")
+
+    results = {}
+    async with app_client(redis) as client:
+        for label, verify in (("inline", verify_inline), (f"pool ({args.workers}+{args.queue})", passwords.verify_password)):
+            auth.verify_password = verify
+            results[label] = await run(client, args.concurrency, args.duration)
+    auth.verify_password = passwords.verify_password
+
+    print(f"\n{args.concurrency} clients logging in for {args.duration:.0f} s, probe GET /api every 10 ms")
+    print(f"{'mode':<16} {'logins/s':>9} {'login p50':>10} {'503s':>6} {'probe p50':>10} {'probe p99':>10} {'max stall':>10}")
+    for label, r in results.items():
+        print(f"{label:<16} {r['logins_per_second']:9.1f} {r['login_p50_ms']:8.0f}ms {r['rejected']:6} "
+              f"{r['probe_p50_ms']:8.1f}ms {r['probe_p99_ms']:8.1f}ms {r['max_stall_ms']:8.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+SQL statements per endpoint on a cache miss, for several page sizes.
+
+Every relationship the responses serialize is loaded up front (selectinload / joinedload), so the
+count must not grow with the page size. Exits with status 1 when it does (an N+1 regression).
+
+Usage:
+    python -m benchmarks.bench_query_count --page-sizes 10 50 100
+"""
+import argparse
+import asyncio
+
+from benchmarks.common import QueryCounter, app_client, fake_redis, seed
+
+# Paginated endpoints: the statement count has to be the same for every page size
+paged_endpoints = ("/api/teams/?limit={size}", "/api/matches/?limit={size}")
+single_endpoints = ("/api/teams/1", "/api/matches/1", "/api/players/1", "/api/players/?team_id=1")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 50, 100])
+    args = parser.parse_args()
+
+    seed(teams=max(args.page_sizes), matches=max(args.page_sizes) * 2)
+    redis = fake_redis()
+    counter = QueryCounter()
+    regressions = []
+
+    async with app_client(redis) as client:
+        async def count(url: str) -> int:
+            await redis.flushdb()  # Always measure the database path
+            counter.reset()
+            response = await client.get(url)
+            response.raise_for_status()
+            return counter.count
+
+        for endpoint in paged_endpoints:
+            counts = {size: await count(endpoint.format(size=size)) for size in args.page_sizes}
+            print(f"{endpoint.split('?')[0]:<24} " + "  ".join(f"limit={size}: {n}" for size, n in counts.items()))
+            if len(set(counts.values())) > 1:
+                regressions.append(endpoint)
+
+        for endpoint in single_endpoints:
+            print(f"{endpoint:<24} {await count(endpoint)}")
+
+    if regressions:
+        print(f"Query count grows with page size: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Concurrent scorekeepers: absolute totals through PUT /api/matches/{id} vs POST /api/matches/{id}/events.
+
+`--scorekeepers` clients each record `--goals` goals for team 1 of the same match at the same time. With PUT
+every client reads the match, adds one and sends the new total, so concurrent updates overwrite each other;
+events are counted in place by the server. Reported are the lost updates and the request body size per goal.
+Exits with status 1 if an event was lost.
+
+Usage:
+    python -m benchmarks.check_concurrent_events --scorekeepers 8 --goals 10
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import app_client, fake_redis, seed
+
+
+async def scorekeeper_put(client, goals: int) -> int:
+    sent = 0
+    for _ in range(goals):
+        match = (await client.get("/api/matches/1")).json()
+        body = {
+            "match_update": {"score_team1": match["score_team1"] + 1},
+            "stats_update": {"shots_team1": match["stats"]["shots_team1"] + 1},
+        }
+        sent += len(json.dumps(body))
+        (await client.put("/api/matches/1", json=body)).raise_for_status()
+    return sent
+
+
+async def scorekeeper_events(client, goals: int) -> int:
+    sent = 0
+    for _ in range(goals):
+        body = {"type": "goal", "team": 1}
+        sent += len(json.dumps(body))
+        (await client.post("/api/matches/1/events", json=body)).raise_for_status()
+    return sent
+
+
+async def run(scorekeeper, scorekeepers: int, goals: int) -> tuple[int, float]:
+    """Returns lost goals and request bytes per goal"""
+    seed(teams=4, players_per_team=2, matches=2)
+    async with app_client(fake_redis()) as client:
+        (await client.put("/api/matches/1", json={"match_update": {"start_time": "2024-01-01T15:00:00"}})).raise_for_status()
+        start = (await client.get("/api/matches/1")).json()["score_team1"]
+
+        sent = sum(await asyncio.gather(*(scorekeeper(client, goals) for _ in range(scorekeepers))))
+        final = (await client.get("/api/matches/1")).json()["score_team1"]
+
+    total = scorekeepers * goals
+    return start + total - final, sent / total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scorekeepers", type=int, default=8)
+    parser.add_argument("--goals", type=int, default=10, help="Goals recorded by each scorekeeper")
+    args = parser.parse_args()
+
+    print(f"{args.scorekeepers} scorekeepers x {args.goals} goals")
+    lost_events = 0
+    for name, scorekeeper in (("PUT totals", scorekeeper_put), ("events", scorekeeper_events)):
+        lost, request_bytes = await run(scorekeeper, args.scorekeepers, args.goals)
+        print(f"{name:<11} lost {lost:4}/{args.scorekeepers * args.goals}  request {request_bytes:6.1f} B/goal")
+        if scorekeeper is scorekeeper_events:
+            lost_events = lost
+
+    if lost_events:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""
+Read-after-write check of cache invalidation: no endpoint may serve a stale cached value after a write.
+
+Every read endpoint is warmed into Redis, then each write runs through the API and every warmed URL is
+read again and compared with the same request served from an empty cache, Redis and the worker's in-memory
+match cache alike. Exits with status 1 on any stale read.
+
+Usage:
+    python -m benchmarks.check_stale_reads
+"""
+import asyncio
+
+from benchmarks.common import app_client, fake_redis, seed
+
+from src.utils.leaderboards import leaderboard_loads
+from src.utils.local_cache import match_cache
+
+reads = (
+    "/api/teams/1", "/api/teams/2", "/api/teams/3", "/api/teams/?limit=100",
+    "/api/matches/1", "/api/matches/2", "/api/matches/3", "/api/matches/?limit=100",
+    "/api/players/1", "/api/players/?team_id=1",
+    "/api/players/leaderboards/goals", "/api/players/leaderboards/goals?team_id=2", "/api/players/leaderboards/assists",
+    "/api/standings/",
+)
+
+writes = (
+    ("create player in team 2", "post", "/api/players/", {"name": "New Player", "birth": "2000-01-01", "team_id": 2}),
+    ("create top scorer", "post", "/api/players/", {"name": "Striker", "birth": "2000-01-01", "goals": 30, "team_id": 2}),
+    ("update score of match 1", "put", "/api/matches/1", {"match_update": {"team1_id": 2, "team2_id": 3, "score_team1": 5}}),
+    ("create match 2 v 3", "post", "/api/matches/", {"team1_id": 2, "team2_id": 3}),
+    ("swap a team of match 2", "put", "/api/matches/2", {"match_update": {"team1_id": 1, "team2_id": 4}}),
+    ("finish match 3", "put", "/api/matches/3", {"match_update": {"start_time": "2024-01-01T15:00:00", "end_time": "2024-01-01T16:50:00"}}),
+)
+
+
+async def main():
+    seed(teams=5, players_per_team=3, matches=6)  # match m is between teams m % 5 + 1 and (m + 1) % 5 + 1
+    redis = fake_redis()
+    stale = []
+
+    async def read_all(cache) -> dict:
+        async with app_client(cache) as client:
+            responses = {url: (await client.get(url)).json() for url in reads}
+        await asyncio.gather(*leaderboard_loads.values())  # Boards first read from MySQL load in the background
+        return responses
+
+    await read_all(redis)  # Warm the cache
+    for name, method, url, body in writes:
+        async with app_client(redis) as client:
+            response = await getattr(client, method)(url, json=body)
+            response.raise_for_status()
+
+        cached = await read_all(redis)
+        # Uncached reads must not see (or fill) the in-memory match cache the cached reads use
+        entries, size = match_cache.entries.copy(), match_cache.size
+        match_cache.clear()
+        fresh = await read_all(fake_redis())
+        match_cache.entries, match_cache.size = entries, size
+        failed = [read for read in reads if cached[read] != fresh[read]]
+        print(f"{name:<26} {'stale: ' + ', '.join(failed) if failed else 'ok'}")
+        stale.extend(failed)
+
+    if stale:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
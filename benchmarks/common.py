@@ -0,0 +1,83 @@
+"""
+Shared setup for benchmarks that drive the real app offline.
+
+Importing this module points MYSQL_URI at a throwaway SQLite file (unless already set) and
+fills in the Redis settings, so it must be imported before anything from `src`.
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("MYSQL_URI", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("REDIS_HOST", "redis://localhost")
+os.environ.setdefault("REDIS_PORT", "6379")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.config import database
+from src.config.redis import get_redis
+from src.models import Team, Player, Match, MatchStats
+from src.utils.helpers import PlayerPosition
+
+database.engine.echo = False
+
+positions = list(PlayerPosition)
+
+
+def fake_redis(url: str | None = None):
+    """A real Redis client when `url` is given, otherwise an in-process fakeredis"""
+    import redis.asyncio as redis
+    if url:
+        return redis.from_url(url)
+    import fakeredis
+    return fakeredis.FakeAsyncRedis(server=fakeredis.FakeServer())
+
+
+def seed(teams: int = 100, players_per_team: int = 11, matches: int = 200):
+    """Create the schema and fill it with deterministic data through a sync engine"""
+    engine = create_engine(os.environ["MYSQL_URI"])
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(Team(id=i, name=f"Team {i}", city=f"City {i % 20}") for i in range(1, teams + 1))
+        session.add_all(
+            Player(name=f"Player {t}-{p}", birth="1995-01-01", position=positions[p % len(positions)],
+                   appearances=p * 3, goals=p, assists=p // 2, team_id=t)
+            for t in range(1, teams + 1) for p in range(players_per_team)
+        )
+        session.add_all(
+            Match(id=m, team1_id=m % teams + 1, team2_id=(m + 1) % teams + 1, score_team1=m % 4, score_team2=m % 3)
+            for m in range(1, matches + 1)
+        )
+        session.add_all(MatchStats(match_id=m) for m in range(1, matches + 1))
+        session.commit()
+    engine.dispose()
+
+
+class QueryCounter:
+    """Counts SQL statements sent by the app's async engine"""
+
+    def __init__(self):
+        self.count = 0
+        event.listen(database.engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def app_client(redis) -> httpx.AsyncClient:
+    """HTTP client bound to the real FastAPI app with `redis` served by the get_redis dependency"""
+    from src.main import app
+
+    async def bench_redis():
+        return redis
+
+    app.dependency_overrides[get_redis] = bench_redis
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
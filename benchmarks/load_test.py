@@ -0,0 +1,284 @@
+"""
+Load test of the whole app: the real `socketio_app` of src/main.py served by uvicorn, driven over HTTP and
+Socket.IO by concurrent readers, live match writers and subscribers.
+
+The database is a synthetic league from src/seeds.py (its running matches kick off now). The server runs in its
+own process on a local port, with fakeredis unless --redis-url points at a real Redis, so client work doesn't
+count against server latency. For --duration seconds:
+
+ - `--readers` clients loop over a mix of read endpoints (match, match list, team, player, standings, leaderboard)
+ - `--writers` clients each record a goal for a live match every `--write-interval` seconds (POST .../events)
+ - `--subscribers` Socket.IO clients subscribe to the written matches over websockets
+
+Reported are throughput, p50/p99 latency and errors per endpoint, and the fan-out delay from a goal being sent to
+the match update reaching each subscriber. Results are saved as JSON (with the git commit); pass an earlier file
+as --compare to print the change of every number.
+
+Usage:
+    python -m benchmarks.load_test --duration 30 --readers 50 --writers 10 --subscribers 200
+    python -m benchmarks.load_test --compare benchmarks/results/load_test-<commit>-<time>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.common import fake_redis
+
+results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def serve(port: int, redis_url: str | None):
+    """Server process: the app as deployed, with fakeredis swapped in for the worker's Redis connection"""
+    import uvicorn
+    from src.config import redis as redis_config
+    if not redis_url:
+        redis_config.redis_conn = fake_redis()  # Before src.main imports it
+    from src.main import socketio_app
+
+    uvicorn.run(socketio_app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def summarize(latencies: list[float], errors: int, duration: float) -> dict:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "per_second": round((len(latencies) + errors) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1e3, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1e3, 2),
+    }
+
+
+def seed_league(args) -> list[int]:
+    """Synthetic league through the bulk seeder, returns the ids of the running matches"""
+    from sqlmodel import Session, create_engine, select
+    from src.models import Match
+    from src.seeds import reset_database, seed_rows, synthetic_rows
+    from src.utils.helpers import MatchStatus
+
+    reset_database()
+    seed_rows(synthetic_rows(args.teams, args.players_per_team, args.matches, kick_off=datetime.now()))
+    engine = create_engine(os.environ["MYSQL_URI"])
+    with Session(engine) as session:
+        live = session.exec(select(Match.id).where(Match.status == MatchStatus.RUNNING).order_by(Match.id)).all()
+    engine.dispose()
+    return list(live)
+
+
+async def wait_until_up(client, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with status {process.returncode}")
+        try:
+            if (await client.get("/api")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("Server didn't start")
+
+
+async def run(args, base_url: str, live_matches: list[int]) -> dict:
+    import httpx
+    import socketio
+
+    written = live_matches[:args.writers]
+    if not written:
+        raise SystemExit("No running match to write to, raise --matches")
+    rng = random.Random(0)
+    read_urls = {
+        "match": lambda: f"/api/matches/{rng.choice(written)}",
+        "match list": lambda: "/api/matches/?limit=20",
+        "team": lambda: f"/api/teams/{rng.randint(1, args.teams)}",
+        "player": lambda: f"/api/players/{rng.randint(1, args.teams * args.players_per_team)}",
+        "standings": lambda: "/api/standings/?limit=20",
+        "leaderboard": lambda: "/api/players/leaderboards/goals?limit=20",
+    }
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    sent: dict[tuple[int, int], float] = {}  # (match id, new score) -> when the goal was sent
+    fanout = []
+    stop = asyncio.Event()
+
+    limits = httpx.Limits(max_connections=args.readers + args.writers + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def timed(name: str, request):
+            started = time.perf_counter()
+            try:
+                response = await request
+                response.raise_for_status()
+                latencies[name].append(time.perf_counter() - started)
+                return response
+            except Exception:
+                errors[name] += 1
+                return None
+
+        async def reader():
+            while not stop.is_set():
+                name = rng.choice(list(read_urls))
+                await timed(name, client.get(read_urls[name]()))
+
+        async def writer(match_id: int):
+            score = (await client.get(f"/api/matches/{match_id}")).json()["score_team1"]
+            while not stop.is_set():
+                sent[(match_id, score + 1)] = time.perf_counter()
+                response = await timed("goal event", client.post(f"/api/matches/{match_id}/events", json={"type": "goal", "team": 1}))
+                if response is not None:
+                    score = response.json()["score_team1"]
+                await asyncio.sleep(args.write_interval)
+
+        async def subscriber(match_id: int) -> socketio.AsyncClient:
+            sio = socketio.AsyncClient(reconnection=False)
+
+            @sio.on("match_update")
+            async def on_update(update):
+                received = time.perf_counter()
+                changes = update.get("changes") if update.get("type") == "delta" else update.get("match")
+                started = sent.get((match_id, (changes or {}).get("score_team1")))
+                if started is not None:
+                    fanout.append(received - started)
+
+            await sio.connect(base_url, transports=["websocket"], wait_timeout=30)
+            await sio.emit("subscribe", {"match_id": match_id})
+            return sio
+
+        await wait_until_up(client, args.server_process)
+        subscribers = []
+        for i in range(args.subscribers):
+            subscribers.append(await subscriber(written[i % len(written)]))
+        await asyncio.sleep(1)  # Subscriptions settle
+
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(reader()) for _ in range(args.readers)]
+        tasks += [asyncio.create_task(writer(match_id)) for match_id in written]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+        duration = time.perf_counter() - started
+        await asyncio.sleep(1)  # Last updates reach the subscribers
+        for sio in subscribers:
+            await sio.disconnect()
+
+    reads = [latency for name in read_urls for latency in latencies[name]]
+    return {
+        "endpoints": {name: summarize(latencies[name], errors[name], duration) for name in [*read_urls, "goal event"]},
+        "reads": summarize(reads, sum(errors[name] for name in read_urls), duration),
+        "fanout": {
+            "deliveries": len(fanout),
+            "expected": len(latencies["goal event"]) * args.subscribers // len(written),
+            "p50_ms": round(percentile(fanout, 50) * 1e3, 2),
+            "p99_ms": round(percentile(fanout, 99) * 1e3, 2),
+        },
+    }
+
+
+def print_results(results: dict, previous: dict | None = None):
+    def change(path: list[str], value: float) -> str:
+        old = previous
+        for key in path:
+            old = (old or {}).get(key)
+        if not isinstance(old, (int, float)) or not old:
+            return ""
+        return f" ({(value - old) / old * 100:+.0f}%)"
+
+    print(f"\n{'endpoint':<14} {'req/s':>14} {'p50 ms':>16} {'p99 ms':>16} {'errors':>7}")
+    rows = [(name, ["endpoints", name]) for name in results["endpoints"]] + [("all reads", ["reads"])]
+    for name, path in rows:
+        row = results
+        for key in path:
+            row = row[key]
+        print(f"{name:<14} {row['per_second']:>8}{change(path + ['per_second'], row['per_second']):>6} "
+              f"{row['p50_ms']:>9}{change(path + ['p50_ms'], row['p50_ms']):>7} "
+              f"{row['p99_ms']:>9}{change(path + ['p99_ms'], row['p99_ms']):>7} {row['errors']:>7}")
+    fanout = results["fanout"]
+    print(f"\nfan-out delay  p50 {fanout['p50_ms']} ms{change(['fanout', 'p50_ms'], fanout['p50_ms'])}  "
+          f"p99 {fanout['p99_ms']} ms{change(['fanout', 'p99_ms'], fanout['p99_ms'])}  "
+          f"{fanout['deliveries']}/{fanout['expected']} deliveries")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds of load")
+    parser.add_argument("--readers", type=int, default=50)
+    parser.add_argument("--writers", type=int, default=10, help="Live matches written to, one client each")
+    parser.add_argument("--write-interval", type=float, default=0.2, help="Seconds between two goals of a writer")
+    parser.add_argument("--subscribers", type=int, default=200)
+    parser.add_argument("--teams", type=int, default=200)
+    parser.add_argument("--players-per-team", type=int, default=25)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--redis-url", help="Real Redis instead of fakeredis (flushed between runs by you)")
+    parser.add_argument("--output", help="Results file, by default benchmarks/results/load_test-<commit>-<time>.json")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.redis_url)
+        return
+
+    live_matches = seed_league(args)
+    port = free_port()
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    # The server's logs (Socket.IO logs every packet) go to a file instead of drowning the results
+    log = tempfile.NamedTemporaryFile("w", prefix="load_test_server_", suffix=".log", delete=False)
+    command = [sys.executable, "-m", "benchmarks.load_test", "--serve", str(port)]
+    if args.redis_url:
+        command += ["--redis-url", args.redis_url]
+    args.server_process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        results = asyncio.run(run(args, f"http://127.0.0.1:{port}", live_matches))
+    finally:
+        args.server_process.terminate()
+        args.server_process.wait()
+        log.close()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+    print(f"{args.readers} readers, {args.writers} writers, {args.subscribers} subscribers, {args.duration:.0f} s "
+          f"(server log: {log.name})")
+    print_results(results, previous)
+
+    commit = git_commit()
+    output = args.output or os.path.join(results_dir, f"load_test-{commit}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    config = {key: value for key, value in vars(args).items() if key not in ("server_process", "serve", "compare", "output")}
+    with open(output, "w") as f:
+        json.dump({"commit": commit, "time": datetime.now().isoformat(), "config": config, "results": results}, f, indent=2)
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    main()
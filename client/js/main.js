@@ -31,7 +31,7 @@ class ApiService {
         }
     }
 
-    get(endpoint) { return this.fetchData(`${endpoint}?reaload=true`); }
+    get(endpoint) { return this.fetchData(endpoint); }
     post(endpoint, data) { return this.fetchData(endpoint, { method: 'POST', body: JSON.stringify(data) }); }
     put(endpoint, data) { return this.fetchData(endpoint, { method: 'PUT', body: JSON.stringify(data) }); }
     delete(endpoint) { return this.fetchData(endpoint, { method: 'DELETE' }); }
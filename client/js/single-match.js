@@ -88,7 +88,8 @@ class MatchDetails {
     }
 
     subscribeToMatch() {
-        this.socket.emit('subscribe', { match_id: this.matchId });
+        // After a reconnect the server replays the updates we missed since the last applied one
+        this.socket.emit('subscribe', { match_id: this.matchId, last_seq: this.seq });
     }
 
     unsubscribeFromMatch() {
@@ -96,45 +97,84 @@ class MatchDetails {
     }
 
     handleMatchUpdate(update) {
-        // Update match data
-        this.matchData = { ...this.matchData, ...update };
+        if (update.type === 'resync') {
+            // The server couldn't replay what we missed
+            this.resync();
+            return;
+        }
+        // Nothing to apply it to until the match is loaded, the seq it comes with tells what we missed meanwhile
+        if (this.seq === undefined) {
+            return;
+        }
+        // Already applied, keyframes included (a replayed update can overlap with a live one or arrive late)
+        if (update.seq <= this.seq) {
+            return;
+        }
+        // Keyframes carry the whole match, deltas only the fields that changed since the previous update
+        if (update.type === 'delta' && update.seq !== this.seq + 1) {
+            // Missed an update, our copy is out of date: reload the full match
+            this.resync();
+            return;
+        }
+        this.seq = update.seq;
+        const changes = update.type === 'keyframe' ? update.match : update.changes;
+
+        // Update match data (stats deltas only contain the changed counters)
+        this.matchData = {
+            ...this.matchData,
+            ...changes,
+            stats: changes.stats ? { ...this.matchData?.stats, ...changes.stats } : this.matchData?.stats,
+        };
 
         // Update scores
-        if (update.score_team1 !== undefined) {
-            document.getElementById('home-score').textContent = update.score_team1;
+        if (changes.score_team1 !== undefined) {
+            document.getElementById('home-score').textContent = changes.score_team1;
         }
-        if (update.score_team2 !== undefined) {
-            document.getElementById('away-score').textContent = update.score_team2;
+        if (changes.score_team2 !== undefined) {
+            document.getElementById('away-score').textContent = changes.score_team2;
         }
 
         // Update match status
-        if (update.status) {
+        if (changes.status) {
             this.updateMatchTime();
         }
 
         // Update stats if provided
-        if (update.stats) {
+        if (changes.stats) {
             this.updateMatchStats();
         }
 
         // Update team information if provided
-        if (update.team1) {
-            this.homeTeam = update.team1;
-            document.querySelectorAll('.team-name')[0].textContent = update.team1.name;
+        if (changes.team1) {
+            this.homeTeam = changes.team1;
+            document.querySelectorAll('.team-name')[0].textContent = changes.team1.name;
             this.renderLineups();
         }
-        if (update.team2) {
-            this.awayTeam = update.team2;
-            document.querySelectorAll('.team-name')[1].textContent = update.team2.name;
+        if (changes.team2) {
+            this.awayTeam = changes.team2;
+            document.querySelectorAll('.team-name')[1].textContent = changes.team2.name;
             this.renderLineups();
         }
 
-        // Add match event to timeline if provided
+        // Add match event to timeline if provided (sent next to the changes, on keyframes too)
         if (update.event) {
             this.addMatchEvent(update.event);
         }
     }
 
+    async resync() {
+        // Updates are skipped until the reload, which brings its own seq
+        this.seq = undefined;
+        try {
+            await this.fetchMatchData();
+            this.updateMatchTime();
+            this.renderLineups();
+            this.renderField();
+        } catch (error) {
+            this.showError(error.message);
+        }
+    }
+
     addMatchEvent(event) {
         const eventsContainer = document.querySelector('.card-body');
         const eventElement = document.createElement('div');
@@ -159,10 +199,13 @@ class MatchDetails {
                 icon = 'fa-circle text-primary';
         }
 
+        const team = event.team === 1 ? this.homeTeam : this.awayTeam;
+        const label = event.type.replace(/_/g, ' ');
+        const count = event.count > 1 ? ` x${event.count}` : '';
         eventElement.innerHTML = `
-            <strong>${event.time}'</strong> 
+            ${event.minute ? `<strong>${event.minute}'</strong>` : ''}
             <i class="fas ${icon}"></i> 
-            ${event.description}
+            ${label.charAt(0).toUpperCase() + label.slice(1)}${count} - ${team?.name ?? `Team ${event.team}`}
         `;
 
         // Insert at the top of the events list
@@ -222,7 +265,13 @@ class MatchDetails {
             }
             const matchData = await response.json();
 
+            // Seq of the last update this copy includes, live updates are applied from the next one on
+            this.seq = Number(response.headers.get('X-Match-Seq') ?? 0);
             this.matchData = matchData;
+            if (this.socket.connected) {
+                // Already subscribed, but updates that arrived during the fetch were skipped: have them replayed
+                this.subscribeToMatch();
+            }
             this.homeTeam = matchData.team1;
             this.awayTeam = matchData.team2;
 
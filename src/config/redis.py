@@ -1,12 +1,103 @@
+import asyncio
 import os
-import redis.asyncio as redis
+import time
+from urllib.parse import urlsplit, urlunsplit
 from redis.asyncio.client import Redis
-from redis.asyncio.connection import ConnectionPool
+from redis.asyncio.connection import BlockingConnectionPool
+from redis.exceptions import ConnectionError
+from src.utils.metrics import record_redis_round_trip
 
-redis_conn = redis.from_url(os.getenv("REDIS_HOST", None), encoding="utf-8", decode_responses=True)
+# Pool settings, see .env.example
+redis_max_connections = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+redis_pool_timeout = float(os.getenv("REDIS_POOL_TIMEOUT", 5))  # Seconds to wait for a free connection
+redis_socket_timeout = float(os.getenv("REDIS_SOCKET_TIMEOUT", 5))
+redis_connect_timeout = float(os.getenv("REDIS_CONNECT_TIMEOUT", 2))
+redis_health_check_interval = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30))
 
-# Create a Redis connection pool
-redis_pool = ConnectionPool.from_url(f"{os.getenv('REDIS_HOST', None)}:{os.getenv('REDIS_PORT', None)}", db=0)
+
+def build_redis_url(host: str | None, port: str | None = None) -> str:
+    """
+    Redis URL from REDIS_HOST (with or without scheme, db path or port) and REDIS_PORT.
+
+    Args:
+        host (str | None): e.g. "redis://localhost", "localhost" or "redis://:secret@cache:6380/1".
+        port (str | None): Used only when the host doesn't carry a port.
+
+    Returns:
+        str: URL for ConnectionPool.from_url.
+    """
+    host = host or "localhost"
+    parts = urlsplit(host if "://" in host else f"redis://{host}")
+    if port and parts.port is None:
+        parts = parts._replace(netloc=f"{parts.netloc}:{port}")
+    return urlunsplit(parts)
+
+
+class MeteredConnectionPool(BlockingConnectionPool):
+    """
+    Bounded pool: at most `max_connections`, callers wait up to `timeout` seconds for a free connection
+    instead of opening more. Counts checkouts, waits and timeouts for the stats endpoint.
+
+    A checkout is one round trip (a command or a pipeline), timed from the request for a connection to its
+    release for the request metrics.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+
+    async def get_connection(self, command_name, *keys, **options):
+        started = time.perf_counter()
+        if not self.can_get_connection():
+            self.waits += 1
+        try:
+            connection = await super().get_connection(command_name, *keys, **options)
+        except ConnectionError as e:
+            if isinstance(e.__cause__, asyncio.TimeoutError):
+                self.timeouts += 1
+            raise
+
+        self.checkouts += 1
+        self.peak_in_use = max(self.peak_in_use, len(self._in_use_connections))
+        connection.checked_out_at = started
+        return connection
+
+    async def release(self, connection):
+        started = getattr(connection, "checked_out_at", None)
+        if started is not None:
+            record_redis_round_trip(time.perf_counter() - started)
+            connection.checked_out_at = None
+        await super().release(connection)
+
+    def stats(self) -> dict:
+        in_use = len(self._in_use_connections)
+        return {
+            "max_connections": self.max_connections,
+            "in_use": in_use,
+            "idle": len(self._available_connections),
+            "utilization": round(in_use / self.max_connections, 4),
+            "peak_in_use": self.peak_in_use,
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+        }
+
+
+# One pool per worker, shared by requests, the rate limiter and the match update dispatcher
+redis_pool = MeteredConnectionPool.from_url(
+    os.getenv("REDIS_URL") or build_redis_url(os.getenv("REDIS_HOST"), os.getenv("REDIS_PORT")),
+    max_connections=redis_max_connections,
+    timeout=redis_pool_timeout,
+    socket_timeout=redis_socket_timeout,
+    socket_connect_timeout=redis_connect_timeout,
+    socket_keepalive=True,
+    health_check_interval=redis_health_check_interval,
+    retry_on_timeout=True,
+)
+redis_conn = Redis(connection_pool=redis_pool)
 
 
 async def redis_connection() -> Redis:
@@ -15,4 +106,10 @@ async def redis_connection() -> Redis:
 
 # Function to get Redis client
 async def get_redis() -> Redis:
-    return redis.Redis(connection_pool=redis_pool)
+    return redis_conn
+
+
+async def close_redis():
+    """Close every pooled connection on shutdown"""
+    await redis_conn.aclose()
+    await redis_pool.disconnect()
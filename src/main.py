@@ -1,29 +1,63 @@
 from dotenv import load_dotenv
 load_dotenv()  # take environment variables from .env.
+import asyncio
 import socketio
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi_limiter import FastAPILimiter
-from src.config.database import create_db_and_tables
-from src.config.redis import redis_conn
+from src.config.database import create_db_and_tables, engine
+from src.config.redis import close_redis, redis_conn, redis_pool
+from src.utils.pagination import next_cursor_header
+from src.utils.cache import live_stats_write_behind, match_seq_header
+from src.utils.live_stats import flush_live_stats, flush_live_stats_periodically
+from src.utils.local_cache import match_cache
+from src.utils.match_clock import match_clock_enabled, run_match_clock
+from src.utils.metrics import prometheus_content_type, registry, RequestMetricsMiddleware
+from src.utils.passwords import password_pool, password_pool_stats
+from src.utils.warmup import warm_cache, warm_on_startup
 from src.routers.team import router as team_router
 from src.routers.player import router as player_router
 from src.routers.match import router as match_router
 from src.routers.auth import router as auth_router
-from src.sockets import sio  # Import the `sio` instance from `sockets.py`
+from src.routers.standings import router as standings_router
+from src.sockets import sio, dispatch_match_updates  # Import the `sio` instance from `sockets.py`
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
-    create_db_and_tables()
-    # Clear Redis database
-    await redis_conn.flushdb()  # Clears all data in the Redis DB
+    await create_db_and_tables()
+    # Redis is not cleared: sessions and rate limits survive restarts, cache keys are versioned (see cache_key)
 
     await FastAPILimiter.init(redis_conn)
+
+    # Optionally fill the cache before this worker takes traffic
+    if warm_on_startup:
+        print(f"Cache warmed with {await warm_cache(redis_conn)} matches")
+
+    # One Redis subscription per worker fans match updates out to Socket.IO rooms
+    dispatcher = asyncio.create_task(dispatch_match_updates())
+
+    # Live match stats are kept in Redis and written to MySQL in the background
+    tasks = [dispatcher]
+    if live_stats_write_behind:
+        tasks.append(asyncio.create_task(flush_live_stats_periodically(redis_conn)))
+
+    # Half time, second half and full time are set by the server, one worker at a time
+    if match_clock_enabled:
+        tasks.append(asyncio.create_task(run_match_clock(redis_conn)))
     yield
     print("shutting down")
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    if live_stats_write_behind:
+        await flush_live_stats(redis_conn)
+    await close_redis()
+    await engine.dispose()
+    password_pool.shutdown(wait=False, cancel_futures=True)
 
 
 app = FastAPI(lifespan=lifespan)
@@ -35,7 +69,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[next_cursor_header, match_seq_header, "Server-Timing"],
 )
+# SQL, Redis, cache and serialization cost of every request, scraped from /metrics
+app.add_middleware(RequestMetricsMiddleware)
 
 # Integrate Socket.IO with FastAPI
 socketio_app = socketio.ASGIApp(sio, app)
@@ -45,11 +82,36 @@ def home():
     return {"message": "Home of the contract!"}
 
 
+# Hit/miss counters of this worker's in-memory match cache and utilization of its Redis and password pools
+@app.get('/api/cache/stats')
+def cache_stats():
+    return {"match_cache": match_cache.stats(), "redis_pool": redis_pool.stats(), "password_pool": password_pool_stats()}
+
+
+# Prometheus scrape endpoint, totals of this worker since it started
+@app.get('/metrics', include_in_schema=False)
+def metrics():
+    local_cache, pool, passwords = match_cache.stats(), redis_pool.stats(), password_pool_stats()
+    sampled = {
+        "local_cache_entries": ("gauge", "Entries in the in-memory match cache", local_cache["entries"]),
+        "local_cache_hits_total": ("counter", "Hits of the in-memory match cache", local_cache["hits"]),
+        "local_cache_misses_total": ("counter", "Misses of the in-memory match cache", local_cache["misses"]),
+        "redis_pool_in_use": ("gauge", "Redis connections checked out", pool["in_use"]),
+        "redis_pool_waits_total": ("counter", "Redis checkouts that waited for a free connection", pool["waits"]),
+        "redis_pool_timeouts_total": ("counter", "Redis checkouts that timed out", pool["timeouts"]),
+        "password_pool_in_flight": ("gauge", "Password hashes and checks running or queued", passwords["in_flight"]),
+        "password_pool_rejections_total": ("counter", "Logins refused with a 503, the password pool was full",
+                                           passwords["rejections"]),
+    }
+    return PlainTextResponse(registry.render(sampled), media_type=prometheus_content_type)
+
+
 # Routers
 app.include_router(team_router, prefix="/api/teams", tags=["Team"])
 app.include_router(match_router, prefix="/api/matches", tags=["Match"])
 app.include_router(player_router, prefix="/api/players", tags=["Player"])
 app.include_router(auth_router, prefix="/api/auth", tags=["Auth"])
+app.include_router(standings_router, prefix="/api/standings", tags=["Standings"])
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,3 +1,5 @@
+from sqlalchemy import Index
+from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Field, SQLModel, Relationship
 from typing import List, Optional
 from passlib.context import CryptContext
@@ -64,6 +66,18 @@ class Team(BaseModel, table=True):
 
 
 class Player(BaseModel, table=True):
+    # Players of a team in id order, the keyset pagination of /api/players?team_id=. The others serve the MySQL
+    # fallback of the leaderboards (utils/leaderboards.py): top scorers/assisters overall, of a team, of a position.
+    __table_args__ = (
+        Index("ix_player_team_id_id", "team_id", "id"),
+        Index("ix_player_goals", "goals", "id"),
+        Index("ix_player_assists", "assists", "id"),
+        Index("ix_player_team_id_goals", "team_id", "goals", "id"),
+        Index("ix_player_team_id_assists", "team_id", "assists", "id"),
+        Index("ix_player_position_goals", "position", "goals", "id"),
+        Index("ix_player_position_assists", "position", "assists", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str = Field(index=True)
     birth: Optional[str] = Field(default=None, index=True)
@@ -88,6 +102,12 @@ class Player(BaseModel, table=True):
 
 
 class Match(BaseModel, table=True):
+    # Keyset pagination by kick-off time (id breaks ties) and by id within a status
+    __table_args__ = (
+        Index("ix_match_start_time_id", "start_time", "id"),
+        Index("ix_match_status_id", "status", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     team1_id: int = Field(foreign_key="team.id")
     team2_id: int = Field(foreign_key="team.id")
@@ -162,6 +182,22 @@ class MatchStats(SQLModel, table=True):
         }
 
 
+class Standing(SQLModel, table=True):
+    # Materialized league table, updated as matches reach full time (see utils/standings.py). The index serves
+    # the MySQL fallback of the top-N query, ranked by points, then goal difference, then goals scored.
+    __table_args__ = (Index("ix_standing_rank", "points", "goal_difference", "goals_for", "team_id"),)
+
+    team_id: int = Field(foreign_key="team.id", primary_key=True)
+    played: int = Field(default=0)
+    wins: int = Field(default=0)
+    draws: int = Field(default=0)
+    losses: int = Field(default=0)
+    goals_for: int = Field(default=0)
+    goals_against: int = Field(default=0)
+    goal_difference: int = Field(default=0)
+    points: int = Field(default=0)
+
+
 class User(BaseModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     username: str = Field(index=True, unique=True, nullable=False)
@@ -170,16 +206,24 @@ class User(BaseModel, table=True):
     # Relationships
     favorite_matches: List["UserMatchLink"] = Relationship(back_populates="user")
 
-    def set_password(self, password: str):
-        """Hashes and sets the user's password."""
-        self.hashed_password = pwd_context.hash(password)
-
-    def verify_password(self, password: str) -> bool:
-        """Verifies the provided password against the stored hash."""
-        return pwd_context.verify(password, self.hashed_password)
-
     def to_dict(self):
         return {
             "id": self.id,
             "username": self.username,
         }
+
+
+# Loader strategies for the relationships responses and caches serialize. Async sessions can't lazy load,
+# and loading up front keeps the query count fixed regardless of page size: selectinload for collections
+# (one SELECT ... IN per relationship), joinedload for many-to-one.
+team_load_options = (
+    selectinload(Team.players),
+    selectinload(Team.matches_as_team1),
+    selectinload(Team.matches_as_team2),
+)
+
+match_detail_load_options = (
+    joinedload(Match.stats),
+    joinedload(Match.team1).options(*team_load_options),
+    joinedload(Match.team2).options(*team_load_options),
+)
@@ -0,0 +1,23 @@
+from dotenv import load_dotenv
+load_dotenv()  # take environment variables from .env.
+
+import asyncio
+from src.config.database import create_db_and_tables, engine
+from src.config.redis import close_redis, redis_conn
+from src.utils.standings import rebuild_standings
+
+
+# Recompute the standings from every finished match (backfill after an import, or after changing the rules).
+# Run it while no results are being recorded: results counted during the rebuild may be lost.
+async def main():
+    await create_db_and_tables()
+    try:
+        teams = await rebuild_standings(redis_conn)
+        print(f"Standings rebuilt for {teams} teams")
+    finally:
+        await close_redis()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
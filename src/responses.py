@@ -95,3 +95,17 @@ class MatchDetailResponse(SimpleMatchResponse):
 
     class Config:
         from_attributes = True
+
+
+# One row of the league table
+class StandingResponse(BaseModel):
+    rank: int
+    team_id: int
+    played: int
+    wins: int
+    draws: int
+    losses: int
+    goals_for: int
+    goals_against: int
+    goal_difference: int
+    points: int
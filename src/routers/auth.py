@@ -2,9 +2,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from src.models import User, Match, UserMatchLink
 from sqlmodel import select
 from src.config.database import SessionDep
-from src.schema import UserCreate, UserLogin
-from src.utils.cache import cache_user_session, get_cached_user, remove_favorite_match, get_cached_favorite_matches
+from src.schema import SessionUser, UserCreate, UserLogin
+from src.utils.cache import (
+    cache_user_session, get_cached_user, cache_favorite_matches, get_cached_favorite_matches, invalidate_favorite_matches
+)
 from src.config.redis import get_redis
+from src.utils.passwords import hash_password, verify_password
 from fastapi_limiter.depends import RateLimiter
 import logging
 
@@ -17,7 +20,7 @@ logger = logging.getLogger(__name__)
 async def register_user(user_data: UserCreate, session: SessionDep):
     # Use SQLModel's select to check if the user already exists
     statement = select(User).where(User.username == user_data.username)
-    session_user = session.exec(statement).first()  # Use .first() to get the single result
+    session_user = (await session.exec(statement)).first()  # Use .first() to get the single result
 
     # Debug logging to check the session_user value
     logger.debug(f"Checking for existing user: {user_data.username}, Found: {session_user}")
@@ -27,12 +30,12 @@ async def register_user(user_data: UserCreate, session: SessionDep):
 
     # Create a new user
     user = User(username=user_data.username)
-    user.set_password(user_data.password)  # Hash the password
+    user.hashed_password = await hash_password(user_data.password)  # Hashed off the event loop
 
     try:
         session.add(user)
-        session.commit()
-        session.refresh(user)
+        await session.commit()
+        await session.refresh(user)
         # await cache_user(redis, user)  # Cache the newly created user
         return {"msg": "User registered successfully", "user": user.username}
     except Exception as e:
@@ -43,38 +46,34 @@ async def register_user(user_data: UserCreate, session: SessionDep):
 # Login and generate a session
 @router.post("/login", dependencies=[Depends(RateLimiter(times=5, seconds=10))])  # Example: 5 requests per 10 seconds
 async def login_user(user_data: UserLogin, session: SessionDep, redis=Depends(get_redis)):
-    user = session.exec(select(User).where(User.username == user_data.username)).first()
-    if not user or not user.verify_password(user_data.password):
+    user = (await session.exec(select(User).where(User.username == user_data.username))).first()
+    if not user or not await verify_password(user_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    # Save session token in Redis with user id
-    session_token = await cache_user_session(redis, user.id)
+    # Save the session in Redis with the user's profile
+    session_token = await cache_user_session(redis, user)
     return {"session_token": session_token}
 
 
-# Get the current user from session
-async def get_current_user(session_token: str, session: SessionDep, redis=Depends(get_redis)):
-    user_id = await get_cached_user(redis, session_token)
-    if not user_id:
-        raise HTTPException(status_code=401, detail="Session expired or invalid")
-
-    user = session.query(User).get(int(user_id))
+# Get the current user from session: one Redis round trip, no SQL (the session holds the profile)
+async def get_current_user(session_token: str, redis=Depends(get_redis)) -> SessionUser:
+    user = await get_cached_user(redis, session_token)
     if not user:
-        raise HTTPException(status_code=401, detail="User not found")
+        raise HTTPException(status_code=401, detail="Session expired or invalid")
 
-    return user
+    return SessionUser(**user)
 
 
 # Protected route example
 @router.get("/protected")
-async def protected_route(current_user: User = Depends(get_current_user)):
+async def protected_route(current_user: SessionUser = Depends(get_current_user)):
     return {"msg": f"Welcome, {current_user.username}"}
 
 
 # Route to add a match to a user's favorite matches
 @router.post("/favorite-match/{match_id}")
-async def add_favorite_match(match_id: int, session: SessionDep, current_user: User = Depends(get_current_user), redis=Depends(get_redis)):
-    match = session.get(Match, match_id)
+async def add_favorite_match(match_id: int, session: SessionDep, current_user: SessionUser = Depends(get_current_user), redis=Depends(get_redis)):
+    match = await session.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail="Match not found")
 
@@ -82,7 +81,7 @@ async def add_favorite_match(match_id: int, session: SessionDep, current_user: U
     statement = select(UserMatchLink).where(
         (UserMatchLink.user_id == current_user.id) & (UserMatchLink.match_id == match_id)
     )
-    favorite_link = session.exec(statement).first()
+    favorite_link = (await session.exec(statement)).first()
 
     if favorite_link:
         raise HTTPException(status_code=400, detail="Match already in favorites")
@@ -90,38 +89,39 @@ async def add_favorite_match(match_id: int, session: SessionDep, current_user: U
     # Add the match to user's favorites
     user_match_link = UserMatchLink(user_id=current_user.id, match_id=match_id)
     session.add(user_match_link)
-    session.commit()
+    await session.commit()
 
-    # Update the cache with the new favorite match
+    # Drop the cached favorites, the next read rebuilds them
+    await invalidate_favorite_matches(redis, current_user.id)
 
     return {"msg": "Match added to favorites"}
 
 
 # Route to remove a match from a user's favorite matches
 @router.delete("/favorite-match/{match_id}")
-async def remove_favorite_match(match_id: int, session: SessionDep, current_user: User = Depends(get_current_user), redis=Depends(get_redis)):
+async def remove_favorite_match(match_id: int, session: SessionDep, current_user: SessionUser = Depends(get_current_user), redis=Depends(get_redis)):
     # Find the match in the user's favorites
     statement = select(UserMatchLink).where(
         (UserMatchLink.user_id == current_user.id) & (UserMatchLink.match_id == match_id)
     )
-    favorite_link = session.exec(statement).first()
+    favorite_link = (await session.exec(statement)).first()
 
     if not favorite_link:
         raise HTTPException(status_code=404, detail="Favorite match not found")
 
     # Remove the match from favorites
-    session.delete(favorite_link)
-    session.commit()
+    await session.delete(favorite_link)
+    await session.commit()
 
-    # Update the cache by removing the match
-    await remove_favorite_match(redis, current_user.id, match_id)
+    # Drop the cached favorites, the next read rebuilds them
+    await invalidate_favorite_matches(redis, current_user.id)
 
     return {"msg": "Match removed from favorites"}
 
 
 # Route to list all favorite matches for the current user
 @router.get("/favorite-matches")
-async def get_favorite_matches(session: SessionDep, current_user: User = Depends(get_current_user), redis=Depends(get_redis)):
+async def get_favorite_matches(session: SessionDep, current_user: SessionUser = Depends(get_current_user), redis=Depends(get_redis)):
     # Check the cache for favorite matches first
     cached_favorite_matches = await get_cached_favorite_matches(redis, current_user.id)
     if cached_favorite_matches:
@@ -129,9 +129,9 @@ async def get_favorite_matches(session: SessionDep, current_user: User = Depends
 
     # If not in cache, fetch from the database
     statement = select(Match).join(UserMatchLink).where(UserMatchLink.user_id == current_user.id)
-    favorite_matches = session.exec(statement).all()
+    favorite_matches = (await session.exec(statement)).all()
 
     # Cache the fetched favorite matches
-    await add_favorite_match(redis, current_user.id, favorite_matches)
+    await cache_favorite_matches(redis, current_user.id, favorite_matches)
 
     return {"favorite_matches": favorite_matches}
@@ -1,22 +1,98 @@
 from datetime import datetime
 from fastapi import HTTPException, Query, APIRouter, Depends
+from sqlalchemy import tuple_, update
+from types import SimpleNamespace
 from sqlmodel import select
 from copy import copy
 from src.config.redis import get_redis
-from src.models import Match, MatchStats
-from src.config.database import SessionDep
+from src.models import Match, MatchStats, match_detail_load_options
+from src.config.database import SessionDep, async_session
 from src.utils.cache import (
-    cache_match, get_cached_match, get_cached_matches,
-    cache_matches
+    cache_key, cache_match, cache_matches_and_publish, end_live_stats, get_live_stats, get_or_load_match_page,
+    get_or_load_raw, invalidate, json_response, live_stats_write_behind, match_page_to_cache, match_seq_header, match_tags,
+    match_to_cache, overlay_live_stats, patch_cached_match, publish_live_stats, start_live_stats, update_live_stats,
+    update_live_stats_many
 )
-from typing import List, Annotated
+from typing import List, Annotated, Literal, Optional
 from src.responses import MatchDetailResponse, MatchResponse
-from sqlalchemy.orm import selectinload
-from src.utils.helpers import MatchStatus
-from src.utils.datetime import iso_date_to_offset
+from src.schema import MatchBulkUpdate, MatchEvent, MatchStatsUpdate, MatchUpdate
+from sqlalchemy.orm import joinedload
+from src.utils.datetime import match_minute
+from src.utils.helpers import MatchEventType, MatchStatus, live_statuses
+from src.utils.local_cache import match_cache
+from src.utils.pagination import decode_cursor, max_page_size, next_cursor_header, next_page
+from src.utils.standings import apply_standings, publish_standings, standing_deltas
 
 router = APIRouter()
 
+
+async def load_match_detail(session: SessionDep, match_id: int) -> Match | None:
+    # A SELECT (unlike session.get) also fills unloaded relationships of a match already in the session
+    statement = select(Match).where(Match.id == match_id).options(*match_detail_load_options)
+    return (await session.exec(statement)).first()
+
+
+# Match fields a partial update may set. The status isn't one of them, it follows the match clock.
+match_update_fields = (
+    "team1_id", "team2_id", "score_team1", "score_team2", "start_time", "half_time", "second_start", "end_time",
+)
+stats_update_fields = (
+    "shots_team1", "shots_team2", "shots_on_target_team1", "shots_on_target_team2",
+    "corners_team1", "corners_team2", "yellow_cards_team1", "yellow_cards_team2",
+)
+
+# Counters each event adds to, {team} being 1 or 2. Scores are match columns, the others stats.
+match_event_counters = {
+    MatchEventType.GOAL: ("score_team{team}", "shots_team{team}", "shots_on_target_team{team}"),
+    MatchEventType.SHOT: ("shots_team{team}",),
+    MatchEventType.SHOT_ON_TARGET: ("shots_team{team}", "shots_on_target_team{team}"),
+    MatchEventType.CORNER: ("corners_team{team}",),
+    MatchEventType.YELLOW_CARD: ("yellow_cards_team{team}",),
+}
+score_fields = ("score_team1", "score_team2")
+
+# The first time one of these times is set the status moves on, later entries win
+status_transitions = (
+    ("start_time", MatchStatus.RUNNING),
+    ("second_start", MatchStatus.RUNNING),
+    ("half_time", MatchStatus.HALF_TIME),
+    ("end_time", MatchStatus.FULL_TIME),
+)
+
+
+def match_changes(match, match_update) -> dict:
+    """
+    Columns to set for a partial match update, status transition included.
+
+    Args:
+        match: Current values of the match (a Match or anything with the same attributes).
+        match_update: Update with the fields to change, None fields are left alone.
+
+    Returns:
+        dict: Column name to new value.
+    """
+    changes = {
+        field: getattr(match_update, field) for field in match_update_fields
+        if getattr(match_update, field, None) is not None
+    }
+    for field, status in status_transitions:
+        if changes.get(field) and not getattr(match, field):
+            changes["status"] = status
+    return changes
+
+
+def stats_changes(stats_update) -> dict:
+    """Columns to set for a partial stats update, possession of team 2 follows from team 1"""
+    changes = {
+        field: getattr(stats_update, field) for field in stats_update_fields
+        if getattr(stats_update, field, None) is not None
+    }
+    if stats_update.possession_team1 is not None:
+        changes["possession_team1"] = stats_update.possession_team1
+        changes["possession_team2"] = 100 - stats_update.possession_team1
+    return changes
+
+
 # Store WebSocket connections in a list
 connections = []
 
@@ -27,8 +103,8 @@ async def create_match(match: Match, session: SessionDep, redis=Depends(get_redi
     try:
         # Add match to database
         session.add(match)
-        session.commit()
-        session.refresh(match)  # Ensure the match object has an ID
+        await session.commit()
+        await session.refresh(match)  # Ensure the match object has an ID
 
         # Create default match stats
         match_stats = MatchStats(
@@ -45,38 +121,54 @@ async def create_match(match: Match, session: SessionDep, redis=Depends(get_redi
             yellow_cards_team2=0
         )
         session.add(match_stats)
-        session.commit()
+        await session.commit()
 
         # Refresh the match to include relationship with stats
-        session.refresh(match)
+        match = await load_match_detail(session, match.id)
 
-        # Cache the match in Redis
+        # Both teams have a new match: drop cached teams and matches showing them, then cache the match
+        await invalidate(redis, [f"team:{match.team1_id}", f"team:{match.team2_id}"])
         await cache_match(redis, match)
 
         return match
 
     except Exception as e:
-        session.rollback()  # Rollback any database changes on error
+        await session.rollback()  # Rollback any database changes on error
         raise HTTPException(status_code=500, detail=str(e))
 
 
 # Fetch match by ID (New)
 @router.get("/{match_id}", response_model=MatchDetailResponse)
-async def get_match(match_id: int, session: SessionDep, redis=Depends(get_redis)) -> MatchDetailResponse:
-    try:
-        # Check Redis cache for the match
-        match = await get_cached_match(redis, match_id)
-        if match:
-            return match
-
+async def get_match(match_id: int, redis=Depends(get_redis)) -> MatchDetailResponse:
+    async def load_match():
         # Fetch from the database if not in cache
-        match = session.get(Match, match_id)
+        async with async_session() as session:
+            match = await load_match_detail(session, match_id)
+            match_dict = match_to_cache(match) if match else None
+        if match_dict and live_stats_write_behind:
+            await overlay_live_stats(redis, [match_dict])
+        return match_dict
+
+    try:
+        # This worker's copy first, the match update dispatcher drops it whenever the match changes
+        key, seq_key = cache_key("match", match_id), cache_key("match_seq", match_id)
+        match = match_cache.get(key)
+        seq = match_cache.get(seq_key) if match is not None else None
+        if seq is not None:
+            return json_response(match, headers={match_seq_header: seq.decode()})
+
+        # Then Redis, concurrent misses (e.g. right after expiry during a live match) share one load.
+        # The seq is read first: the match served is at least as new, so a client resuming from it misses no update
+        token = match_cache.token()
+        seq = await redis.get(seq_key) or b"0"
+        match = await get_or_load_raw(redis, key, load_match, tags=match_tags)
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
+        match_cache.set(key, match, token)
+        match_cache.set(seq_key, seq, token)
 
-        # Cache the match for future requests
-        await cache_match(redis, match)
-        return match
+        # Cached bytes are already in MatchDetailResponse shape
+        return json_response(match, headers={match_seq_header: seq.decode()})
 
     except HTTPException as e:
         # Explicitly raised HTTPExceptions are propagated
@@ -90,134 +182,339 @@ async def get_match(match_id: int, session: SessionDep, redis=Depends(get_redis)
 
 @router.get("/", response_model=List[MatchResponse])
 async def get_matches(
-        session: SessionDep,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        order: Literal["id", "start_time"] = "id",
+        status: Optional[MatchStatus] = Query(None, description="Filter matches by status"),
         offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100,
-        reload: bool = False,
+        limit: Annotated[int, Query(ge=1, le=max_page_size)] = max_page_size,
         redis=Depends(get_redis),
 ) -> List[MatchResponse]:
-    # Fetch cached matches if available
-    if reload:
-        matches = await get_cached_matches(redis)
-        if matches:
-            return matches
-
-    # Fetch matches with related team1 and team2 fields
-    statement = (
-        select(Match)
-        .options(selectinload(Match.team1), selectinload(Match.team2))
-        .offset(offset)
-        .limit(limit)
-    )
-    matches = session.exec(statement).all()
-
-    if not matches:
+    # Keyset pagination: the cursor holds the sort key of the last match, so every page is an index range scan.
+    # Offset is only used when no cursor is given.
+    keys = ("start_time", "id") if order == "start_time" else ("id",)
+    after = decode_cursor(cursor, *keys)
+
+    async def load_page():
+        # Fetch matches with related team1 and team2 fields, one extra row tells whether there is a next page
+        statement = select(Match).options(joinedload(Match.team1), joinedload(Match.team2)).limit(limit + 1)
+        if status:
+            statement = statement.where(Match.status == status)
+        if order == "start_time":
+            # Matches without a kick-off time aren't scheduled yet and have no place in this ordering
+            statement = statement.where(Match.start_time.is_not(None)).order_by(Match.start_time, Match.id)
+            if after:
+                statement = statement.where(tuple_(Match.start_time, Match.id) > tuple_(*after))
+        else:
+            statement = statement.order_by(Match.id)
+            if after:
+                statement = statement.where(Match.id > after[0])
+        if not after:
+            statement = statement.offset(offset)
+
+        async with async_session() as session:
+            matches = (await session.exec(statement)).all()
+        if not matches:
+            return None
+        return match_page_to_cache(*next_page(matches, limit, *keys))
+
+    # Each page is cached on its own; creating or updating any match moves the cached list to a new version
+    page = f"{order}:{status.value if status else 'all'}:{f'c{cursor}' if after else f'o{offset}'}:{limit}"
+    cached = await get_or_load_match_page(redis, page, load_page)
+    if not cached:
         raise HTTPException(status_code=404, detail="No matches found")
 
-    # Cache the match data if necessary
-    await cache_matches(redis, matches)
-    return matches  # Use from_orm to convert ORM models
+    # Cached bytes are already in MatchResponse shape
+    matches, next_cursor = cached
+    return json_response(matches, headers={next_cursor_header: next_cursor} if next_cursor else None)
+
+
+@router.patch("/", response_model=dict)
+async def bulk_update_matches(body: MatchBulkUpdate, session: SessionDep, redis=Depends(get_redis)):
+    """
+    Apply many match/stats deltas (e.g. a live data feed tick) with the same rules as update_match.
+
+    One transaction: a SELECT of the matches and one of their stats, bulk UPDATEs by primary key, then one load of
+    the updated matches. Redis gets one invalidation and two pipelines for all of them. Updates of the same match
+    apply in order. The batch is rejected as a whole when a match (or the stats to update) doesn't exist. With
+    LIVE_STATS_WRITE_BEHIND the stats of live matches go to Redis instead, see update_match.
+    """
+    ids = sorted({item.id for item in body.updates})
+    try:
+        # Current clock fields, teams and scores of every match (locked, see update_match), for status transitions,
+        # team swaps and standings
+        statement = select(
+            Match.id, Match.team1_id, Match.team2_id, Match.start_time, Match.half_time, Match.second_start, Match.end_time,
+            Match.status, Match.score_team1, Match.score_team2
+        ).where(Match.id.in_(ids)).with_for_update()
+        current = {row.id: SimpleNamespace(**row._asdict()) for row in (await session.exec(statement)).all()}
+        before = {match_id: copy(match) for match_id, match in current.items()}
+        missing = [match_id for match_id in ids if match_id not in current]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Matches not found: {missing}")
+
+        stats_statement = select(MatchStats.match_id, MatchStats.id).where(MatchStats.match_id.in_(ids))
+        stats_ids = dict((await session.exec(stats_statement)).all())
+
+        match_rows: dict[int, dict] = {}
+        stats_rows: dict[int, dict] = {}
+        new_stats = set()
+        starting = set()
+        tags = {f"match:{match_id}" for match_id in ids}
+        for item in body.updates:
+            match = current[item.id]
+            if item.match_update:
+                changes = match_changes(match, item.match_update)
+                if changes.get("start_time") and not match.start_time:
+                    starting.add(item.id)
+                    if item.id not in stats_ids:
+                        new_stats.add(item.id)  # Starting without stats, create them like update_match does
+
+                # A swapped team changes the old and new team's match lists
+                for team in ("team1_id", "team2_id"):
+                    if changes.get(team, getattr(match, team)) != getattr(match, team):
+                        tags.update((f"team:{getattr(match, team)}", f"team:{changes[team]}"))
+
+                for field, value in changes.items():
+                    setattr(match, field, value)
+                match_rows.setdefault(item.id, {"id": item.id}).update(changes)
+
+            if item.stats_update:
+                if item.id not in stats_ids and item.id not in new_stats:
+                    raise HTTPException(status_code=404, detail=f"MatchStats not found for match {item.id}")
+                stats_rows.setdefault(item.id, {}).update(stats_changes(item.stats_update))
+
+        # Write-behind: stats of live matches go to their Redis hashes once the rest is committed (a failed commit
+        # leaves them untouched), matches ending now get their final stats written
+        ending = {match_id for match_id, row in match_rows.items() if row.get("status") == MatchStatus.FULL_TIME}
+        live_stats_rows = {}
+        if live_stats_write_behind:
+            live = await get_live_stats(redis, stats_rows.keys() - ending - new_stats)
+            live_stats_rows = {match_id: stats_rows.pop(match_id) for match_id in live}
+            for match_id, stats in (await get_live_stats(redis, ending & stats_ids.keys())).items():
+                stats_rows[match_id] = {**stats, **stats_rows.get(match_id, {})}
+
+        # Bulk UPDATE by primary key (executemany), new stats are inserted with their values
+        if match_rows:
+            await session.exec(update(Match), params=list(match_rows.values()))
+        if stats_rows.keys() - new_stats:
+            await session.exec(update(MatchStats), params=[
+                {"id": stats_ids[match_id], **changes} for match_id, changes in stats_rows.items() if match_id not in new_stats
+            ])
+        session.add_all(MatchStats(match_id=match_id, **stats_rows.get(match_id, {})) for match_id in new_stats)
+        standings = standing_deltas((before[match_id], current[match_id]) for match_id in ids)
+        await apply_standings(redis, session, standings)
+        await session.commit()
+        await publish_standings(redis, standings)
+
+        if live_stats_rows:
+            live = await update_live_stats_many(redis, live_stats_rows)
+            # Matches that reached full time since (their hash is gone) get the stats in MySQL
+            ended = [{"id": stats_ids[match_id], **changes} for match_id, changes in live_stats_rows.items() if match_id not in live]
+            if ended:
+                await session.exec(update(MatchStats), params=ended)
+                await session.commit()
+
+        statement = select(Match).where(Match.id.in_(ids)).options(*match_detail_load_options)
+        matches = (await session.exec(statement)).all()
+
+        # Live stats move to Redis once a match runs, and are dropped there once final
+        if live_stats_write_behind:
+            await end_live_stats(redis, ending)
+            for match in matches:
+                if (match.id in starting or match.id in stats_rows) and match.status in live_statuses and match.stats:
+                    await start_live_stats(redis, match.stats)
+
+        # One invalidation for everything embedding these matches, then cache and publish them all
+        await invalidate(redis, tags)
+        await cache_matches_and_publish(redis, matches)
+
+        return {"updated": ids}
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        print(e)  # Replace with logging in production
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/{match_id}/events", response_model=dict)
+async def add_match_event(match_id: int, event: MatchEvent, session: SessionDep, redis=Depends(get_redis)):
+    """
+    Count a match event (e.g. a goal for team 1) by incrementing its counters in place, so concurrent scorekeepers
+    never overwrite each other's totals, and publish it to subscribers as a delta of the changed counters.
+
+    The match row stays locked until the update is published, so updates go out in the order they were counted.
+    Events are only counted while the match is running (409 otherwise).
+    """
+    counters = [field.format(team=event.team) for field in match_event_counters[event.type]]
+    score = [field for field in counters if field in score_fields]
+    stats = [field for field in counters if field not in score_fields]
+    live_increments = None  # Counted in the live stats hash, taken back if the commit doesn't happen
+    try:
+        # Lock the match row: concurrent events of this match are counted and published one after the other
+        statement = select(
+            Match.id, Match.status, Match.start_time, Match.second_start
+        ).where(Match.id == match_id).with_for_update()
+        match = (await session.exec(statement)).first()
+        if match is None:
+            raise HTTPException(status_code=404, detail="Match not found")
+        if MatchStatus(match.status) != MatchStatus.RUNNING:
+            raise HTTPException(status_code=409, detail="Events can only be added while the match is running")
+
+        changes = {}
+        if score:
+            await session.exec(
+                update(Match).where(Match.id == match_id)
+                .values({field: getattr(Match, field) + event.count for field in score})
+                .execution_options(synchronize_session=False)
+            )
+            statement = select(Match.id, *(getattr(Match, field) for field in score)).where(Match.id == match_id)
+            changes = dict(zip(score, (await session.exec(statement)).one()[1:]))
+
+        # Stats of a live match are incremented in Redis with LIVE_STATS_WRITE_BEHIND, otherwise in MySQL
+        stats_values = None
+        if stats and live_stats_write_behind:
+            live_stats = await update_live_stats(redis, match_id, increments={field: event.count for field in stats})
+            stats_values = {field: live_stats[field] for field in stats} if live_stats else None
+            live_increments = {field: event.count for field in stats} if live_stats else None
+        if stats and stats_values is None:
+            result = await session.exec(
+                update(MatchStats).where(MatchStats.match_id == match_id)
+                .values({field: getattr(MatchStats, field) + event.count for field in stats})
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                raise HTTPException(status_code=404, detail="MatchStats not found for this match")
+            statement = select(MatchStats.id, *(getattr(MatchStats, field) for field in stats)).where(MatchStats.match_id == match_id)
+            stats_values = dict(zip(stats, (await session.exec(statement)).one()[1:]))
+
+        # A new score shows in the teams' match lists; publish before the commit releases the row
+        if changes:
+            await invalidate(redis, {f"match:{match_id}"})
+        published_event = {**event.model_dump(mode="json"), "minute": match_minute(match)}
+        if not await patch_cached_match(redis, match_id, changes, stats_values, event=published_event):
+            await cache_match(redis, await load_match_detail(session, match_id))
+        await session.commit()
+
+        return {"id": match_id, **changes, "stats": stats_values or {}}
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        if live_increments:
+            await update_live_stats(redis, match_id, increments={field: -count for field, count in live_increments.items()})
+        await invalidate(redis, keys=[cache_key("match", match_id)])  # It may show counts that weren't committed
+        print(e)  # Replace with logging in production
+        raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.put("/{match_id}", response_model=Match)
 async def update_match(
         match_id: int,
         session: SessionDep,
-        match_update: Match = None,
-        stats_update: MatchStats = None,
+        match_update: MatchUpdate = None,
+        stats_update: MatchStatsUpdate = None,
         redis=Depends(get_redis)
 ):
     try:
-        # Fetch the match from the database
-        match = session.get(Match, match_id)
+        # Fetch the match from the database, locked so that concurrent updates count a result in the standings once
+        match = await session.get(Match, match_id, with_for_update=True)
         if not match:
             raise HTTPException(status_code=404, detail="Match not found")
 
         prev_match = copy(match)
 
-        # Update match fields (only if provided in the update request)
+        # Update match fields (only if provided in the update request), the status follows the match clock
         # ============================================================================================================================================
-        if match_update.score_team1 is not None:
-            match.score_team1 = match_update.score_team1
-        if match_update.score_team2 is not None:
-            match.score_team2 = match_update.score_team2
-        # if match_update.status is not None:
-        #     match.status = match_update.status
-        if match_update.start_time is not None:
-            match.start_time = match_update.start_time
-        if match_update.half_time is not None:
-            match.half_time = match_update.half_time
-        if match_update.second_start is not None:
-            match.second_start = match_update.second_start
-        if match_update.end_time is not None:
-            match.end_time = match_update.end_time
-        if match_update.team1_id is not None:
-            match.team1_id = match_update.team1_id
-        if match_update.team2_id is not None:
-            match.team2_id = match_update.team2_id
-
-        # Offset time according to status
+        changes = match_changes(match, match_update) if match_update else {}
+        starting = bool(changes.get("start_time")) and not prev_match.start_time
+        ending = live_stats_write_behind and bool(changes.get("end_time")) and not prev_match.end_time
+        for field, value in changes.items():
+            setattr(match, field, value)
+
+        # Write-behind: stats of a live match go to its Redis hash, MySQL gets them from the flusher or at full time.
+        # Along with other changes they're written once those are committed (a failed commit leaves them untouched).
         # ============================================================================================================================================
-        if match_update.start_time is not None and match_update.start_time != "" and (prev_match.start_time is None or prev_match.start_time == ""):
-            match.status = MatchStatus.RUNNING.value
-            # Ensure MatchStats is created if the match is starting and doesn't already have stats
-            match_stats = session.query(MatchStats).filter(MatchStats.match_id == match.id).first()
-            if not match_stats:
-                match_stats = MatchStats(match_id=match.id)
-                session.add(match_stats)
-
-        # Change status according to match time
-        # ============================================================================================================================================
-        if match_update.second_start is not None and match_update.second_start != "" and (prev_match.second_start is None or prev_match.second_start == ""):
-            match.status = MatchStatus.RUNNING.value
-
-        if match_update.half_time is not None and match_update.half_time != "" and (prev_match.half_time is None or prev_match.half_time == ""):
-            match.status = MatchStatus.HALF_TIME.value
+        live_stats_changes = None
+        if live_stats_write_behind and stats_update and not ending:
+            if not changes:
+                live_stats = await update_live_stats(redis, match.id, stats_changes(stats_update))
+                if live_stats is not None:
+                    # Nothing for MySQL: update the cached match detail and publish, loading it only when not cached
+                    if not await publish_live_stats(redis, match.id, live_stats):
+                        await cache_match(redis, await load_match_detail(session, match.id))
+                    return match
+            elif await get_live_stats(redis, [match.id]):
+                live_stats_changes = stats_changes(stats_update)
+                stats_update = None
+
+        match_stats = None
+        if starting or ending or stats_update:
+            match_stats = (await session.exec(select(MatchStats).where(MatchStats.match_id == match.id))).first()
+
+        # At full time the final live stats are written with the match
+        if ending and match_stats:
+            for field, value in (await get_live_stats(redis, [match.id])).get(match.id, {}).items():
+                setattr(match_stats, field, value)
+            session.add(match_stats)
 
-        if match_update.end_time is not None and match_update.end_time != "" and (prev_match.end_time is None or prev_match.end_time == ""):
-            match.status = MatchStatus.FULL_TIME.value
+        # Ensure MatchStats is created if the match is starting and doesn't already have stats
+        if starting and not match_stats:
+            match_stats = MatchStats(match_id=match.id)
+            session.add(match_stats)
 
         # Update MatchStats fields if stats_update is provided
         # ============================================================================================================================================
         if stats_update:
-            match_stats = session.query(MatchStats).filter(MatchStats.match_id == match.id).first()
             if not match_stats:
                 raise HTTPException(status_code=404, detail="MatchStats not found for this match")
 
-            if stats_update.possession_team1 is not None:
-                match_stats.possession_team1 = stats_update.possession_team1
-                match_stats.possession_team2 = 100 - stats_update.possession_team1
-
-            if stats_update.shots_team1 is not None:
-                match_stats.shots_team1 = stats_update.shots_team1
-            if stats_update.shots_team2 is not None:
-                match_stats.shots_team2 = stats_update.shots_team2
-            if stats_update.shots_on_target_team1 is not None:
-                match_stats.shots_on_target_team1 = stats_update.shots_on_target_team1
-            if stats_update.shots_on_target_team2 is not None:
-                match_stats.shots_on_target_team2 = stats_update.shots_on_target_team2
-            if stats_update.corners_team1 is not None:
-                match_stats.corners_team1 = stats_update.corners_team1
-            if stats_update.corners_team2 is not None:
-                match_stats.corners_team2 = stats_update.corners_team2
-            if stats_update.yellow_cards_team1 is not None:
-                match_stats.yellow_cards_team1 = stats_update.yellow_cards_team1
-            if stats_update.yellow_cards_team2 is not None:
-                match_stats.yellow_cards_team2 = stats_update.yellow_cards_team2
-
+            for field, value in stats_changes(stats_update).items():
+                setattr(match_stats, field, value)
             session.add(match_stats)
 
+        # A match reaching full time (or a corrected result) goes into the standings in the same transaction
+        # ============================================================================================================================================
+        standings = standing_deltas([(prev_match, match)])
+        await apply_standings(redis, session, standings)
+
         # Commit changes to the database
         # ============================================================================================================================================
         session.add(match)
-        session.commit()
-        session.refresh(match)
-
-        # Cache the updated match details and publish updates
+        await session.commit()
+        await publish_standings(redis, standings)
+        if live_stats_changes and await update_live_stats(redis, match.id, live_stats_changes) is None:
+            # The match reached full time since (its hash is gone): the stats go to MySQL
+            await session.exec(update(MatchStats).where(MatchStats.match_id == match.id).values(**live_stats_changes))
+            await session.commit()
+        match = await load_match_detail(session, match.id)
+
+        # Live stats move to Redis once the match runs, and are dropped there once final
+        if ending:
+            await end_live_stats(redis, [match.id])
+        elif live_stats_write_behind and (starting or stats_update) and match.status in live_statuses and match.stats:
+            await start_live_stats(redis, match.stats)
+
+        # Drop cached values embedding this match (both teams, other matches of those teams, favorites).
+        # When a team was swapped, the old and new team's match lists changed too.
+        # Then cache the updated match details and publish updates
         # ============================================================================================================================================
-        await cache_match(redis, match)
+        # A stats-only update changes nothing that lists and other cached values show: they're kept
+        list_changed = any(getattr(prev_match, field) != value for field, value in changes.items())
+        tags = {f"match:{match.id}"} if list_changed else set()
+        if (match.team1_id, match.team2_id) != (prev_match.team1_id, prev_match.team2_id):
+            tags.update(f"team:{team_id}" for team_id in (prev_match.team1_id, prev_match.team2_id, match.team1_id, match.team2_id))
+        if tags:
+            await invalidate(redis, tags)
+        await cache_match(redis, match, list_changed=list_changed)
 
         return match
+    except HTTPException:
+        await session.rollback()
+        raise
     except Exception as e:
+        await session.rollback()
         print(e)
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -1,14 +1,18 @@
-from fastapi import Depends, APIRouter, HTTPException, Query
+from fastapi import Depends, APIRouter, HTTPException, Query, Response
+from sqlalchemy.orm import joinedload
 from sqlmodel import select
 from src.responses import PlayerResponse, SimplePlayerResponse
-from typing import List, Optional
+from typing import List, Optional, Annotated
 
 from src.utils.cache import (
-    cache_player, get_cached_player
+    cache_key, cache_player, get_or_load_raw, invalidate, json_response, player_tags, player_to_cache
 )
-from src.config.database import SessionDep
+from src.config.database import SessionDep, async_session
 from src.config.redis import get_redis
 from src.models import Player, Team
+from src.utils.helpers import PlayerPosition
+from src.utils.leaderboards import LeaderboardStat, get_leaderboard, update_leaderboards
+from src.utils.pagination import decode_cursor, max_page_size, paginate
 
 router = APIRouter()
 
@@ -17,13 +21,19 @@ router = APIRouter()
 @router.get("/", response_model=List[PlayerResponse])
 async def get_players(
         session: SessionDep,
+        response: Response,
         redis=Depends(get_redis),
         team_id: Optional[int] = Query(None, description="Filter players by team ID"),
         match_id: Optional[int] = Query(None, description="Filter players by match ID"),
-
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+        limit: Annotated[int, Query(ge=1, le=max_page_size)] = max_page_size,
 ) -> List[PlayerResponse]:
-    # Base query to select all players
-    query = select(Player)
+    # Base query to select players a page at a time, keyset by id (ix_player_team_id_id serves the team filter)
+    query = select(Player).options(joinedload(Player.team)).order_by(Player.id).limit(limit + 1)
+
+    after = decode_cursor(cursor, "id")
+    if after:
+        query = query.where(Player.id > after[0])
 
     # Apply filters based on query parameters
     if team_id:
@@ -36,41 +46,48 @@ async def get_players(
         )
 
     # Execute the query and fetch results
-    players = session.exec(query).all()
+    players = (await session.exec(query)).all()
 
     if not players:
         raise HTTPException(status_code=404, detail="No players found for the given filters")
 
-    return players
+    return paginate(response, players, limit, "id")
 
 
-# Route to fetch a single player by ID with team details
-@router.get("/{player_id}", response_model=PlayerResponse)
-async def get_player(player_id: int, session: SessionDep, redis=Depends(get_redis)) -> PlayerResponse:
-    # Try to get cached player first
-    cached_player = await get_cached_player(redis, player_id)
-    if cached_player:
-        return cached_player
-
-    # Fetch the player from the database
-    statement = select(Player).where(Player.id == player_id)
-    player_result = session.exec(statement).first()
-
-    if not player_result:
-        raise HTTPException(status_code=404, detail="Player not found")
+# Route to fetch the top scorers or assisters, overall or of a team or position
+@router.get("/leaderboards/{stat}", response_model=List[PlayerResponse])
+async def get_player_leaderboard(
+        stat: LeaderboardStat,
+        redis=Depends(get_redis),
+        team_id: Optional[int] = Query(None, description="Only players of this team"),
+        position: Optional[PlayerPosition] = Query(None, description="Only players at this position"),
+        limit: Annotated[int, Query(ge=1, le=max_page_size)] = 20,
+) -> List[PlayerResponse]:
+    if team_id is not None and position is not None:
+        raise HTTPException(status_code=400, detail="Filter by team_id or by position, not both")
 
-    # Fetch the team of the player using team_id (if not already loaded via relationship)
-    if player_result.team_id and not player_result.team:
-        statement = select(Team).where(Team.id == player_result.team_id)
-        team_result = session.exec(statement).first()
+    # Best first, from a Redis sorted set (MySQL until it's loaded); bytes are already in PlayerResponse shape
+    return json_response(await get_leaderboard(redis, stat, limit, team_id, position))
 
-        if team_result:
-            player_result.team = team_result  # Set the team data in the player object
 
-    # Cache the player data
-    await cache_player(redis, player_result)
+# Route to fetch a single player by ID with team details
+@router.get("/{player_id}", response_model=PlayerResponse)
+async def get_player(player_id: int, redis=Depends(get_redis)) -> PlayerResponse:
+    async def load_player():
+        # Fetch the player with its team from the database
+        async with async_session() as session:
+            statement = select(Player).where(Player.id == player_id).options(joinedload(Player.team))
+            player_result = (await session.exec(statement)).first()
+            return player_to_cache(player_result) if player_result else None
+
+    # Cached player first, concurrent misses share a single database load
+    player = await get_or_load_raw(redis, cache_key("player", player_id), load_player, tags=player_tags)
+
+    if not player:
+        raise HTTPException(status_code=404, detail="Player not found")
 
-    return player_result
+    # Cached bytes are already in PlayerResponse shape
+    return json_response(player)
 
 
 # Create player route (same as before)
@@ -78,9 +95,14 @@ async def get_player(player_id: int, session: SessionDep, redis=Depends(get_redi
 async def create_player(player: Player, session: SessionDep, redis=Depends(get_redis)) -> SimplePlayerResponse:
     try:
         session.add(player)
-        session.commit()
-        session.refresh(player)
+        await session.commit()
+        await session.refresh(player, attribute_names=["created_at", "updated_at", "team"])  # Cached as a read returns it
+
+        # The team's roster changed: cached teams and matches showing it are stale
+        if player.team_id:
+            await invalidate(redis, [f"team:{player.team_id}"])
         await cache_player(redis, player)
+        await update_leaderboards(redis, [player])
         return player
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,17 @@
+from typing import List, Annotated
+from fastapi import APIRouter, Depends, Query
+from src.config.redis import get_redis
+from src.responses import StandingResponse
+from src.utils.pagination import max_page_size
+from src.utils.standings import get_standings
+
+router = APIRouter()
+
+
+# Route to fetch the top of the league table, kept up to date as matches reach full time
+@router.get("/", response_model=List[StandingResponse])
+async def get_top_standings(
+        limit: Annotated[int, Query(ge=1, le=max_page_size)] = 20,
+        redis=Depends(get_redis)
+) -> List[StandingResponse]:
+    return await get_standings(redis, limit)
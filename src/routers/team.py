@@ -1,70 +1,76 @@
-from typing import List, Annotated
+from typing import List, Annotated, Optional
 
-from fastapi import Depends, APIRouter, HTTPException, Query
+from fastapi import Depends, APIRouter, HTTPException, Query, Response
 from sqlmodel import select
 
-from src.utils.cache import cache_team, get_cached_team, cache_teams, get_cached_teams
-from src.config.database import SessionDep
+from src.utils.cache import cache_key, cache_team, cache_teams, get_cached_teams, get_or_load_raw, json_array, json_response, team_tags, team_to_cache
+from src.config.database import SessionDep, async_session
 from src.config.redis import get_redis
-from src.models import Team
+from src.models import Team, team_load_options
 from src.responses import TeamResponse
+from src.utils.pagination import decode_cursor, max_page_size, paginate
 
 router = APIRouter()
 
 
 # Route to fetch a single team by ID with relationships
 @router.get("/{team_id}", response_model=TeamResponse)
-async def get_team(team_id: int, session: SessionDep, redis=Depends(get_redis)) -> TeamResponse:
-    try:
-        # Try to get cached team first
-        cached_team = await get_cached_team(redis, team_id)
-        if cached_team:
-            return cached_team
-
+async def get_team(team_id: int, redis=Depends(get_redis)) -> TeamResponse:
+    async def load_team():
         # Fetch the team from the database with related fields
-        statement = select(Team).where(Team.id == team_id)
-        team_result = session.exec(statement).first()
+        async with async_session() as session:
+            statement = select(Team).where(Team.id == team_id).options(*team_load_options)
+            team_result = (await session.exec(statement)).first()
+            return team_to_cache(team_result) if team_result else None
 
-        if not team_result:
-            raise HTTPException(status_code=404, detail="Team not found")
+    # Cached team first, concurrent misses share a single database load
+    team = await get_or_load_raw(redis, cache_key("team", team_id), load_team, tags=team_tags)
 
-        # Cache the team data in Redis
-        await cache_team(redis, team_result)
+    if not team:
+        raise HTTPException(status_code=404, detail="Team not found")
 
-        return team_result
-    except Exception as e:
-        print(e)
+    # Cached bytes are already in TeamResponse shape
+    return json_response(team)
 
 
 # Route to fetch multiple teams with relationships
 @router.get("/", response_model=List[TeamResponse])
 async def get_teams(
         session: SessionDep,
+        response: Response,
+        cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
         offset: int = 0,
-        limit: Annotated[int, Query(le=100)] = 100,
+        limit: Annotated[int, Query(ge=1, le=max_page_size)] = max_page_size,
         redis=Depends(get_redis)
 ) -> List[TeamResponse]:
-    # Attempt to get cached data
-    teams = await get_cached_teams(redis, offset, limit)
-    if teams:
-        return teams
+    # Keyset pagination by id, offset is only used when no cursor is given
+    after = decode_cursor(cursor, "id")
+    after_id = after[0] if after else None
+
+    # Attempt to get cached data, one extra team tells whether there is a next page
+    cached = await get_cached_teams(redis, limit + 1, offset, after_id)
+    if cached and cached[0] and all(cached[1]):
+        team_ids, teams = cached
+        paginate(response, [{"id": team_id} for team_id in team_ids], limit, "id")
+        return json_response(json_array(teams[:limit]), headers=response.headers)
 
     # Fetch teams with players and matches populated
-    statement = (
-        select(Team)
-        .offset(offset)
-        .limit(limit)
-    )
-    teams = session.exec(statement).all()
+    statement = select(Team).options(*team_load_options).order_by(Team.id).limit(limit + 1)
+    if after_id is not None:
+        statement = statement.where(Team.id > after_id)
+    else:
+        statement = statement.offset(offset)
+    teams = (await session.exec(statement)).all()
 
     if not teams:
         raise HTTPException(status_code=404, detail="No teams found")
 
-    # Cache the team data
-    await cache_teams(redis, teams)
+    # Cache the team data, the team index is only rebuilt (from ids only) when it's missing altogether
+    team_ids = (await session.exec(select(Team.id).order_by(Team.id))).all() if cached is None else None
+    await cache_teams(redis, teams, team_ids=team_ids)
 
     # Return teams with all related fields populated
-    return teams
+    return paginate(response, teams, limit, "id")
 
 
 # Create team route (same as before)
@@ -72,8 +78,8 @@ async def get_teams(
 async def create_team(team: Team, session: SessionDep, redis=Depends(get_redis)) -> Team:
     try:
         session.add(team)
-        session.commit()
-        session.refresh(team)
+        await session.commit()
+        await session.refresh(team, attribute_names=["players", "matches_as_team1", "matches_as_team2"])
         await cache_team(redis, team)
         return team
     except Exception as e:
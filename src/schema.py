@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from src.utils.helpers import MatchEventType
 
 # Pydantic models for requests
 class UserCreate(BaseModel):
@@ -10,3 +12,50 @@ class UserLogin(BaseModel):
     username: str
     password: str
 
+
+# The authenticated user, as stored in their session (no password hash)
+class SessionUser(BaseModel):
+    id: int
+    username: str
+
+
+
+# Partial match and stats updates, only the fields that are set are applied
+class MatchUpdate(BaseModel):
+    team1_id: Optional[int] = None
+    team2_id: Optional[int] = None
+    score_team1: Optional[int] = None
+    score_team2: Optional[int] = None
+    start_time: Optional[str] = None
+    half_time: Optional[str] = None
+    second_start: Optional[str] = None
+    end_time: Optional[str] = None
+
+
+class MatchStatsUpdate(BaseModel):
+    possession_team1: Optional[int] = Field(default=None, ge=0, le=100)
+    shots_team1: Optional[int] = None
+    shots_team2: Optional[int] = None
+    shots_on_target_team1: Optional[int] = None
+    shots_on_target_team2: Optional[int] = None
+    corners_team1: Optional[int] = None
+    corners_team2: Optional[int] = None
+    yellow_cards_team1: Optional[int] = None
+    yellow_cards_team2: Optional[int] = None
+
+
+class MatchBulkUpdateItem(BaseModel):
+    id: int
+    match_update: Optional[MatchUpdate] = None
+    stats_update: Optional[MatchStatsUpdate] = None
+
+
+class MatchBulkUpdate(BaseModel):
+    updates: List[MatchBulkUpdateItem] = Field(min_length=1, max_length=500)
+
+
+# Something that happened in a match, counted atomically instead of sending new totals
+class MatchEvent(BaseModel):
+    type: MatchEventType
+    team: Literal[1, 2]
+    count: int = Field(default=1, ge=1, le=10)
@@ -1,18 +1,39 @@
 from dotenv import load_dotenv
 load_dotenv()  # take environment variables from .env.
 
+import argparse
 import json
 import os
-from sqlmodel import SQLModel
-from fastapi import Depends
-from typing import Annotated
-from sqlmodel import Session, create_engine
-from src.models import User, Team, Player, Match, MatchStats, UserMatchLink  # Import your models
-from datetime import datetime
+import random
+import time
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, Iterable, Iterator
+from sqlalchemy import insert
+from sqlmodel import SQLModel, create_engine
+from src.models import User, Team, Player, Match, MatchStats, UserMatchLink, pwd_context  # Import your models
+from src.utils.helpers import MatchStatus, PlayerPosition
+
+try:
+    import ijson  # Streams large JSON files, optional: pip install ijson
+except ImportError:
+    ijson = None
 
 # Database connection URL
 mysql_url = os.getenv("MYSQL_URI", None)
-engine = create_engine(mysql_url, echo=True)
+engine = create_engine(mysql_url)
+
+# Sections of a seed file in insert order, parents before the rows referencing them
+seed_sections = {
+    "users": User,
+    "teams": Team,
+    "players": Player,
+    "matches": Match,
+    "match_stats": MatchStats,
+    "user_match_links": UserMatchLink,
+}
+match_time_fields = ("start_time", "half_time", "second_start", "end_time")
+default_chunk = 5000  # Rows per executemany and per commit
 
 
 # Function to drop and recreate database tables
@@ -23,15 +44,6 @@ def reset_database():
     SQLModel.metadata.create_all(engine)  # Recreate tables
 
 
-# Dependency to get session
-def get_session():
-    with Session(engine) as session:
-        yield session
-
-
-SessionDep = Annotated[Session, Depends(get_session)]
-
-
 # Function to parse datetime into MySQL-compatible format
 def parse_datetime(value: str) -> str:
     """Parse ISO 8601 datetime to MySQL DATETIME format."""
@@ -44,64 +56,248 @@ def parse_datetime(value: str) -> str:
         return value  # Return the original value if parsing fails
 
 
+class RowNormalizer:
+    """
+    Turns a seed row into the full set of column values of its table, the way the ORM would have: defaults (and
+    default factories, e.g. created_at) for missing fields, enum values as members. Core executemany needs every row
+    to have the same keys, unknown keys are dropped.
+    """
+
+    def __init__(self, model: type[SQLModel]):
+        self.columns = [column.name for column in model.__table__.columns]
+        fields = {name: field for name, field in model.model_fields.items() if name in self.columns}
+        # Resolved once: pydantic's get_default inspects the factory's signature on every call
+        self.defaults = {
+            name: fields[name].default if name in fields and not fields[name].is_required() else None
+            for name in self.columns
+        }
+        self.factories = {name: field.default_factory for name, field in fields.items() if field.default_factory}
+        self.enums = {
+            name: field.annotation for name, field in fields.items()
+            if isinstance(field.annotation, type) and issubclass(field.annotation, Enum)
+        }
+        self.time_fields = [name for name in match_time_fields if name in self.columns] if model is Match else []
+
+    def __call__(self, row: dict) -> dict:
+        values = {}
+        for name in self.columns:
+            if name in row:
+                values[name] = row[name]
+            elif name in self.factories:
+                values[name] = self.factories[name]()
+            else:
+                values[name] = self.defaults[name]
+        for name, enum in self.enums.items():
+            if values[name] is not None:
+                values[name] = enum(values[name])
+        for name in self.time_fields:
+            if values[name]:
+                values[name] = parse_datetime(values[name])
+        return values
+
+
+class BulkInserter:
+    """
+    Buffers rows per table and inserts them with one executemany (multi-row INSERTs) and one commit per chunk.
+
+    Before a table's chunk goes out, the buffered rows of the tables it may reference do, so rows only need to
+    come after their parents in the input.
+    """
+
+    def __init__(self, connection, chunk: int = default_chunk):
+        self.connection = connection
+        self.chunk = chunk
+        self.normalizers = {section: RowNormalizer(model) for section, model in seed_sections.items()}
+        self.buffers: dict[str, list] = {section: [] for section in seed_sections}
+        self.counts: dict[str, int] = dict.fromkeys(seed_sections, 0)
+
+    def add(self, section: str, row: dict):
+        if section not in seed_sections:
+            raise ValueError(f"Unknown seed section {section!r}, expected one of {list(seed_sections)}")
+        buffer = self.buffers[section]
+        buffer.append(self.normalizers[section](row))
+        if len(buffer) >= self.chunk:
+            self.flush(section)
+
+    def flush(self, section: str | None = None):
+        """Insert the buffered rows of `section` and of the sections before it (all of them by default)"""
+        sections = list(seed_sections)
+        for name in sections[:sections.index(section) + 1] if section else sections:
+            rows = self.buffers[name]
+            if rows:
+                self.connection.execute(insert(seed_sections[name].__table__), rows)
+                self.connection.commit()
+                self.counts[name] += len(rows)
+                self.buffers[name] = []
+
+
+def read_json(path: str) -> Iterator[tuple[str, dict]]:
+    """
+    Rows of a seed_data.json style file ({"teams": [...], "players": [...], ...}), section by section in insert
+    order. Streamed with ijson when installed, otherwise the whole file is loaded.
+    """
+    if ijson is None:
+        print("ijson not installed, loading the whole file (pip install ijson to stream it)")
+        with open(path, "rb") as f:
+            data = json.load(f)
+        for section in seed_sections:
+            for row in data.get(section, []):
+                yield section, row
+        return
+
+    # One pass per section keeps the insert order whatever the order of the sections in the file
+    for section in seed_sections:
+        with open(path, "rb") as f:
+            for row in ijson.items(f, f"{section}.item", use_float=True):
+                yield section, row
+
+
+def read_ndjson(path: str) -> Iterator[tuple[str, dict]]:
+    """Rows of an NDJSON file, one {"<section>": {...row...}} object per line, parents before their children"""
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or len(record) != 1:
+                raise ValueError(f"{path}:{number}: expected one {{\"<section>\": {{...}}}} object per line")
+            yield next(iter(record.items()))
+
+
+def synthetic_rows(
+        teams: int, players_per_team: int, matches: int, users: int = 0, seed: int = 0,
+        kick_off: datetime = datetime(2024, 8, 1, 15, 0)
+) -> Iterator[tuple[str, dict]]:
+    """
+    Deterministic synthetic league: the same arguments always give the same rows, generated lazily.
+
+    About 70% of the matches are finished (before `kick_off`), 5% running from `kick_off` and the rest upcoming.
+    Users are named user1, user2, ... with the password "password".
+    """
+    rng = random.Random(seed)
+    positions = list(PlayerPosition)
+
+    if users:
+        hashed_password = pwd_context.hash("password")  # Hashing is slow, every user shares one hash
+        for user_id in range(1, users + 1):
+            yield "users", {"id": user_id, "username": f"user{user_id}", "hashed_password": hashed_password}
+
+    for team_id in range(1, teams + 1):
+        yield "teams", {"id": team_id, "name": f"Team {team_id}", "city": f"City {rng.randrange(max(teams // 4, 1))}"}
+
+    for player_id in range(1, teams * players_per_team + 1):
+        appearances = rng.randint(0, 400)
+        yield "players", {
+            "id": player_id,
+            "name": f"Player {player_id}",
+            "birth": f"{rng.randint(1985, 2006)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}",
+            "position": rng.choice(positions),
+            "appearances": appearances,
+            "goals": min(int(rng.expovariate(8 / (appearances + 1))), appearances),
+            "assists": min(int(rng.expovariate(12 / (appearances + 1))), appearances),
+            "team_id": (player_id - 1) // players_per_team + 1,
+        }
+
+    for match_id in range(1, matches + 1):
+        team1 = rng.randrange(1, teams + 1)
+        team2 = rng.randrange(1, teams)
+        team2 += team2 >= team1  # Any other team
+        roll = rng.random()
+        match = {"id": match_id, "team1_id": team1, "team2_id": team2}
+        if roll < 0.7:
+            start = kick_off - timedelta(hours=rng.randint(2, 24 * 365))
+            match.update(
+                status=MatchStatus.FULL_TIME, score_team1=rng.choice((0, 0, 1, 1, 1, 2, 2, 3, 4)),
+                score_team2=rng.choice((0, 0, 1, 1, 2, 2, 3)), start_time=start.isoformat(),
+                half_time=(start + timedelta(minutes=47)).isoformat(),
+                second_start=(start + timedelta(minutes=62)).isoformat(),
+                end_time=(start + timedelta(minutes=110)).isoformat(),
+            )
+        elif roll < 0.75:
+            match.update(
+                status=MatchStatus.RUNNING, score_team1=rng.randint(0, 2), score_team2=rng.randint(0, 2),
+                start_time=kick_off.isoformat(),
+            )
+        else:
+            match["start_time"] = (kick_off + timedelta(hours=rng.randint(1, 24 * 180))).isoformat()
+        yield "matches", match
+
+        if match.get("status") in (MatchStatus.FULL_TIME, MatchStatus.RUNNING):
+            possession = rng.randint(30, 70)
+            yield "match_stats", {
+                "match_id": match_id, "possession_team1": possession, "possession_team2": 100 - possession,
+                **{f"{stat}_team{team}": rng.randint(0, 12) for stat in ("shots", "corners") for team in (1, 2)},
+                **{f"shots_on_target_team{team}": rng.randint(0, 5) for team in (1, 2)},
+                **{f"yellow_cards_team{team}": rng.randint(0, 4) for team in (1, 2)},
+            }
+
+
+def seed_rows(rows: Iterable[tuple[str, Any]], chunk: int = default_chunk) -> dict[str, int]:
+    """
+    Insert (section, row) pairs in chunks, printing progress.
+
+    Returns:
+        dict[str, int]: Rows inserted per section.
+    """
+    started = time.perf_counter()
+    report_every = chunk * 50
+    next_report = report_every
+    with engine.connect() as connection:
+        inserter = BulkInserter(connection, chunk)
+        for section, row in rows:
+            inserter.add(section, row)
+            total = sum(inserter.counts.values())
+            if total >= next_report:
+                print(f"{total} rows, {total / (time.perf_counter() - started):.0f} rows/s")
+                next_report = total + report_every
+        inserter.flush()
+
+    elapsed = time.perf_counter() - started
+    total = sum(inserter.counts.values())
+    print(", ".join(f"{count} {section}" for section, count in inserter.counts.items() if count)
+          + f" in {elapsed:.1f} s ({total / max(elapsed, 1e-9):.0f} rows/s)")
+    return inserter.counts
+
+
 # Function to load data from JSON and seed the database
-def seed_database_from_json(json_file_path: str):
-    with open(json_file_path, "r") as f:
-        data = json.load(f)
-
-    with Session(engine) as session:
-        # Seed users
-        if "users" in data:
-            for user_data in data["users"]:
-                user = User(**user_data)
-                session.add(user)
-
-        # Seed teams
-        if "teams" in data:
-            for team_data in data["teams"]:
-                team = Team(**team_data)
-                session.add(team)
-
-        # Seed players
-        if "players" in data:
-            for player_data in data["players"]:
-                player = Player(**player_data)
-                session.add(player)
-
-        # Seed matches
-        if "matches" in data:
-            for match_data in data["matches"]:
-                if "start_time" in match_data:
-                    match_data["start_time"] = parse_datetime(match_data["start_time"])
-                if "half_time" in match_data:
-                    match_data["half_time"] = parse_datetime(match_data["half_time"])
-                if "second_start" in match_data:
-                    match_data["second_start"] = parse_datetime(match_data["second_start"])
-                if "end_time" in match_data:
-                    match_data["end_time"] = parse_datetime(match_data["end_time"])
-                match = Match(**match_data)
-                session.add(match)
-
-        # Seed match stats
-        if "match_stats" in data:
-            for stats_data in data["match_stats"]:
-                stats = MatchStats(**stats_data)
-                session.add(stats)
-
-        # Seed user-match links
-        if "user_match_links" in data:
-            for link_data in data["user_match_links"]:
-                link = UserMatchLink(**link_data)
-                session.add(link)
-
-        # Commit all changes
-        session.commit()
+def seed_database_from_json(json_file_path: str, chunk: int = default_chunk) -> dict[str, int]:
+    read = read_ndjson if json_file_path.endswith((".ndjson", ".jsonl")) else read_json
+    return seed_rows(read(json_file_path), chunk)
 
 
 # Example JSON file path
 json_file_path = "src/seed_data.json"
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Reset the database and seed it from a file or synthetic data")
+    parser.add_argument("file", nargs="?", default=json_file_path, help="JSON (seed_data.json layout) or NDJSON file")
+    parser.add_argument("--synthetic", action="store_true", help="Generate a league instead of reading a file")
+    parser.add_argument("--teams", type=int, default=100)
+    parser.add_argument("--players-per-team", type=int, default=25)
+    parser.add_argument("--matches", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data")
+    parser.add_argument("--kick-off", type=datetime.fromisoformat, default=datetime(2024, 8, 1, 15, 0),
+                        help="Finished matches end before it, running ones start at it (ISO date-time)")
+    parser.add_argument("--chunk", type=int, default=default_chunk, help="Rows per INSERT batch and commit")
+    parser.add_argument("--no-reset", action="store_true", help="Add to the existing tables instead of recreating them")
+    parser.add_argument("--echo", action="store_true", help="Log every SQL statement")
+    args = parser.parse_args()
+
+    engine.echo = args.echo
+    if not args.no_reset:
+        reset_database()
+
+    if args.synthetic:
+        seed_rows(synthetic_rows(
+            args.teams, args.players_per_team, args.matches, args.users, args.seed, args.kick_off
+        ), args.chunk)
+    else:
+        seed_database_from_json(args.file, args.chunk)
+    print("Run python3 -m src.rebuild_standings to fill the standings from the finished matches")
+
+
 # Call the seeding function
 if __name__ == "__main__":
-    reset_database()
-    seed_database_from_json(json_file_path)
+    main()
@@ -1,7 +1,10 @@
 import asyncio
 import socketio
 import json
+from redis.asyncio.client import Redis
 from src.config.redis import redis_connection
+from src.utils.cache import cache_key, get_match_updates_since, local_invalidation_channel
+from src.utils.local_cache import match_cache
 
 # Create Socket.IO server instance
 sio = socketio.AsyncServer(
@@ -11,8 +14,63 @@ sio = socketio.AsyncServer(
     engineio_logger=True,
 )
 
-# In-memory mapping of Redis pubsub instances for matches
-redis_subscribers = {}  # {channel: {"pubsub": pubsub_instance, "sids": set()}}
+# Every match publishes to "match_update:{id}", one pattern subscription covers them all
+match_channel_pattern = "match_update:*"
+pubsub_poll_interval = 1.0
+
+
+def match_room(match_id) -> str:
+    return f"match:{match_id}"
+
+
+async def dispatch_match_updates(redis: Redis | None = None, retry_delay: float = 1.0):
+    """
+    Single Redis pattern subscription per worker that routes match updates into Socket.IO rooms.
+
+    Args:
+        redis (Redis | None): Redis client to subscribe with, defaults to the shared connection.
+        retry_delay (float): Seconds to wait before re-subscribing after a lost connection.
+    """
+    redis = redis or await redis_connection()
+    while True:
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.psubscribe(match_channel_pattern)
+            await pubsub.subscribe(local_invalidation_channel)
+            # Updates may have been missed while unsubscribed, forget every locally cached match
+            match_cache.clear()
+            while True:
+                # Poll with an explicit timeout: a blocking read would hit the pool's socket timeout on a quiet channel
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=pubsub_poll_interval)
+                if message is None:
+                    continue
+
+                # Cached values embedding a changed entity (e.g. matches of a team that got a new player)
+                if message["type"] == "message":
+                    data = message["data"]
+                    for key in (data.decode() if isinstance(data, bytes) else data).split("\n"):
+                        match_cache.invalidate(key)
+                    continue
+                if message["type"] != "pmessage":
+                    continue
+
+                channel = message["channel"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                match_id = channel.split(":", 1)[1]
+                match_cache.invalidate(cache_key("match", match_id))
+                match_cache.invalidate(cache_key("match_seq", match_id))
+
+                # One emit per update, the packet is encoded once for the whole room
+                await sio.emit("match_update", json.loads(message["data"]), room=match_room(match_id))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Match update dispatcher lost its subscription: {e}")  # Replace with logging in production
+            await asyncio.sleep(retry_delay)
+        finally:
+            await pubsub.aclose()
+
 
 # Define event handlers for Socket.IO
 @sio.event
@@ -22,16 +80,9 @@ async def connect(sid, environ):
 
 @sio.event
 async def disconnect(sid):
+    # Socket.IO removes the client from its match rooms
     print(f"Client disconnected: {sid}")
 
-    # Remove SID from all subscribed channels
-    for channel, data in list(redis_subscribers.items()):
-        data["sids"].discard(sid)
-        # Cleanup if no SIDs are subscribed to the channel
-        if not data["sids"]:
-            await data["pubsub"].unsubscribe(channel)
-            del redis_subscribers[channel]
-
 
 @sio.on("subscribe")
 async def subscribe_to_match(sid, data):
@@ -40,32 +91,21 @@ async def subscribe_to_match(sid, data):
         await sio.emit("error", {"message": "Match ID is required"}, to=sid)
         return
 
-    # Subscribe to Redis Pub/Sub for the match
-    redis = await redis_connection()
-    channel = f"match_update:{match_id}"
-
-    if channel not in redis_subscribers:
-        pubsub = redis.pubsub()
-        # Sub scribe from here
-        await pubsub.subscribe(channel)
-        redis_subscribers[channel] = {"pubsub": pubsub, "sids": set()}
-
-        async def listen_to_channel():
-            async for message in pubsub.listen():
-                if message["type"] == "message":
-                    update = json.loads(message["data"])
-                    # Broadcast the update to all subscribed clients
-                    for client_sid in redis_subscribers[channel]["sids"]:
-                        await sio.emit("match_update", update, to=client_sid)
-
-        # Run the listener in a background task
-        sio.start_background_task(listen_to_channel)
-
-    # Add the client SID to the set of subscribers for this channel
-    redis_subscribers[channel]["sids"].add(sid)
+    # Updates for the match reach the client through its room
+    await sio.enter_room(sid, match_room(match_id))
 
     await sio.emit("subscribed", {"message": f"Subscribed to match {match_id}"}, to=sid)
 
+    # A reconnecting client sends the last sequence number it applied, replay what it missed
+    last_seq = data.get("last_seq")
+    if last_seq is not None:
+        updates = await get_match_updates_since(await redis_connection(), match_id, int(last_seq))
+        if updates is None:
+            await sio.emit("match_update", {"type": "resync", "id": match_id}, to=sid)
+            return
+        for update in updates:
+            await sio.emit("match_update", update, to=sid)
+
 
 @sio.on("unsubscribe")
 async def unsubscribe_from_match(sid, data):
@@ -74,14 +114,6 @@ async def unsubscribe_from_match(sid, data):
         await sio.emit("error", {"message": "Match ID is required"}, to=sid)
         return
 
-    channel = f"match_update:{match_id}"
-    if channel in redis_subscribers:
-        # Remove SID from the channel
-        redis_subscribers[channel]["sids"].discard(sid)
-        # Cleanup if no SIDs are subscribed to the channel
-        if not redis_subscribers[channel]["sids"]:
-            pubsub = redis_subscribers[channel]["pubsub"]
-            await pubsub.unsubscribe(channel)
-            del redis_subscribers[channel]
+    await sio.leave_room(sid, match_room(match_id))
 
     await sio.emit("unsubscribed", {"message": f"Unsubscribed from match {match_id}"}, to=sid)
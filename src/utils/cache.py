@@ -1,318 +1,982 @@
+import asyncio
 import json
+import os
+import random
 import uuid
+from fastapi.responses import Response
 from redis.asyncio.client import Redis
-from src.models import Player, Team, Match, MatchStats
-from typing import List, Any, Optional
+from redis.exceptions import ResponseError
+from src.models import Player, Team, Match, User
+from src.responses import PlayerResponse, TeamResponse, MatchDetailResponse, MatchResponse
+from src.utils.local_cache import match_cache
+from src.utils.metrics import record_cache_lookup, timed_serialization
+from typing import List, Any, Optional, Callable, Awaitable, Mapping, Iterable
+
+try:
+    import orjson  # Optional: faster (de)serialization of cached values
+except ImportError:
+    orjson = None
+
+# Every cache key is "{namespace}:{kind}:v{version}:...". Bump a kind's version when the shape of its cached
+# value changes: code after the change reads and writes new keys and the old ones expire on their own, nothing
+# else in Redis (sessions, rate limits, other kinds) is touched.
+cache_namespace = os.getenv("CACHE_NAMESPACE", "football")
+key_versions = {
+    "player": 1,
+    "team": 1,
+    "teams": 1,  # Team index
+    "match": 1,
+    "match_seq": 1,
+    "match_stream": 1,
+    "matches": 1,  # Match list pages
+    "deps": 1,
+    "favorites": 1,
+    "session": 2,  # 2: hash of the user's profile, was the user id
+    "live_stats": 1,
+    "match_clock": 1,
+    "standings": 2,  # 2: team ids zero-padded in the sorted set
+    "leaderboard": 1,
+}
+
+
+def cache_key(kind: str, *parts: Any) -> str:
+    """
+    Namespaced, versioned Redis key.
+
+    Args:
+        kind (str): What is cached, one of `key_versions`.
+        *parts: Identifying parts, e.g. the id.
+
+    Returns:
+        str: e.g. "football:match:v1:42".
+    """
+    return ":".join([cache_namespace, kind, f"v{key_versions[kind]}", *map(str, parts)])
+
+
+def cache_family(key: str) -> str:
+    """The kind a cache_key was built with, e.g. "match" (the metrics label of hits and misses)"""
+    return key[len(cache_namespace) + 1:].split(":", 1)[0]
+
 
 default_1_hr = 60 * 60  # Expire in 1 hour
+stale_window = 60  # Seconds an expired value is still served while one request refreshes it
+ttl_jitter = 0.1  # +/-10% on every TTL so keys written together don't all expire together
 
+# Loads currently in flight, one per cache key (per worker process)
+inflight_loads: dict[str, asyncio.Task] = {}
 
-# Cache player data in Redis
-async def cache_player(redis: Redis, player: Player, ex: int = default_1_hr):
-    player_dict = player.to_dict()
-    player_dict["team"] = {"id": player.id, "name": player.name} if player is not None else None
-    await redis.set(f"player:{player.id}", json.dumps(player_dict), ex=ex)
 
+@timed_serialization
+def dumps(value: Any) -> bytes:
+    """Serialize a JSON-compatible value for Redis (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
 
-# Get cached player data from Redis
-async def get_cached_player(redis: Redis, player_id: int):
-    cached_data = await redis.get(f"player:{player_id}")
-    if cached_data:
-        return json.loads(cached_data)
-    return None
 
+@timed_serialization
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
-# Cache team data in Redis
-# async def cache_team(redis: Redis, team: Team, ex: int = default_1_hr):
-#     await redis.set(f"team:{team.id}", team.json(), ex=ex)
 
-async def cache_team(redis: Redis, team: Team, ex: int = default_1_hr):
-    # Use a custom serialization method to get a JSON-serializable dictionary
-    team_dict = team.to_dict()
+def json_response(data: bytes | str, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Return cached JSON as-is: no parsing, response model validation or re-serialization"""
+    return Response(content=data, media_type="application/json", headers=headers)
+
+
+def json_array(items: List[bytes | str]) -> bytes:
+    """Splice already serialized JSON values into a JSON array without parsing them"""
+    return b"[" + b",".join(item.encode() if isinstance(item, str) else item for item in items) + b"]"
 
-    # Serialize the dictionary to JSON and cache it in Redis
-    await redis.set(f"team:{team.id}", json.dumps(team_dict), ex=ex)
 
+def cache_ttl(ex: int = default_1_hr) -> int:
+    """
+    Redis expiry for a cached value: the jittered fresh TTL plus the stale-while-revalidate window.
+
+    Args:
+        ex (int): Nominal time in seconds the value is considered fresh.
 
-# Get cached team data from Redis
-async def get_cached_team(redis: Redis, team_id: int) -> Optional[Team]:
-    cached_data = await redis.get(f"team:{team_id}")
+    Returns:
+        int: Expiry in seconds to pass to Redis.
+    """
+    return int(ex * random.uniform(1 - ttl_jitter, 1 + ttl_jitter)) + stale_window
+
+
+# Dependency tags: the "deps" key of an entity tag is the set of cache keys whose value embeds that entity, e.g.
+# the set of tag "team:3" holds team 3, its players and every match showing team 3. Writes invalidate the tags
+# of what they changed instead of guessing which keys are affected.
+# A load only stores its value if none of the value's tags was invalidated since it started: every invalidation
+# increments the clock and stamps "<tag set>:invalidated" (and "<key>:invalidated" for keys deleted directly, or
+# rewritten by a write-through like cache_match) with the new value, the store compares those stamps with the clock
+# read before loading.
+invalidation_clock_key = cache_key("deps", "clock")
+invalidation_stamp_ex = 5 * 60  # Seconds a stamp is kept, longer than any load
+
+Tags = Callable[[Any], Iterable[str]]
+
+# Keys of the values workers also hold in memory (match_cache), deleted ones are published on this channel so every
+# worker drops its copy too, newline separated
+local_invalidation_channel = f"{cache_namespace}:local_invalidations"
+local_key_prefix = cache_key("match", "")
+
+# KEYS: the clock, then tag sets, then plain keys to delete; ARGV: number of tag sets, channel, local key prefix,
+# stamp TTL
+invalidate_lua = """
+local clock = redis.call('INCR', KEYS[1])
+for i = 2, #KEYS do
+    redis.call('SET', KEYS[i] .. ':invalidated', clock, 'EX', ARGV[4])
+end
+local deleted = 0
+local tags = tonumber(ARGV[1])
+local evicted = {}
+local function collect(keys)
+    for _, key in ipairs(keys) do
+        if string.sub(key, 1, #ARGV[3]) == ARGV[3] then
+            evicted[#evicted + 1] = key
+        end
+    end
+end
+for i = 2, tags + 1 do
+    local keys = redis.call('SMEMBERS', KEYS[i])
+    collect(keys)
+    for j = 1, #keys, 500 do
+        deleted = deleted + redis.call('DEL', unpack(keys, j, math.min(j + 499, #keys)))
+    end
+    redis.call('DEL', KEYS[i])
+end
+for i = tags + 2, #KEYS do
+    collect({KEYS[i]})
+    deleted = deleted + redis.call('DEL', KEYS[i])
+end
+if #evicted > 0 then
+    redis.call('PUBLISH', ARGV[2], table.concat(evicted, '\\n'))
+end
+return {deleted, evicted}
+"""
+
+# Store a loaded value with its tags unless the key or one of its tags was invalidated while it was being loaded
+# (it may be stale). Invalidations of unrelated tags don't matter.
+# KEYS: the cache key, then tag sets; ARGV: clock value before loading, value, TTL, tag TTL
+store_tagged_lua = """
+local started = tonumber(ARGV[1]) or 0
+for i = 1, #KEYS do
+    local stamp = redis.call('GET', KEYS[i] .. ':invalidated')
+    if stamp and tonumber(stamp) > started then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+return 1
+"""
+
+
+# Write a match detail through (after an update) and bump its seq in one step. The key is stamped like an
+# invalidation, so a load that read the database before the update can't store its older copy over this one.
+# A patched copy is only written if the cached one is still what it was patched from, nil otherwise.
+# KEYS: the clock, the match key, its seq counter; ARGV: value, TTL, seq TTL, stamp TTL, optional expected copy
+write_match_lua = """
+local previous = redis.call('GET', KEYS[2])
+if ARGV[5] and previous ~= ARGV[5] then
+    return false
+end
+local clock = redis.call('INCR', KEYS[1])
+redis.call('SET', KEYS[2] .. ':invalidated', clock, 'EX', ARGV[4])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[2])
+local seq = redis.call('INCR', KEYS[3])
+redis.call('EXPIRE', KEYS[3], ARGV[3])
+return {previous, seq}
+"""
+
+
+def dependency_ttl(ex: int = default_1_hr) -> int:
+    """Tag sets outlive every key they list"""
+    return int(ex * (1 + ttl_jitter)) + stale_window
+
+
+def add_dependencies(pipe, key: str, tags: Iterable[str], ex: int = default_1_hr):
+    """Queue registering `key` under each tag on a pipeline"""
+    for tag in tags:
+        pipe.sadd(cache_key("deps", tag), key)
+        pipe.expire(cache_key("deps", tag), dependency_ttl(ex))
+
+
+async def invalidate(redis: Redis, tags: Iterable[str] = (), keys: Iterable[str] = ()) -> int:
+    """
+    Delete every cache key registered under `tags`, plus `keys`, in one round trip.
+
+    Args:
+        redis (Redis): The Redis instance.
+        tags (Iterable[str]): Entities that changed, e.g. "team:3" or "match:7".
+        keys (Iterable[str]): Cache keys to delete directly.
+
+    Returns:
+        int: Number of cache keys deleted.
+    """
+    tag_keys = [cache_key("deps", tag) for tag in tags]
+    deleted, evicted = await redis.register_script(invalidate_lua)(
+        keys=[invalidation_clock_key, *tag_keys, *keys],
+        args=[len(tag_keys), local_invalidation_channel, local_key_prefix, invalidation_stamp_ex],
+    )
+
+    # Other workers drop them when the message arrives, this one right away
+    for key in evicted:
+        match_cache.invalidate(key.decode() if isinstance(key, bytes) else key)
+    return deleted
+
+
+async def load_and_cache(
+        redis: Redis, key: str, loader: Callable[[], Awaitable[Any]], ex: int = default_1_hr, tags: Optional[Tags] = None
+) -> Optional[bytes]:
+    clock = await redis.get(invalidation_clock_key) if tags else None
+    value = await loader()
+    if value is None:
+        return None
+    data = value if isinstance(value, bytes) else dumps(value)
+    if tags:
+        await redis.register_script(store_tagged_lua)(
+            keys=[key, *(cache_key("deps", tag) for tag in tags(value))],
+            args=[clock or b"0", data, cache_ttl(ex), dependency_ttl(ex)],
+        )
+    else:
+        await redis.set(key, data, ex=cache_ttl(ex))
+    return data
+
+
+def single_flight(
+        redis: Redis, key: str, loader: Callable[[], Awaitable[Any]], ex: int = default_1_hr, tags: Optional[Tags] = None
+) -> asyncio.Task:
+    """Return the in-flight load for `key`, starting one only if none is running"""
+    task = inflight_loads.get(key)
+    if task is None:
+        task = asyncio.create_task(load_and_cache(redis, key, loader, ex, tags))
+        inflight_loads[key] = task
+        task.add_done_callback(lambda done: inflight_loads.pop(key, None) if inflight_loads.get(key) is done else None)
+    return task
+
+
+async def get_or_load_raw(
+        redis: Redis, key: str, loader: Callable[[], Awaitable[Any]], ex: int = default_1_hr, tags: Optional[Tags] = None
+) -> Optional[bytes]:
+    """
+    Cache-aside read with request coalescing and stale-while-revalidate, returning the serialized value.
+
+    Args:
+        redis (Redis): The Redis instance.
+        key (str): Cache key, e.g. cache_key("match", 1).
+        loader (Callable): Coroutine function returning a JSON-serializable value, or bytes to store as-is
+            (None when not found). It may outlive the calling request, so it must open its own database session.
+        ex (int): Time in seconds the value is considered fresh.
+        tags (Optional[Tags]): Returns the dependency tags of a loaded value, so writes can invalidate it.
+
+    Returns:
+        Optional[bytes]: The cached or freshly loaded value as JSON, None if the loader found nothing.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.ttl(key)
+        cached_data, ttl = await pipe.execute()
+
+    return await serve_or_load(redis, key, cached_data, ttl, loader, ex, tags)
+
+
+async def serve_or_load(
+        redis: Redis, key: str, cached_data: Optional[bytes], ttl: int, loader: Callable[[], Awaitable[Any]], ex: int,
+        tags: Optional[Tags] = None
+) -> Optional[bytes]:
+    """The part of get_or_load_raw after GET/TTL, for callers that read the key their own way"""
+    record_cache_lookup(cache_family(key), bool(cached_data))
     if cached_data:
-        team_dict = json.loads(cached_data)  # Convert JSON string back to Python dictionary
-
-        # Ensure 'players' is a list of Player objects
-        players = team_dict["players"]
-        if isinstance(players, str):  # Deserialize only if it's a JSON string
-            players = json.loads(players)
-        team_dict["players"] = [Player(**player_data) for player_data in players]
-
-        # Ensure 'all_matches' is a list of Match objects
-        all_matches = team_dict["all_matches"]
-        if isinstance(all_matches, str):  # Deserialize only if it's a JSON string
-            all_matches = json.loads(all_matches)
-        team_dict["all_matches"] = [Match(**match_data) for match_data in all_matches]
-
-        # Reconstruct matches_as_team1 and matches_as_team2
-        team_dict["matches_as_team1"] = [m for m in team_dict["all_matches"] if m.team1_id == team_id]
-        team_dict["matches_as_team2"] = [m for m in team_dict["all_matches"] if m.team2_id == team_id]
-
-        # Return the reconstructed Team model
-        return Team(**team_dict)
-    return None
+        if 0 <= ttl < stale_window:
+            # Past its fresh TTL: serve the stale copy, refresh once in the background
+            single_flight(redis, key, loader, ex, tags)
+        return cached_data
+
+    # Miss: every concurrent request for this key awaits the same load (shielded so one
+    # cancelled request doesn't cancel it for the others)
+    return await asyncio.shield(single_flight(redis, key, loader, ex, tags))
+
+
+async def get_or_load(
+        redis: Redis, key: str, loader: Callable[[], Awaitable[Any]], ex: int = default_1_hr, tags: Optional[Tags] = None
+):
+    """Same as get_or_load_raw, with the value deserialized"""
+    data = await get_or_load_raw(redis, key, loader, ex, tags)
+    return loads(data) if data is not None else None
+
+
+@timed_serialization
+def player_to_cache(player: Player) -> dict:
+    return PlayerResponse.model_validate(player, from_attributes=True).model_dump(mode="json")
+
+
+@timed_serialization
+def team_to_cache(team: Team) -> dict:
+    return TeamResponse.model_validate(team, from_attributes=True).model_dump(mode="json")
+
+
+@timed_serialization
+def match_to_cache(match: Match) -> dict:
+    return MatchDetailResponse.model_validate(match, from_attributes=True).model_dump(mode="json")
+
+
+@timed_serialization
+def match_summary_to_cache(match: Match) -> dict:
+    return MatchResponse.model_validate(match, from_attributes=True).model_dump(mode="json")
+
+
+# Dependency tags of cached values, computed from the cached shapes above
+
+def player_tags(player: dict) -> List[str]:
+    return [f"team:{player['team']['id']}"] if player.get("team") else []
+
+
+def team_tags(team: dict) -> List[str]:
+    return [f"team:{team['id']}"] + [f"match:{match['id']}" for match in team["all_matches"]]
+
+
+def match_tags(match: dict) -> List[str]:
+    """
+    The teams a match detail shows and the other matches embedded in them.
+
+    A match's own tag doesn't list match:{id}, cache_match rewrites it (and stamps it) on every update.
+    """
+    tags = set()
+    for team in (match.get("team1"), match.get("team2")):
+        if team:
+            tags.add(f"team:{team['id']}")
+            tags.update(f"match:{other['id']}" for other in team["all_matches"] if other["id"] != match["id"])
+    return sorted(tags)
+
+
+# Cache player data in Redis (player.team must be loaded)
+async def cache_player(redis: Redis, player: Player, ex: int = default_1_hr):
+    player_dict = player_to_cache(player)
+    async with redis.pipeline() as pipe:
+        pipe.set(cache_key("player", player.id), dumps(player_dict), ex=cache_ttl(ex))
+        add_dependencies(pipe, cache_key("player", player.id), player_tags(player_dict), ex)
+        await pipe.execute()
+
+
+# Sorted set of every team id (score = id), so team pages are served in id order without scanning keys
+team_index_key = cache_key("teams", "index")
+
+# Resolve one page of the team index to the cached team blobs in a single round trip.
+# Returns false when the index doesn't exist; missing team keys come back as nil. ARGV[4] is the team key prefix.
+team_page_lua = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local ids
+if ARGV[1] == 'after' then
+    ids = redis.call('ZRANGEBYSCORE', KEYS[1], '(' .. ARGV[2], '+inf', 'LIMIT', 0, ARGV[3])
+else
+    ids = redis.call('ZRANGE', KEYS[1], ARGV[2], ARGV[2] + ARGV[3] - 1)
+end
+if #ids == 0 then
+    return {{}, {}}
+end
+local keys = {}
+for i, id in ipairs(ids) do
+    keys[i] = ARGV[4] .. id
+end
+return {ids, redis.call('MGET', unpack(keys))}
+"""
+
+
+team_index_add_lua = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1])
+end
+return 0
+"""
+
+
+# Cache team data in Redis (players and matches must be loaded)
+async def cache_team(redis: Redis, team: Team, ex: int = default_1_hr):
+    team_dict = team_to_cache(team)
+    async with redis.pipeline() as pipe:
+        pipe.set(cache_key("team", team.id), dumps(team_dict), ex=cache_ttl(ex))
+        add_dependencies(pipe, cache_key("team", team.id), team_tags(team_dict), ex)
+        # Only extend an existing index, on its own this team would make it look like the only one
+        await redis.register_script(team_index_add_lua)(keys=[team_index_key], args=[team.id], client=pipe)
+        await pipe.execute()
 
 
 # Cache multiple teams data in Redis
-async def cache_teams(redis: Redis, teams: List[Team], ex: int = default_1_hr):
-    # Create a dictionary where each key is the team ID and value is the serialized team data
-    teams_dict = {f"team:{team.id}": json.dumps(team.to_dict()) for team in teams}
+async def cache_teams(redis: Redis, teams: List[Team], ex: int = default_1_hr, team_ids: Optional[List[int]] = None):
+    """
+    Cache a page of teams and keep the team index in sync.
 
+    Args:
+        redis (Redis): The Redis instance to use for caching.
+        teams (List[Team]): Teams to cache (players and matches loaded).
+        ex (int): Expiry time in seconds for the cached data.
+        team_ids (Optional[List[int]]): Every team id in the database; when given the index is rebuilt from it,
+            otherwise the page's teams are added to it.
+    """
     # Use a pipeline to set multiple keys in Redis efficiently
     async with redis.pipeline() as pipe:
-        for key, value in teams_dict.items():
-            await pipe.set(key, value, ex=ex)
+        for team in teams:
+            team_dict = team_to_cache(team)
+            pipe.set(cache_key("team", team.id), dumps(team_dict), ex=cache_ttl(ex))
+            add_dependencies(pipe, cache_key("team", team.id), team_tags(team_dict), ex)
+        if team_ids is not None:
+            pipe.delete(team_index_key)
+            if team_ids:
+                pipe.zadd(team_index_key, {team_id: team_id for team_id in team_ids})
+        elif teams:
+            pipe.zadd(team_index_key, {team.id: team.id for team in teams})
         await pipe.execute()
 
 
 # Get cached multiple teams data from Redis
-async def get_cached_teams(redis: Redis, offset: int = 0, limit: int = 100) -> Optional[List[Team]]:
-    # Fetch all team keys
-    keys = await redis.keys("team:*")
+async def get_cached_teams(
+        redis: Redis, limit: int = 100, offset: int = 0, after_id: Optional[int] = None
+) -> Optional[tuple[List[int], List[bytes]]]:
+    """
+    Serve a page of teams from the team index in O(log n + page).
 
-    # Apply sorting and slicing to keys for offset and limit
-    keys = sorted(keys)[offset:offset + limit]
+    Args:
+        redis (Redis): The Redis instance to read from.
+        limit (int): Number of teams to return.
+        offset (int): Position of the first team, ignored when `after_id` is given.
+        after_id (Optional[int]): Keyset position, the page starts after this team id.
 
-    if keys:
-        # Use a pipeline to fetch the required teams efficiently
-        async with redis.pipeline() as pipe:
-            for key in keys:
-                await pipe.get(key)
-            cached_data_list = await pipe.execute()
-
-        # Deserialize and reconstruct each team
-        teams = []
-        for cached_data in cached_data_list:
-            if cached_data:
-                team_dict = json.loads(cached_data)
-
-                # Handle missing keys with default values
-                players = team_dict.get("players", [])
-                if isinstance(players, str):  # Deserialize only if it's a JSON string
-                    players = json.loads(players)
-                team_dict["players"] = [Player(**player_data) for player_data in players]
-
-                all_matches = team_dict.get("all_matches", [])
-                if isinstance(all_matches, str):  # Deserialize only if it's a JSON string
-                    all_matches = json.loads(all_matches)
-                team_dict["all_matches"] = [Match(**match_data) for match_data in all_matches]
-
-                # Reconstruct matches_as_team1 and matches_as_team2
-                team_dict["matches_as_team1"] = [
-                    match for match in team_dict["all_matches"] if match.team1_id == team_dict.get("id")
-                ]
-                team_dict["matches_as_team2"] = [
-                    match for match in team_dict["all_matches"] if match.team2_id == team_dict.get("id")
-                ]
-
-                # Reconstruct the Team model and append to the list
-                teams.append(Team(**team_dict))
-
-        return teams
+    Returns:
+        Optional[tuple[List[int], List[Optional[bytes]]]]: Team ids of the page and their JSON in TeamResponse
+        shape (None for teams that aren't cached), or None when the index itself is missing and must be rebuilt.
+    """
+    args = ["after", after_id, limit] if after_id is not None else ["offset", offset, limit]
+    cached = await redis.register_script(team_page_lua)(keys=[team_index_key], args=[*args, cache_key("team") + ":"])
+    record_cache_lookup("team", bool(cached and cached[0] and all(cached[1])))
+    if not cached:
+        return None
+
+    team_ids, teams = cached
+    return [int(team_id) for team_id in team_ids], teams
 
-    return None
 
+# Every Nth update of a match is published whole, so clients that missed a delta resync
+keyframe_interval = 20
+match_stream_maxlen = 500  # Updates kept per match for clients resuming after a reconnect
+match_replay_limit = 100  # Beyond this many missed updates a reconnecting client gets a keyframe instead
+match_stream_ex = 24 * 60 * 60  # The seq counter and stream of a match expire a day after its last update
+patch_attempts = 5  # Reads of the cached match a patch retries on before falling back to loading it
+match_seq_header = "X-Match-Seq"  # Seq of the last update a GET of the match includes, live updates continue from it
 
-# Cache match data in Redis and publish update
-async def cache_match(redis: Redis, match: Match, ex: int = default_1_hr):
-    match_dict = {
-        "id": match.id,
-        "team1": match.team1.to_dict() if match.team1 else None,
-        "team2": match.team2.to_dict() if match.team2 else None,
-        "score_team1": match.score_team1,
-        "score_team2": match.score_team2,
-        "status": match.status,
-        "start_time": match.start_time,
-        "half_time": match.half_time,
-        "second_start": match.second_start,
-        "end_time": match.end_time,
-        "stats": match.stats.to_dict() if match.stats else None
+
+def match_delta(previous: dict, current: dict) -> dict:
+    """
+    Fields of a cached match that changed, stats compared field by field.
+
+    Teams are only included when the team itself changed, their players/matches go out in keyframes.
+    """
+    changes = {
+        field: value for field, value in current.items()
+        if field not in ("team1", "team2", "stats") and previous.get(field) != value
     }
+    for team in ("team1", "team2"):
+        if (previous.get(team) or {}).get("id") != (current.get(team) or {}).get("id"):
+            changes[team] = current.get(team)
+
+    previous_stats = previous.get("stats") or {}
+    stats_changes = {field: value for field, value in (current.get("stats") or {}).items() if previous_stats.get(field) != value}
+    if stats_changes:
+        changes["stats"] = stats_changes
+    return changes
 
-    # Cache the match details in Redis
-    await redis.set(f"match:{match.id}", json.dumps(match_dict), ex=ex)
 
-    # Publish match updates to Redis Pub/Sub
-    await redis.publish(f"match_update:{match.id}", json.dumps(match_dict))
+# Cache match data in Redis and publish update (match must be loaded with teams and stats)
+async def cache_match(redis: Redis, match: Match, ex: int = default_1_hr, list_changed: bool = True):
+    await cache_matches_and_publish(redis, [match], ex, list_changed)
 
 
-# Get cached match data from Redis
-async def get_cached_match(redis: Redis, match_id: int) -> Optional[Match]:
-    cached_data = await redis.get(f"match:{match_id}")
+async def cache_matches_and_publish(
+        redis: Redis, matches: List[Match], ex: int = default_1_hr, list_changed: bool = True
+):
+    """
+    Cache updated matches and publish one update per match, in two round trips whatever the number of matches.
+
+    Args:
+        redis (Redis): The Redis instance.
+        matches (List[Match]): Matches loaded with match_detail_load_options.
+        ex (int): Expiry time in seconds for the cached data.
+        list_changed (bool): False when only fields missing from list pages changed (stats), keeping cached pages.
+    """
+    match_dicts = [match_to_cache(match) for match in matches]
+    if live_stats_write_behind:
+        await overlay_live_stats(redis, match_dicts)
+    await cache_and_publish_match_dicts(redis, match_dicts, ex, list_changed)
+
+
+async def cache_and_publish_match_dicts(
+        redis: Redis, match_dicts: List[dict], ex: int = default_1_hr, list_changed: bool = True,
+        event: Optional[dict] = None, patched_from: Optional[List[bytes]] = None
+) -> bool:
+    """
+    Same as cache_matches_and_publish for matches already in MatchDetailResponse shape.
+
+    Args:
+        redis (Redis): The Redis instance.
+        match_dicts (List[dict]): Match details from match_to_cache.
+        ex (int): Expiry time in seconds for the cached data.
+        list_changed (bool): False when only fields missing from list pages changed (stats), keeping cached pages.
+        event (Optional[dict]): Match event that caused the update, added to every published update.
+        patched_from (Optional[List[bytes]]): Cached copies the details were patched from, a detail is only
+            written (and published) if its cached copy is still that one.
+
+    Returns:
+        bool: False when a patched detail wasn't written because its cached copy changed meanwhile.
+    """
+
+    # Cache the match details in Redis, getting back the previous copies to diff against and the new seqs.
+    # Every cached match list page may contain these matches, move them all to a new version.
+    write_match = redis.register_script(write_match_lua)
+    async with redis.pipeline() as pipe:
+        for i, match_dict in enumerate(match_dicts):
+            args = [dumps(match_dict), cache_ttl(ex), match_stream_ex, invalidation_stamp_ex]
+            await write_match(
+                keys=[invalidation_clock_key, cache_key("match", match_dict["id"]), cache_key("match_seq", match_dict["id"])],
+                args=args + [patched_from[i]] if patched_from else args,
+                client=pipe,
+            )
+        if list_changed:
+            pipe.incr(match_list_version_key)
+        for match_dict in match_dicts:
+            add_dependencies(pipe, cache_key("match", match_dict["id"]), match_tags(match_dict), ex)
+        written = (await pipe.execute())[:len(match_dicts)]
+
+    # Other workers drop their in-memory copies on the published update, this one can't wait for it
+    for match_dict in match_dicts:
+        match_cache.invalidate(cache_key("match", match_dict["id"]))
+
+    # Publish match updates to Redis Pub/Sub: a keyframe with the whole match, or only what changed.
+    # Also append each to its match stream (entry id = seq) so reconnecting clients can replay what they missed.
+    streamed = []
+    async with redis.pipeline(transaction=False) as pipe:
+        for i, match_dict in enumerate(match_dicts):
+            if written[i] is None:
+                continue  # Patched from a copy another writer replaced
+            match_id = match_dict["id"]
+            previous_data, seq = written[i]
+            if previous_data is None or seq % keyframe_interval == 1:
+                update = {"type": "keyframe", "id": match_id, "seq": seq, "match": match_dict}
+            else:
+                update = {"type": "delta", "id": match_id, "seq": seq, "changes": match_delta(loads(previous_data), match_dict)}
+            if event:
+                update["event"] = event
+            payload = dumps(update)
+
+            stream_key = cache_key("match_stream", match_id)
+            pipe.publish(f"match_update:{match_id}", payload)
+            pipe.xadd(stream_key, {"update": payload}, id=f"{seq}-0", maxlen=match_stream_maxlen, approximate=True)
+            pipe.expire(stream_key, match_stream_ex)
+            streamed.append((stream_key, seq, payload))
+        results = await pipe.execute(raise_on_error=False)
+
+    # An XADD below the stream's last id fails. With seq 1 the counter was recreated (expired or flushed) while
+    # the stream kept higher ids: start that stream over. Otherwise a concurrent writer of the same match appended
+    # a later seq first; the late entry is left out and replays across that gap fall back to a keyframe.
+    for (stream_key, seq, payload), result in zip(streamed, results[1::3]):
+        if isinstance(result, ResponseError) and seq == 1:
+            async with redis.pipeline() as pipe:
+                pipe.delete(stream_key)
+                pipe.xadd(stream_key, {"update": payload}, id=f"{seq}-0", maxlen=match_stream_maxlen, approximate=True)
+                pipe.expire(stream_key, match_stream_ex)
+                await pipe.execute()
+    return all(result is not None for result in written)
+
+
+async def patch_cached_match(
+        redis: Redis, match_id: int, changes: Mapping[str, Any] = None, stats: Mapping[str, Any] = None,
+        event: Optional[dict] = None, ex: int = default_1_hr
+) -> bool:
+    """
+    Set fields of the cached match detail and publish the update, without loading the match from the database.
+
+    Args:
+        redis (Redis): The Redis instance.
+        match_id (int): Match to patch.
+        changes (Mapping[str, Any]): Match fields (e.g. scores) to set.
+        stats (Mapping[str, Any]): Stats fields to set.
+        event (Optional[dict]): What happened (e.g. {"type": "goal", "team": 1}), sent along with the update.
+        ex (int): Expiry time in seconds for the cached data.
+
+    Returns:
+        bool: False when the match detail (or its stats) isn't cached, or kept changing under the patch, the caller
+            loads it and uses cache_match.
+    """
+    # The write only succeeds if nobody (the match clock, another event) replaced the copy since it was read
+    for _ in range(patch_attempts):
+        cached_data = await redis.get(cache_key("match", match_id))
+        if cached_data is None:
+            return False
+
+        match_dict = loads(cached_data)
+        if stats and not match_dict.get("stats"):
+            return False
+        match_dict.update(changes or {})
+        if stats:
+            match_dict["stats"].update(stats)
+        if await cache_and_publish_match_dicts(
+                redis, [match_dict], ex, list_changed=bool(changes), event=event, patched_from=[cached_data]
+        ):
+            return True
+    return False
+
+
+async def get_match_updates_since(redis: Redis, match_id: int, last_seq: int) -> Optional[List[dict]]:
+    """
+    Updates a client missed since `last_seq`, for resuming after a reconnect.
+
+    Args:
+        redis (Redis): The Redis instance.
+        match_id (int): The match the client follows.
+        last_seq (int): Sequence number of the last update the client applied.
+
+    Returns:
+        Optional[List[dict]]: The missed updates in order, a single keyframe when they were trimmed
+            (or are too many to replay), or None when the match isn't cached and the client must refetch it.
+    """
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(cache_key("match_seq", match_id))
+        pipe.xrange(cache_key("match_stream", match_id), min=f"{last_seq + 1}-0", max="+", count=match_replay_limit)
+        seq, entries = await pipe.execute()
+
+    seq = int(seq) if seq else 0
+    if seq == last_seq:
+        return []
+
+    updates = [loads(next(iter(fields.values()))) for _, fields in entries]  # Single "update" field
+    # Only a complete run last_seq + 1 .. seq is replayed (an update can be missing, see cache_and_publish_match_dicts)
+    if seq > last_seq and [update["seq"] for update in updates] == list(range(last_seq + 1, seq + 1)):
+        return updates
+
+    # Gap can't be replayed from the stream: send the cached match whole
+    cached_data = await redis.get(cache_key("match", match_id))
     if cached_data:
-        # Deserialize the JSON string into a Python dictionary
-        match_dict = json.loads(cached_data)
-
-        # Reconstruct the nested Team and Player objects
-        team1 = Team(
-            id=match_dict["team1"]["id"],
-            name=match_dict["team1"]["name"],
-            city=match_dict["team1"]["city"],
-            players=[Player(**player) for player in match_dict["team1"].get("players", [])]
-        ) if match_dict["team1"] else None
-
-        team2 = Team(
-            id=match_dict["team2"]["id"],
-            name=match_dict["team2"]["name"],
-            city=match_dict["team2"]["city"],
-            players=[Player(**player) for player in match_dict["team2"].get("players", [])]
-        ) if match_dict["team2"] else None
-
-        # Reconstruct MatchStats if it exists
-        stats = MatchStats(
-            id=match_dict["stats"].get("id", 0),
-            match_id=match_dict["stats"].get("match_id", 0),
-            possession_team1=match_dict["stats"].get("possession_team1", 0),
-            possession_team2=match_dict["stats"].get("possession_team2", 0),
-            shots_team1=match_dict["stats"].get("shots_team1", 0),
-            shots_team2=match_dict["stats"].get("shots_team2", 0),
-            shots_on_target_team1=match_dict["stats"].get("shots_on_target_team1", 0),
-            shots_on_target_team2=match_dict["stats"].get("shots_on_target_team2", 0),
-            corners_team1=match_dict["stats"].get("corners_team1", 0),
-            corners_team2=match_dict["stats"].get("corners_team2", 0),
-            yellow_cards_team1=match_dict["stats"].get("yellow_cards_team1", 0),
-            yellow_cards_team2=match_dict["stats"].get("yellow_cards_team2", 0),
-        ) if match_dict.get("stats") else None
-
-        # Reconstruct and return the Match object
-        return Match(
-            id=match_dict["id"],
-            team1=team1,
-            team2=team2,
-            score_team1=match_dict["score_team1"],
-            score_team2=match_dict["score_team2"],
-            status=match_dict["status"],
-            start_time=match_dict["start_time"],
-            half_time=match_dict["half_time"],
-            second_start=match_dict["second_start"],
-            end_time=match_dict["end_time"],
-            stats=stats
-        )
+        return [{"type": "keyframe", "id": match_id, "seq": seq, "match": loads(cached_data)}]
     return None
 
+
 # Delete cached match data in Redis (New)
 async def delete_cached_match(redis: Redis, match_id: int):
-    await redis.delete(f"match:{match_id}")
+    await redis.delete(cache_key("match", match_id))
 
 
-# Cache multiple matches data in Redis
-async def cache_matches(redis: Redis, matches: List[Match], ex: int = default_1_hr):
+async def warm_matches(redis: Redis, matches: List[Match], ex: int = default_1_hr, chunk: int = 100):
     """
-    Cache match data in Redis with proper related fields for team1 and team2.
+    Preload match details and their teams without publishing updates, a pipeline per `chunk` matches.
 
     Args:
-        redis (Redis): The Redis instance to use for caching.
-        matches (List[Match]): List of Match objects to cache.
+        redis (Redis): The Redis instance.
+        matches (List[Match]): Matches loaded with match_detail_load_options.
         ex (int): Expiry time in seconds for the cached data.
+        chunk (int): Matches per pipeline.
+    """
+    cached_teams = set()
+    for start in range(0, len(matches), chunk):
+        match_dicts = [match_to_cache(match) for match in matches[start:start + chunk]]
+        if live_stats_write_behind:
+            await overlay_live_stats(redis, match_dicts)
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for match, match_dict in zip(matches[start:start + chunk], match_dicts):
+                pipe.set(cache_key("match", match.id), dumps(match_dict), ex=cache_ttl(ex))
+                add_dependencies(pipe, cache_key("match", match.id), match_tags(match_dict), ex)
+
+                for team in (match.team1, match.team2):
+                    if team and team.id not in cached_teams:
+                        cached_teams.add(team.id)
+                        team_dict = team_to_cache(team)
+                        pipe.set(cache_key("team", team.id), dumps(team_dict), ex=cache_ttl(ex))
+                        add_dependencies(pipe, cache_key("team", team.id), team_tags(team_dict), ex)
+            await pipe.execute()
+
+
+# Live match stats (write-behind). With LIVE_STATS_WRITE_BEHIND=true the stats of a running match live in a Redis
+# hash from kick-off: updates change the hash and the cached match detail without touching MySQL, and the match
+# is marked dirty. utils/live_stats.py writes dirty matches to the matchstats table periodically and at full time.
+live_stats_write_behind = os.getenv("LIVE_STATS_WRITE_BEHIND", "false").lower() == "true"
+live_stats_fields = (
+    "possession_team1", "possession_team2", "shots_team1", "shots_team2", "shots_on_target_team1",
+    "shots_on_target_team2", "corners_team1", "corners_team2", "yellow_cards_team1", "yellow_cards_team2",
+)
+live_stats_dirty_key = cache_key("live_stats", "dirty")  # Set of match ids changed since the last flush
+live_stats_ex = 24 * 60 * 60  # Refreshed by every update, only abandoned matches expire
+
+# KEYS: the stats hash, the dirty set; ARGV: match id, TTL, number of fields to set, then field/value pairs to set
+# followed by field/increment pairs. Returns the updated hash, nothing when the match isn't live.
+live_stats_update_lua = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local sets = tonumber(ARGV[3])
+for i = 4, 3 + sets * 2, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+for i = 4 + sets * 2, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+redis.call('SADD', KEYS[2], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+# KEYS: the dirty set; ARGV: hash key prefix, max matches. Takes matches off the dirty set with their current stats.
+live_stats_claim_lua = """
+local ids = redis.call('SPOP', KEYS[1], ARGV[2])
+local claimed = {}
+for _, id in ipairs(ids) do
+    claimed[#claimed + 1] = id
+    claimed[#claimed + 1] = redis.call('HGETALL', ARGV[1] .. id)
+end
+return claimed
+"""
+
+
+def live_stats_key(match_id: int) -> str:
+    return cache_key("live_stats", match_id)
+
+
+def parse_live_stats(pairs: list) -> dict:
+    """HGETALL reply (flat list or dict) to field -> int"""
+    items = pairs.items() if isinstance(pairs, dict) else zip(pairs[::2], pairs[1::2])
+    return {(field.decode() if isinstance(field, bytes) else field): int(value) for field, value in items}
+
+
+async def start_live_stats(redis: Redis, stats: Any, ex: int = live_stats_ex):
     """
-    matches_data = []
-    for match in matches:
-        match_data = {
-            "id": match.id,
-            "team1": match.team1.to_dict() if match.team1 else None,  # Ensure related fields are populated
-            "team2": match.team2.to_dict() if match.team2 else None,
-            "score_team1": match.score_team1,
-            "score_team2": match.score_team2,
-            "status": match.status,
-        }
-        matches_data.append(match_data)
+    Move a match's stats to Redis at kick-off (or when the mode is switched on mid-match), keeping an existing hash.
 
-    # Store the serialized data in Redis with expiration
-    await redis.set("matches", json.dumps(matches_data), ex=ex)
+    Args:
+        redis (Redis): The Redis instance.
+        stats: The match's MatchStats row (or anything with the same attributes).
+        ex (int): Expiry in seconds, refreshed by every update.
+    """
+    key = live_stats_key(stats.match_id)
+    async with redis.pipeline() as pipe:
+        for field in live_stats_fields:
+            pipe.hsetnx(key, field, getattr(stats, field) or 0)
+        pipe.expire(key, ex)
+        await pipe.execute()
 
 
-# Get cached multiple matches data from Redis
-async def get_cached_matches(redis: Redis):
+async def update_live_stats(
+        redis: Redis, match_id: int, changes: Mapping[str, int] = None, increments: Mapping[str, int] = None
+) -> Optional[dict]:
     """
-    Retrieve cached matches from Redis, populating teams with players as IDs.
+    Set and increment stats of a live match in one atomic step.
 
     Args:
-        redis (Redis): The Redis instance to fetch cached data.
+        redis (Redis): The Redis instance.
+        match_id (int): Match to update.
+        changes (Mapping[str, int]): Fields to set.
+        increments (Mapping[str, int]): Fields to increment (HINCRBY), applied after `changes`.
 
     Returns:
-        List[Match]: A list of Match objects with teams populated (players as IDs).
+        Optional[dict]: All stats of the match after the update, None when its stats aren't in Redis (not live or
+        the mode is off), the caller then writes to MySQL.
     """
-    cached_data = await redis.get("matches")
-    if cached_data:
-        matches_data = json.loads(cached_data)
-        matches = []
-        for match_data in matches_data:
-            team1 = Team(
-                id=match_data["team1"]["id"],
-                name=match_data["team1"]["name"],
-                city=match_data["team1"]["city"],
-                # players=match_data["team1"]["players"]  # Expecting a list of player IDs
-            ) if match_data["team1"] else None
-
-            team2 = Team(
-                id=match_data["team2"]["id"],
-                name=match_data["team2"]["name"],
-                city=match_data["team2"]["city"],
-                # players=match_data["team2"]["players"]  # Expecting a list of player IDs
-            ) if match_data["team2"] else None
-
-            match = Match(
-                id=match_data["id"],
-                team1=team1,
-                team2=team2,
-                score_team1=match_data["score_team1"],
-                score_team2=match_data["score_team2"],
-                status=match_data["status"]
+    stats = await redis.register_script(live_stats_update_lua)(
+        keys=[live_stats_key(match_id), live_stats_dirty_key], args=live_stats_update_args(match_id, changes, increments)
+    )
+    return parse_live_stats(stats) if stats else None
+
+
+async def update_live_stats_many(redis: Redis, changes: Mapping[int, Mapping[str, int]]) -> dict[int, dict]:
+    """
+    update_live_stats for many matches in one round trip.
+
+    Returns:
+        dict[int, dict]: Stats after the update of the matches that are live, the others are left to the caller.
+    """
+    script = redis.register_script(live_stats_update_lua)
+    async with redis.pipeline(transaction=False) as pipe:
+        for match_id, match_changes in changes.items():
+            await script(
+                keys=[live_stats_key(match_id), live_stats_dirty_key],
+                args=live_stats_update_args(match_id, match_changes), client=pipe,
             )
-            matches.append(match)
-        return matches
-    return []
+        results = await pipe.execute()
+    return {match_id: parse_live_stats(stats) for match_id, stats in zip(changes, results) if stats}
 
 
+def live_stats_update_args(match_id: int, changes: Mapping[str, int] = None, increments: Mapping[str, int] = None) -> list:
+    changes, increments = changes or {}, increments or {}
+    args = [match_id, live_stats_ex, len(changes)]
+    for field, value in (*changes.items(), *increments.items()):
+        args += [field, value]
+    return args
 
-# Cache user session in Redis
-async def cache_user_session(redis: Redis, user_id: int, ex: int = default_1_hr):
+
+async def get_live_stats(redis: Redis, match_ids: Iterable[int]) -> dict[int, dict]:
+    """Stats in Redis of the live matches among `match_ids`, in one round trip"""
+    match_ids = list(match_ids)
+    async with redis.pipeline(transaction=False) as pipe:
+        for match_id in match_ids:
+            pipe.hgetall(live_stats_key(match_id))
+        results = await pipe.execute()
+    return {match_id: parse_live_stats(stats) for match_id, stats in zip(match_ids, results) if stats}
+
+
+async def overlay_live_stats(redis: Redis, match_dicts: List[dict]):
+    """Replace the stats loaded from MySQL in cached match details by the live ones from Redis"""
+    live = await get_live_stats(redis, (match_dict["id"] for match_dict in match_dicts))
+    for match_dict in match_dicts:
+        if match_dict["id"] in live and match_dict.get("stats"):
+            match_dict["stats"].update(live[match_dict["id"]])
+
+
+async def publish_live_stats(redis: Redis, match_id: int, stats: dict, ex: int = default_1_hr) -> bool:
+    """
+    Put new live stats into the cached match detail and publish the update, no database access.
+
+    Returns:
+        bool: False when the match detail isn't cached, the caller loads it and uses cache_match instead.
+    """
+    return await patch_cached_match(redis, match_id, stats=stats, ex=ex)
+
+
+async def claim_dirty_live_stats(redis: Redis, count: int = 500) -> dict[int, dict]:
+    """Take up to `count` matches changed since the last flush off the dirty set, with their stats to write"""
+    claimed = await redis.register_script(live_stats_claim_lua)(
+        keys=[live_stats_dirty_key], args=[cache_key("live_stats") + ":", count]
+    )
+    return {int(match_id): parse_live_stats(stats) for match_id, stats in zip(claimed[::2], claimed[1::2]) if stats}
+
+
+async def mark_live_stats_dirty(redis: Redis, match_ids: Iterable[int]):
+    """Flag matches for the next flush again, e.g. after a failed write"""
+    match_ids = list(match_ids)
+    if match_ids:
+        await redis.sadd(live_stats_dirty_key, *match_ids)
+
+
+async def end_live_stats(redis: Redis, match_ids: Iterable[int]):
+    """Drop the Redis stats of finished matches once their final values are in MySQL"""
+    match_ids = list(match_ids)
+    if match_ids:
+        async with redis.pipeline() as pipe:
+            pipe.delete(*(live_stats_key(match_id) for match_id in match_ids))
+            pipe.srem(live_stats_dirty_key, *match_ids)
+            await pipe.execute()
+
+
+# Match list pages are cached under cache_key("matches", version, page); any match write bumps the version,
+# so pages cached before it are never read again and simply expire
+match_list_version_key = cache_key("matches", "version")
+match_list_ex = 10 * 60
+
+match_page_lua = """
+local version = redis.call('GET', KEYS[1]) or '0'
+local page_key = ARGV[2] .. version .. ':' .. ARGV[1]
+return {version, redis.call('GET', page_key), redis.call('TTL', page_key)}
+"""
+
+
+@timed_serialization
+def match_page_to_cache(matches: List[Match], next_cursor: Optional[str]) -> bytes:
+    """A match list page as stored in Redis: the next cursor on the first line, the JSON array after it"""
+    return (next_cursor or "").encode() + b"\n" + dumps([match_summary_to_cache(match) for match in matches])
+
+
+async def get_or_load_match_page(
+        redis: Redis, page: str, loader: Callable[[], Awaitable[Optional[bytes]]], ex: int = match_list_ex
+) -> Optional[tuple[bytes, Optional[str]]]:
+    """
+    Cache-aside read of one match list page, resolving the current list version in the same round trip.
+
+    Args:
+        redis (Redis): The Redis instance.
+        page (str): What identifies the page: ordering, filters, cursor or offset and limit.
+        loader (Callable): Coroutine function returning the page from match_page_to_cache, None when empty.
+            It may outlive the calling request, so it must open its own database session.
+        ex (int): Time in seconds the page is considered fresh.
+
+    Returns:
+        Optional[tuple[bytes, Optional[str]]]: JSON array of matches in MatchResponse shape and the next cursor,
+        None if the page is empty.
+    """
+    version, cached_data, ttl = await redis.register_script(match_page_lua)(
+        keys=[match_list_version_key], args=[page, cache_key("matches") + ":"]
+    )
+    if isinstance(version, bytes):
+        version = version.decode()
+
+    data = await serve_or_load(redis, cache_key("matches", version, page), cached_data, ttl, loader, ex)
+    if data is None:
+        return None
+
+    next_cursor, _, matches = data.partition(b"\n")
+    return matches, next_cursor.decode() or None
+
+
+# Sessions: one hash per token holding the user's profile (User.to_dict), so authenticating a request is one
+# round trip and no SQL. Every use pushes the expiry back by `session_ex`.
+session_ex = int(os.getenv("SESSION_TTL", default_1_hr))
+
+# KEYS: the session; ARGV: the expiry. The profile as HGETALL pairs (pushing back the expiry), an empty list when
+# there's no such session.
+session_lua = """
+local user = redis.call('HGETALL', KEYS[1])
+if #user > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return user
+"""
+
+
+def session_profile(user: User) -> dict:
+    return {field: value for field, value in user.to_dict().items() if value is not None}
+
+
+# Start a session for the user, returns its token
+async def cache_user_session(redis: Redis, user: User, ex: int = session_ex) -> str:
     session_token = str(uuid.uuid4())
-    await redis.set(f"session:{session_token}", user_id, ex=ex)
+    key = cache_key("session", session_token)
+    async with redis.pipeline() as pipe:
+        pipe.hset(key, mapping=session_profile(user))
+        pipe.expire(key, ex)
+        await pipe.execute()
     return session_token
 
 
-# Get user from session token in Redis
-async def get_cached_user(redis: Redis, session_token: str):
-    user_id = await redis.get(f"session:{session_token}")
-    return user_id
+# Get the user's profile ({"id": ..., "username": ...}) from the session token, None if the session expired
+async def get_cached_user(redis: Redis, session_token: str, ex: int = session_ex) -> Optional[dict]:
+    pairs = await redis.register_script(session_lua)(keys=[cache_key("session", session_token)], args=[ex])
+    record_cache_lookup("session", bool(pairs))
+    if not pairs:
+        return None
+    user = {pairs[i].decode(): pairs[i + 1].decode() for i in range(0, len(pairs), 2)}
+    user["id"] = int(user["id"])
+    return user
 
 
 # Cache user's favorite matches (expires in 1 hour)
 async def cache_favorite_matches(redis: Redis, user_id: int, matches: List[Match], ex: int = default_1_hr):
-    matches_data = [match.json() for match in matches]
-    await redis.set(f"user:{user_id}:favorites", json.dumps(matches_data), ex=ex)  # Cache for 1 hour
+    matches_data = [match.model_dump(mode="json") for match in matches]
+    async with redis.pipeline() as pipe:
+        pipe.set(cache_key("favorites", user_id), dumps(matches_data), ex=cache_ttl(ex))
+        add_dependencies(pipe, cache_key("favorites", user_id), (f"match:{match.id}" for match in matches), ex)
+        await pipe.execute()
 
 
 # Get cached user's favorite matches from Redis
-async def get_cached_favorite_matches(redis: Redis, user_id: int):
-    cached_data = await redis.get(f"user:{user_id}:favorites")
+async def get_cached_favorite_matches(redis: Redis, user_id: int) -> Optional[List[dict]]:
+    cached_data = await redis.get(cache_key("favorites", user_id))
+    record_cache_lookup("favorites", bool(cached_data))
     if cached_data:
-        return [Match.parse_raw(match) for match in json.loads(cached_data)]
+        return loads(cached_data)
     return None
 
 
-# Add a favorite match to cache (Invalidate old cache)
-async def add_favorite_match(redis: Redis, user_id: int, match: Match):
-    cached_favorites = await get_cached_favorite_matches(redis, user_id)
-    if cached_favorites:
-        cached_favorites.append(match)
-        await cache_favorite_matches(redis, user_id, cached_favorites)
-    else:
-        await cache_favorite_matches(redis, user_id, [match])
-
-
-# Remove a favorite match from cache (Invalidate old cache)
-async def remove_favorite_match(redis: Redis, user_id: int, match_id: int):
-    cached_favorites = await get_cached_favorite_matches(redis, user_id)
-    if cached_favorites:
-        updated_favorites = [match for match in cached_favorites if match.id != match_id]
-        await cache_favorite_matches(redis, user_id, updated_favorites)
+# Adding or removing a favorite drops the cached list, it's rebuilt on the next read
+async def invalidate_favorite_matches(redis: Redis, user_id: int):
+    await invalidate(redis, keys=[cache_key("favorites", user_id)])
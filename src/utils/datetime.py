@@ -1,35 +1,82 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
 from src.utils.helpers import MatchStatus
 
+half_length = timedelta(minutes=45)
+half_time_break = timedelta(minutes=15)
+max_half_minutes = 75  # A half with 30 minutes of stoppage time, longer means its clock fields are stale
 
-def iso_date_to_offset(iso_date_time: str, time_status: MatchStatus) -> None | str:
+
+def parse_match_time(value: Optional[str]) -> Optional[datetime]:
     """
-    Determines the next match status time based on the current time and match status.
+    Parse a match clock field (start_time, half_time, ...).
 
     Args:
-        iso_date_time (str): ISO-formatted date-time string (e.g., "2024-12-24T15:00:00").
-        time_status (MatchStatus): Current status of the match (RUNNING or HALF_TIME).
+        value (Optional[str]): ISO-formatted date-time string, naive (server local time) or with an offset.
 
     Returns:
-        None | str: ISO-formatted string of the next status time, or None if conditions are not met.
+        Optional[datetime]: The time, None when unset or not ISO-formatted.
     """
+    if not value:
+        return None
     try:
-        match_time = datetime.fromisoformat(iso_date_time)
-        current_time = datetime.now()
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError as e:
+        print(f"Invalid ISO date-time format: {e}")
+        return None
 
-        if time_status.value == MatchStatus.RUNNING.value:
-            # Calculate half-time (45 minutes after the match start time)
-            half_time = match_time + timedelta(minutes=45)
-            if current_time > half_time:
-                return half_time.isoformat()
 
-        elif time_status.value == MatchStatus.HALF_TIME.value:
-            # Calculate end-time (45 minutes after half-time)
-            end_time = match_time + timedelta(minutes=90)
-            if current_time > end_time:
-                return end_time.isoformat()
+def next_status_change(match: Any) -> Optional[tuple[datetime, str, MatchStatus]]:
+    """
+    The next status change of a live match from its clock fields, at nominal times (no stoppage time).
 
-    except ValueError as e:
-        print(f"Invalid ISO date-time format: {e}")
+    Running without half_time: half time 45 minutes after kick-off. Half time: second half 15 minutes after
+    half_time. Running with second_start: full time 45 minutes after it.
+
+    Args:
+        match: A Match or anything with its status and clock fields.
+
+    Returns:
+        Optional[tuple[datetime, str, MatchStatus]]: When, the clock field to set and the new status; None when the
+        match isn't live or its clock fields don't say.
+    """
+    status = MatchStatus(match.status)
+    if status == MatchStatus.RUNNING and not match.half_time and not match.second_start:
+        start = parse_match_time(match.start_time)
+        return (start + half_length, "half_time", MatchStatus.HALF_TIME) if start else None
+
+    if status == MatchStatus.HALF_TIME and not match.second_start:
+        half_time = parse_match_time(match.half_time)
+        return (half_time + half_time_break, "second_start", MatchStatus.RUNNING) if half_time else None
+
+    if status == MatchStatus.RUNNING and match.second_start and not match.end_time:
+        second_start = parse_match_time(match.second_start)
+        return (second_start + half_length, "end_time", MatchStatus.FULL_TIME) if second_start else None
 
     return None
+
+
+def match_minute(match: Any) -> Optional[int]:
+    """
+    The minute of play of a running match (1-45 first half, 46-90 second, beyond in stoppage time).
+
+    Args:
+        match: A Match or anything with its start_time and second_start.
+
+    Returns:
+        Optional[int]: None when its clock fields don't say (unset, or a half far longer than 45 minutes).
+    """
+    second_start = parse_match_time(match.second_start)
+    start = second_start or parse_match_time(match.start_time)
+    if start is None:
+        return None
+    played = max(int(-seconds_until(start) // 60), 0) + 1
+    if played > max_half_minutes:
+        return None
+    return played + 45 if second_start else played
+
+
+def seconds_until(when: datetime) -> float:
+    """Seconds from now until `when` (negative when past), naive times being server local time"""
+    now = datetime.now(timezone.utc) if when.tzinfo else datetime.now()
+    return (when - now).total_seconds()
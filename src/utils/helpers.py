@@ -9,6 +9,19 @@ class MatchStatus(str, Enum):
     FULL_TIME = "full_time"
 
 
+# Statuses during which the match clock runs and the stats change
+live_statuses = (MatchStatus.RUNNING, MatchStatus.HALF_TIME)
+
+
+# Match events scorekeepers report, see match_event_counters in routers/match.py
+class MatchEventType(str, Enum):
+    GOAL = "goal"
+    SHOT = "shot"
+    SHOT_ON_TARGET = "shot_on_target"
+    CORNER = "corner"
+    YELLOW_CARD = "yellow_card"
+
+
 # Goalkeeper.
 # Defenders,Centre-Back, Sweeper (SW), Left-Back (LB), Right-Back (RB), Wing-Back (LWB/RWB)
 # Defensive Midfielder, Central Midfielder (CM), Attacking Midfielder (CAM), Left Midfielder (LM), Right Midfielder (RM), Winger (LW/RW)
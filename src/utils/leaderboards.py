@@ -0,0 +1,209 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Literal, Optional
+from redis.asyncio.client import Redis
+from sqlalchemy.orm import joinedload
+from sqlmodel import select
+from src.config.database import async_session
+from src.models import Player
+from src.utils.cache import cache_key, cache_player, dumps, json_array, player_to_cache
+from src.utils.helpers import PlayerPosition
+
+LeaderboardStat = Literal["goals", "assists"]
+leaderboard_stats = ("goals", "assists")
+
+# One sorted set per stat and scope (every player, a team, a position), holding the players with a count above 0.
+# A board is only read (and written) once listed in the "loaded" set, it's loaded from MySQL on the first read.
+leaderboard_loaded_key = cache_key("leaderboard", "loaded")
+player_key_prefix = cache_key("player", "")
+leaderboard_load_chunk = 10_000
+# Players written since this long before a load started are applied again once it's done, they may have been
+# written to the board before it was replaced by the load
+leaderboard_catch_up = timedelta(seconds=60)
+
+# KEYS: the loaded set, then the player's boards; ARGV: the player id, then one score per board (0 takes the player
+# off it). Boards not loaded yet are left alone.
+leaderboard_update_lua = """
+for i = 2, #KEYS do
+    if redis.call('SISMEMBER', KEYS[1], KEYS[i]) == 1 then
+        if ARGV[i] == '0' then
+            redis.call('ZREM', KEYS[i], ARGV[1])
+        else
+            redis.call('ZADD', KEYS[i], ARGV[i], ARGV[1])
+        end
+    end
+end
+"""
+
+# KEYS: the loaded set, the board; ARGV: N, player key prefix. The top N player ids and their cached players (nil
+# when not cached) in one round trip, false when the board isn't loaded.
+leaderboard_top_lua = """
+if redis.call('SISMEMBER', KEYS[1], KEYS[2]) == 0 then
+    return false
+end
+local ids = redis.call('ZREVRANGE', KEYS[2], 0, tonumber(ARGV[1]) - 1)
+if #ids == 0 then
+    return {ids, {}}
+end
+local keys = {}
+for i, id in ipairs(ids) do
+    keys[i] = ARGV[2] .. id
+end
+return {ids, redis.call('MGET', unpack(keys))}
+"""
+
+# Board loads running in this worker, by board key
+leaderboard_loads: dict[str, asyncio.Task] = {}
+
+
+def leaderboard_score(value: int, player_id: int) -> int:
+    """The count, then the id for ties, like the MySQL fallback's ORDER BY (exact below 2^53)"""
+    return value * 2 ** 32 + player_id
+
+
+def leaderboard_key(stat: str, team_id: Optional[int] = None, position: Optional[PlayerPosition] = None) -> str:
+    if team_id is not None:
+        return cache_key("leaderboard", stat, "team", team_id)
+    if position is not None:
+        return cache_key("leaderboard", stat, "position", PlayerPosition(position).value)
+    return cache_key("leaderboard", stat, "all")
+
+
+def player_leaderboard_keys(stat: str, player: Any) -> List[str]:
+    """The boards of `stat` a player is ranked on"""
+    keys = [leaderboard_key(stat)]
+    if player.team_id is not None:
+        keys.append(leaderboard_key(stat, team_id=player.team_id))
+    if player.position is not None:
+        keys.append(leaderboard_key(stat, position=player.position))
+    return keys
+
+
+async def update_leaderboards(redis: Redis, players: Iterable[Any]):
+    """
+    Put committed players at their place on every loaded board, one pipeline for all of them.
+
+    Args:
+        redis (Redis): The Redis instance.
+        players: Players (or anything with their id, team_id, position, goals and assists).
+    """
+    script = redis.register_script(leaderboard_update_lua)
+    async with redis.pipeline(transaction=False) as pipe:
+        for player in players:
+            for stat in leaderboard_stats:
+                value = getattr(player, stat) or 0
+                keys = player_leaderboard_keys(stat, player)
+                score = leaderboard_score(value, player.id) if value > 0 else 0
+                await script(keys=[leaderboard_loaded_key, *keys], args=[player.id, *([score] * len(keys))], client=pipe)
+        await pipe.execute()
+
+
+def leaderboard_scope(statement, team_id: Optional[int] = None, position: Optional[PlayerPosition] = None):
+    if team_id is not None:
+        return statement.where(Player.team_id == team_id)
+    if position is not None:
+        return statement.where(Player.position == position)
+    return statement
+
+
+def leaderboard_statement(stat: str, team_id: Optional[int] = None, position: Optional[PlayerPosition] = None):
+    """Players of the board, best first (served by the ix_player_*_goals/assists indexes)"""
+    column = getattr(Player, stat)
+    statement = select(Player).where(column > 0).order_by(column.desc(), Player.id.desc())
+    return leaderboard_scope(statement, team_id, position)
+
+
+async def load_leaderboard(
+        redis: Redis, stat: str, team_id: Optional[int] = None, position: Optional[PlayerPosition] = None
+) -> int:
+    """
+    Fill a board from MySQL, streamed in chunks into a temporary key that then replaces it.
+
+    Returns:
+        int: Number of players on the board.
+    """
+    key = leaderboard_key(stat, team_id, position)
+    loading_key = f"{key}:loading:{uuid.uuid4().hex}"
+    since = datetime.now(timezone.utc) - leaderboard_catch_up
+    column = getattr(Player, stat)
+    statement = leaderboard_statement(stat, team_id, position).with_only_columns(Player.id, column).order_by(None)
+
+    count = 0
+    async with async_session() as session:
+        result = await session.stream(statement)
+        async for rows in result.partitions(leaderboard_load_chunk):
+            await redis.zadd(loading_key, {player_id: leaderboard_score(value, player_id) for player_id, value in rows})
+            count += len(rows)
+
+    async with redis.pipeline() as pipe:
+        if count:
+            pipe.rename(loading_key, key)
+        else:
+            pipe.delete(key)
+        pipe.sadd(leaderboard_loaded_key, key)
+        await pipe.execute()
+
+    # Writes that raced the load are applied again, now that the board is loaded
+    statement = leaderboard_scope(select(Player.id, column).where(Player.updated_at >= since), team_id, position)
+    async with async_session() as session:
+        recent = (await session.exec(statement)).all()
+    if recent:
+        async with redis.pipeline(transaction=False) as pipe:
+            for player_id, value in recent:
+                if value > 0:
+                    pipe.zadd(key, {player_id: leaderboard_score(value, player_id)})
+                else:
+                    pipe.zrem(key, player_id)
+            await pipe.execute()
+    return count
+
+
+def schedule_leaderboard_load(redis: Redis, stat: str, team_id: Optional[int] = None, position: Optional[PlayerPosition] = None):
+    """Load a board in the background, once per worker"""
+    key = leaderboard_key(stat, team_id, position)
+    if key in leaderboard_loads:
+        return
+
+    async def load():
+        try:
+            await load_leaderboard(redis, stat, team_id, position)
+        except Exception as e:
+            print(f"Leaderboard load failed: {e}")  # Replace with logging in production
+        finally:
+            leaderboard_loads.pop(key, None)
+
+    leaderboard_loads[key] = asyncio.create_task(load())
+
+
+async def get_leaderboard(
+        redis: Redis, stat: str, limit: int, team_id: Optional[int] = None, position: Optional[PlayerPosition] = None
+) -> bytes:
+    """
+    The top `limit` players of a board as a JSON array of PlayerResponse, best first.
+
+    From a loaded board that's one sorted set range plus the cached players in one round trip (players not cached
+    are loaded by id and cached). Until then the top is read from MySQL through the board's index while the board
+    loads in the background.
+    """
+    top = await redis.register_script(leaderboard_top_lua)(
+        keys=[leaderboard_loaded_key, leaderboard_key(stat, team_id, position)], args=[limit, player_key_prefix]
+    )
+    if top is None:
+        schedule_leaderboard_load(redis, stat, team_id, position)
+        statement = leaderboard_statement(stat, team_id, position).options(joinedload(Player.team)).limit(limit)
+        async with async_session() as session:
+            players = (await session.exec(statement)).all()
+        return json_array([dumps(player_to_cache(player)) for player in players])
+
+    ids, cached = top
+    players = dict(zip((int(player_id) for player_id in ids), cached))
+    missing = [player_id for player_id, data in players.items() if data is None]
+    if missing:
+        async with async_session() as session:
+            statement = select(Player).where(Player.id.in_(missing)).options(joinedload(Player.team))
+            for player in (await session.exec(statement)).all():
+                await cache_player(redis, player)
+                players[player.id] = dumps(player_to_cache(player))
+    # A player deleted since it was ranked is left out
+    return json_array([data for data in players.values() if data is not None])
@@ -0,0 +1,62 @@
+import asyncio
+import os
+from redis.asyncio.client import Redis
+from sqlalchemy import update
+from sqlmodel import select
+from src.config.database import async_session
+from src.models import Match, MatchStats
+from src.utils.cache import claim_dirty_live_stats, mark_live_stats_dirty
+from src.utils.helpers import MatchStatus
+
+live_stats_flush_interval = float(os.getenv("LIVE_STATS_FLUSH_INTERVAL", 30))  # Seconds
+
+
+async def flush_live_stats(redis: Redis) -> int:
+    """
+    Write the stats of every match changed since the last flush to the matchstats table, one bulk UPDATE.
+
+    Matches are taken off the dirty set atomically, so concurrent flushers (one per worker) never write the same
+    update twice; they're flagged again when the write fails. Finished matches are skipped, their final stats were
+    written with the full time update. The match rows stay locked until the write is committed, so a full time
+    update (which locks or updates the match row first) can't commit its final stats in between and be overwritten.
+
+    Args:
+        redis (Redis): The Redis instance holding the live stats.
+
+    Returns:
+        int: Number of matches written.
+    """
+    claimed = await claim_dirty_live_stats(redis)
+    if not claimed:
+        return 0
+
+    try:
+        async with async_session() as session:
+            statement = (
+                select(MatchStats.match_id, MatchStats.id)
+                .join(Match, Match.id == MatchStats.match_id)
+                .where(MatchStats.match_id.in_(claimed), Match.status != MatchStatus.FULL_TIME)
+                .with_for_update()
+            )
+            stats_ids = dict((await session.exec(statement)).all())
+            if stats_ids:
+                await session.exec(update(MatchStats), params=[
+                    {"id": stats_id, **claimed[match_id]} for match_id, stats_id in stats_ids.items()
+                ])
+                await session.commit()
+        return len(stats_ids)
+    except Exception:
+        await mark_live_stats_dirty(redis, claimed)
+        raise
+
+
+async def flush_live_stats_periodically(redis: Redis, interval: float = live_stats_flush_interval):
+    """Background task of every worker while LIVE_STATS_WRITE_BEHIND is on"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_live_stats(redis)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Live stats flush failed, retrying next time: {e}")  # Replace with logging in production
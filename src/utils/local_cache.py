@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LocalCache:
+    """
+    Per-worker LRU cache of serialized values, layered in front of Redis for hot keys.
+
+    Entries expire after `ttl` seconds and the least recently used ones are evicted once the cache holds
+    more than `max_entries` values or `max_bytes` of them. Writers invalidate entries (e.g. on a
+    match_update message); a value read from Redis while an invalidation was in flight is not stored.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 32 * 1024 * 1024, ttl: float = 10.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self.size = 0  # Bytes held by cached values
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def token(self) -> int:
+        """Take before reading the value from Redis and pass to set(), so a racing invalidation wins"""
+        return self.invalidations
+
+    def set(self, key: str, value: bytes, token: int):
+        if token != self.invalidations or sys.getsizeof(value) > self.max_bytes:
+            return
+
+        self._remove(key)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.size += sys.getsizeof(value)
+
+        while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def invalidate(self, key: str):
+        self.invalidations += 1
+        self._remove(key)
+
+    def clear(self):
+        self.invalidations += 1
+        self.entries.clear()
+        self.size = 0
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= sys.getsizeof(entry[1])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Match details during a live match: read constantly, changed a few times a minute
+match_cache = LocalCache(
+    max_entries=int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 1000)),
+    max_bytes=int(os.getenv("LOCAL_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    ttl=float(os.getenv("LOCAL_CACHE_TTL", 10)),
+)
@@ -0,0 +1,234 @@
+import asyncio
+import math
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Hashable, List
+from redis.asyncio.client import Redis
+from sqlalchemy import update
+from sqlmodel import select
+from src.config.database import async_session
+from src.models import Match, MatchStats, match_detail_load_options
+from src.utils.cache import (
+    cache_key, cache_matches_and_publish, end_live_stats, get_live_stats, invalidate, live_stats_write_behind
+)
+from src.utils.datetime import next_status_change, seconds_until
+from src.utils.helpers import MatchStatus, live_statuses
+from src.utils.standings import apply_standings, publish_standings, standing_deltas
+
+match_clock_enabled = os.getenv("MATCH_CLOCK_ENABLED", "true").lower() in ("1", "true", "yes")
+match_clock_tick = float(os.getenv("MATCH_CLOCK_TICK", 1))  # Seconds between two turns of the wheel
+match_clock_resync = float(os.getenv("MATCH_CLOCK_RESYNC", 30))  # Seconds between two reloads of the live matches
+leader_ttl = 10  # Seconds, another worker takes over this long after the leader died
+
+leader_key = cache_key("match_clock", "leader")
+
+# KEYS: the leader key; ARGV: this worker's token, TTL in ms. Takes or keeps the leadership, 1 when we hold it.
+leader_lua = """
+local holder = redis.call('GET', KEYS[1])
+if holder == false then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+if holder == ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# KEYS: the leader key; ARGV: this worker's token. Steps down only if we still are the leader.
+release_lua = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class TimerWheel:
+    """
+    Hashed timing wheel: timers land in the slot of the tick they are due at, each turn only looks at the slots
+    of the ticks that passed. Scheduling and cancelling are O(1) whatever the number of matches.
+    """
+
+    def __init__(self, slots: int = 512, tick: float = 1.0):
+        self.tick = tick
+        self.slots: List[dict[Hashable, tuple[int, Any]]] = [{} for _ in range(slots)]
+        self.timers: dict[Hashable, int] = {}  # Key -> slot index
+        self.current = int(time.time() // tick)  # Last tick processed
+
+    def schedule(self, key: Hashable, due: float, value: Any):
+        """Schedule (or move) the timer `key` for `due` (epoch seconds), past times fire on the next turn"""
+        self.cancel(key)
+        due_tick = max(math.ceil(due / self.tick), self.current + 1)
+        index = due_tick % len(self.slots)
+        self.slots[index][key] = (due_tick, value)
+        self.timers[key] = index
+
+    def cancel(self, key: Hashable):
+        index = self.timers.pop(key, None)
+        if index is not None:
+            self.slots[index].pop(key, None)
+
+    def advance(self, now: float) -> List[Any]:
+        """Values of the timers due up to `now`, removed from the wheel"""
+        target = int(now // self.tick)
+        due = []
+        # After a long pause every slot is looked at once
+        for tick in range(max(self.current + 1, target - len(self.slots) + 1), target + 1):
+            slot = self.slots[tick % len(self.slots)]
+            for key, (due_tick, value) in list(slot.items()):
+                if due_tick <= target:
+                    del slot[key]
+                    del self.timers[key]
+                    due.append(value)
+        self.current = max(self.current, target)
+        return due
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self.timers.clear()
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+
+def schedule_next_change(wheel: TimerWheel, match: Any):
+    """Put the match's next status change on the wheel, or take it off when there is none"""
+    change = next_status_change(match)
+    if change is None:
+        wheel.cancel(match.id)
+        return
+    when, field, status = change
+    wheel.schedule(match.id, time.time() + seconds_until(when), (match.id, when, field, status))
+
+
+async def schedule_live_matches(wheel: TimerWheel) -> int:
+    """Reload the clock fields of every live match (operators may have set them by hand) and reschedule them all"""
+    statement = select(
+        Match.id, Match.status, Match.start_time, Match.half_time, Match.second_start, Match.end_time
+    ).where(Match.status.in_(live_statuses))
+    async with async_session() as session:
+        matches = (await session.exec(statement)).all()
+
+    wheel.clear()
+    for match in matches:
+        schedule_next_change(wheel, match)
+    return len(wheel)
+
+
+async def apply_status_changes(redis: Redis, changes: List[tuple[int, datetime, str, MatchStatus]]) -> List[Match]:
+    """
+    Move matches on to their next status in one transaction, then cache and publish them in one batch.
+
+    Each change only applies if the match still is in the status it was scheduled from and the clock field is
+    still unset, so an operator setting the time by hand (or a stale schedule) wins.
+
+    Returns:
+        List[Match]: The matches that changed, loaded with match_detail_load_options.
+    """
+    previous_status = {
+        MatchStatus.HALF_TIME: MatchStatus.RUNNING, MatchStatus.RUNNING: MatchStatus.HALF_TIME,
+        MatchStatus.FULL_TIME: MatchStatus.RUNNING,
+    }
+    async with async_session() as session:
+        changed = []
+        for match_id, when, field, status in changes:
+            result = await session.exec(
+                update(Match)
+                .where(Match.id == match_id, Match.status == previous_status[status], getattr(Match, field).is_(None))
+                .values({field: when.isoformat(), "status": status})
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                changed.append((match_id, status))
+
+        # At full time the final live stats are written with the match
+        ended = [match_id for match_id, status in changed if status == MatchStatus.FULL_TIME]
+        if live_stats_write_behind and ended:
+            stats_ids = dict((await session.exec(
+                select(MatchStats.match_id, MatchStats.id).where(MatchStats.match_id.in_(ended))
+            )).all())
+            final = await get_live_stats(redis, stats_ids)
+            if final:
+                await session.exec(update(MatchStats), params=[
+                    {"id": stats_ids[match_id], **stats} for match_id, stats in final.items()
+                ])
+
+        # And the results go into the standings
+        standings = {}
+        if ended:
+            results = (await session.exec(select(
+                Match.status, Match.team1_id, Match.team2_id, Match.score_team1, Match.score_team2
+            ).where(Match.id.in_(ended)))).all()
+            standings = standing_deltas((None, result) for result in results)
+            await apply_standings(redis, session, standings)
+        await session.commit()
+        await publish_standings(redis, standings)
+
+        if not changed:
+            return []
+        statement = select(Match).where(Match.id.in_([match_id for match_id, _ in changed])).options(*match_detail_load_options)
+        matches = (await session.exec(statement)).all()
+
+    if live_stats_write_behind:
+        await end_live_stats(redis, ended)
+    # The status shows in the teams' match lists
+    await invalidate(redis, {f"match:{match.id}" for match in matches})
+    await cache_matches_and_publish(redis, matches)
+    return matches
+
+
+async def run_match_clock(redis: Redis, tick: float = match_clock_tick, resync: float = match_clock_resync):
+    """
+    Advance the status of live matches at half time, second half and full time, from one worker at a time.
+
+    Every worker runs this task; the one holding the Redis leader lock keeps the live matches on a timer wheel and
+    applies their status changes, the others only try to take over the lock. Clients get the new status through
+    the usual match_update publish instead of each running its own clock.
+
+    Args:
+        redis (Redis): The Redis instance.
+        tick (float): Seconds between two turns of the wheel.
+        resync (float): Seconds between two reloads of the live matches from the database.
+    """
+    token = str(uuid.uuid4())
+    wheel = TimerWheel(tick=tick)
+    leader = False
+    renewed = synced = 0.0
+    try:
+        while True:
+            try:
+                now = time.monotonic()
+                if not leader or now - renewed >= leader_ttl / 3:
+                    was_leader = leader
+                    leader = bool(await redis.register_script(leader_lua)(keys=[leader_key], args=[token, int(leader_ttl * 1000)]))
+                    renewed = now
+                    if leader and not was_leader:
+                        synced = 0.0  # Just took over: load the live matches right away
+                    if not leader:
+                        wheel.clear()
+
+                if leader:
+                    if now - synced >= resync:
+                        await schedule_live_matches(wheel)
+                        synced = now
+                    due = wheel.advance(time.time())
+                    if due:
+                        for match in await apply_status_changes(redis, due):
+                            schedule_next_change(wheel, match)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Match clock error: {e}")  # Replace with logging in production
+            await asyncio.sleep(tick if leader else leader_ttl / 3)
+    finally:
+        # Let another worker take over right away instead of after the lock's TTL
+        if leader:
+            try:
+                await redis.register_script(release_lua)(keys=[leader_key], args=[token])
+            except Exception as e:
+                print(f"Match clock couldn't release its lock: {e}")
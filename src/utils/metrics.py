@@ -0,0 +1,237 @@
+import functools
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Callable, Mapping, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Adds a Server-Timing header (db, redis, serialization and total time) to every response, see .env.example
+server_timing_enabled = os.getenv("SERVER_TIMING", "false").lower() in ("1", "true", "yes")
+
+prometheus_content_type = "text/plain; version=0.0.4; charset=utf-8"
+request_duration_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """What one request cost, filled in by the hooks below while it runs (and by the loads it starts)"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.redis_round_trips = 0
+        self.redis_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.serializing = 0  # Nesting depth, only the outermost serialization is timed
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("current_metrics", default=None)
+
+
+class MetricsRegistry:
+    """Totals of this worker since it started, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.requests: dict[tuple[str, str, int], int] = defaultdict(int)  # (method, route, status)
+        self.duration_buckets: dict[tuple[str, str], list[int]] = defaultdict(lambda: [0] * len(request_duration_buckets))
+        self.duration_counts: dict[tuple[str, str], int] = defaultdict(int)
+        self.duration_sums: dict[tuple[str, str], float] = defaultdict(float)
+        self.queries: dict[str, int] = defaultdict(int)  # By route
+        self.db_seconds: dict[str, float] = defaultdict(float)
+        self.redis_round_trips: dict[str, int] = defaultdict(int)
+        self.redis_seconds: dict[str, float] = defaultdict(float)
+        self.serialization_seconds: dict[str, float] = defaultdict(float)
+        self.cache_lookups: dict[tuple[str, str], int] = defaultdict(int)  # (key family, "hit" / "miss")
+
+    def observe(self, method: str, route: str, status: int, seconds: float, metrics: RequestMetrics):
+        self.requests[method, route, status] += 1
+        buckets = self.duration_buckets[method, route]
+        for i, bound in enumerate(request_duration_buckets):
+            if seconds <= bound:
+                buckets[i] += 1
+        self.duration_counts[method, route] += 1
+        self.duration_sums[method, route] += seconds
+        self.queries[route] += metrics.queries
+        self.db_seconds[route] += metrics.db_seconds
+        self.redis_round_trips[route] += metrics.redis_round_trips
+        self.redis_seconds[route] += metrics.redis_seconds
+        self.serialization_seconds[route] += metrics.serialization_seconds
+
+    def render(self, sampled: Mapping[str, tuple[str, str, float]] = None) -> str:
+        """
+        Args:
+            sampled: Values read at scrape time (e.g. pool stats), name to (type, help, value).
+        """
+        lines = []
+
+        def family(name: str, kind: str, help_text: str, samples: Mapping[tuple, float], labels: tuple[str, ...]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for values, sample in sorted(samples.items()):
+                values = values if isinstance(values, tuple) else (values,)
+                label_text = ",".join(f'{label}="{escape(value)}"' for label, value in zip(labels, values))
+                lines.append(f"{name}{{{label_text}}} {format_value(sample)}")
+
+        family("http_requests_total", "counter", "HTTP requests by method, route and status", self.requests,
+               ("method", "route", "status"))
+
+        lines.append("# HELP http_request_duration_seconds HTTP request latency by method and route")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for (method, route), buckets in sorted(self.duration_buckets.items()):
+            labels = f'method="{escape(method)}",route="{escape(route)}"'
+            for bound, count in zip(request_duration_buckets, buckets):
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {self.duration_counts[method, route]}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {format_value(self.duration_sums[method, route])}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {self.duration_counts[method, route]}")
+
+        family("db_queries_total", "counter", "SQL statements sent while serving requests, by route", self.queries, ("route",))
+        family("db_query_seconds_total", "counter", "Time spent in SQL statements, by route", self.db_seconds, ("route",))
+        family("redis_round_trips_total", "counter", "Redis commands and pipelines sent while serving requests, by route",
+               self.redis_round_trips, ("route",))
+        family("redis_seconds_total", "counter", "Time spent in Redis round trips (pool wait included), by route",
+               self.redis_seconds, ("route",))
+        family("serialization_seconds_total", "counter", "Time spent serializing and parsing cached values, by route",
+               self.serialization_seconds, ("route",))
+        family("cache_lookups_total", "counter", "Redis cache lookups by key family and result", self.cache_lookups,
+               ("family", "result"))
+
+        for name, (kind, help_text, value) in (sampled or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_value(value: float) -> str:
+    return str(value) if isinstance(value, int) else f"{value:.6f}"
+
+
+registry = MetricsRegistry()
+
+
+# Hooks, called by the database engine, the Redis pool and the cache helpers
+# ============================================================================================================================================
+
+def instrument_engine(engine: Engine):
+    """Count SQL statements and their time for the request running them (pass an async engine's sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append((current_metrics.get(), time.perf_counter()))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        finish_query(conn)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            finish_query(context.connection)
+
+
+def finish_query(conn):
+    started = conn.info.get("metrics_started")
+    if not started:
+        return
+    metrics, started_at = started.pop()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_seconds += time.perf_counter() - started_at
+
+
+def record_redis_round_trip(seconds: float):
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.redis_round_trips += 1
+        metrics.redis_seconds += seconds
+
+
+def record_cache_lookup(family: str, hit: bool):
+    registry.cache_lookups[family, "hit" if hit else "miss"] += 1
+    metrics = current_metrics.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def timed_serialization(func: Callable) -> Callable:
+    """Add the time spent in `func` to the request's serialization time"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return func(*args, **kwargs)
+        metrics.serializing += 1
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.serializing -= 1
+            if not metrics.serializing:
+                metrics.serialization_seconds += time.perf_counter() - started
+
+    return wrapper
+
+
+# Middleware
+# ============================================================================================================================================
+
+def server_timing(metrics: RequestMetrics, seconds: float) -> str:
+    return ", ".join((
+        f'db;dur={metrics.db_seconds * 1e3:.2f};desc="{metrics.queries} queries"',
+        f'redis;dur={metrics.redis_seconds * 1e3:.2f};desc="{metrics.redis_round_trips} round trips"',
+        f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+        f"serialize;dur={metrics.serialization_seconds * 1e3:.2f}",
+        f"total;dur={seconds * 1e3:.2f}",
+    ))
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware: collects what each HTTP request costs into the registry, labelled by its route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, which runs the app in a task of its own and streams the response
+    through a memory channel, adding its own overhead to every request it is supposed to measure.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if server_timing_enabled:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(metrics, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            current_metrics.reset(token)
+            route = scope.get("route")
+            registry.observe(scope["method"], getattr(route, "path", "unmatched"), status, time.perf_counter() - started, metrics)
@@ -0,0 +1,72 @@
+import base64
+import json
+from typing import Any, Optional, Sequence
+from fastapi import HTTPException, Response
+
+# List endpoints keep returning a plain JSON array, the cursor of the next page travels in this header
+next_cursor_header = "X-Next-Cursor"
+max_page_size = 100
+
+
+def encode_cursor(**position: Any) -> str:
+    """
+    Opaque keyset cursor pointing after the last item of a page.
+
+    Args:
+        **position: Sort key values of the last item returned, e.g. id=42.
+
+    Returns:
+        str: URL-safe cursor to pass back as `?cursor=`.
+    """
+    return base64.urlsafe_b64encode(json.dumps(position, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *keys: str) -> Optional[tuple]:
+    """
+    Sort key values stored in a cursor, in the order of `keys`.
+
+    Args:
+        cursor (Optional[str]): Cursor from the request, None or empty for the first page.
+        *keys (str): Sort keys the endpoint pages by.
+
+    Returns:
+        Optional[tuple]: Values to continue after, None for the first page.
+
+    Raises:
+        HTTPException: 400 when the cursor wasn't issued for this ordering.
+    """
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return tuple(position[key] for key in keys)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_page(rows: Sequence, limit: int, *keys: str) -> tuple[Sequence, Optional[str]]:
+    """
+    Trim a page queried with `limit + 1` rows (the extra row is a look-ahead).
+
+    Args:
+        rows (Sequence): Rows (or dicts) fetched with one extra row.
+        limit (int): Requested page size.
+        *keys (str): Sort keys stored in the cursor.
+
+    Returns:
+        tuple[Sequence, Optional[str]]: The page and the cursor of the next one, None on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+
+    page = rows[:limit]
+    last = page[-1]
+    return page, encode_cursor(**{key: last[key] if isinstance(last, dict) else getattr(last, key) for key in keys})
+
+
+def paginate(response: Response, rows: Sequence, limit: int, *keys: str) -> Sequence:
+    """Same as next_page, setting the next cursor header on `response` and returning the page"""
+    page, cursor = next_page(rows, limit, *keys)
+    if cursor:
+        response.headers[next_cursor_header] = cursor
+    return page
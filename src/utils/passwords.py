@@ -0,0 +1,63 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from src.models import pwd_context
+
+# bcrypt takes ~200 ms of CPU per hash or check and releases the GIL while doing it, so it runs on a few threads
+# of its own instead of the event loop (which would stall every request and socket of the worker meanwhile).
+# Calls beyond the threads wait in a bounded queue; once that's full, logins get a fast 503 instead of piling up.
+password_workers = int(os.getenv("PASSWORD_WORKERS", min(4, os.cpu_count() or 1)))
+password_queue = int(os.getenv("PASSWORD_QUEUE", password_workers * 8))  # Calls waiting for a thread
+password_retry_after = 1  # Seconds, Retry-After of the 503
+
+password_pool = ThreadPoolExecutor(max_workers=password_workers, thread_name_prefix="bcrypt")
+# Calls on a thread or waiting for one
+password_calls = 0
+password_rejections = 0
+
+
+async def run_password_call(func, *args):
+    """
+    Run a bcrypt call on the password pool.
+
+    Raises:
+        HTTPException: 503 when every thread is busy and the queue is full.
+    """
+    global password_calls, password_rejections
+    if password_calls >= password_workers + password_queue:
+        password_rejections += 1
+        raise HTTPException(
+            status_code=503, detail="Too many logins at once, try again shortly",
+            headers={"Retry-After": str(password_retry_after)},
+        )
+
+    password_calls += 1
+    future = asyncio.get_running_loop().run_in_executor(password_pool, func, *args)
+    # Released when the call itself is done: a cancelled request (client gone) still leaves its job on the pool
+    future.add_done_callback(release_password_call)
+    return await asyncio.shield(future)
+
+
+def release_password_call(future: asyncio.Future):
+    global password_calls
+    password_calls -= 1
+    if not future.cancelled():
+        future.exception()  # Retrieved here too, nobody awaits it once its request is cancelled
+
+
+async def hash_password(password: str) -> str:
+    return await run_password_call(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await run_password_call(pwd_context.verify, password, hashed_password)
+
+
+def password_pool_stats() -> dict:
+    return {
+        "workers": password_workers,
+        "queue": password_queue,
+        "in_flight": password_calls,
+        "rejections": password_rejections,
+    }
@@ -0,0 +1,288 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Iterable, List, Mapping
+from redis.asyncio.client import Redis
+from sqlalchemy import case, delete, func, insert, union_all, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config.database import async_session
+from src.models import Match, Standing, Team
+from src.utils.cache import cache_key
+from src.utils.helpers import MatchStatus
+
+# Counters of a team's row in the league table, in the order the Redis scripts take them
+standing_fields = ("played", "wins", "draws", "losses", "goals_for", "goals_against", "points")
+
+# The table lives in a sorted set of team ids scored by rank, each team's counters in a hash. "ready" is set once
+# the sorted set holds every team. Writers bump "version" and "pending" before committing and apply their deltas to
+# Redis after, so a load from MySQL that may have missed (or already seen) a commit not yet applied is dropped.
+standings_key = cache_key("standings", "table")
+standings_ready_key = cache_key("standings", "ready")
+standings_version_key = cache_key("standings", "version")
+standings_pending_key = cache_key("standings", "pending")
+standings_team_prefix = cache_key("standings", "team") + ":"
+standings_pending_ex = 60  # Seconds, heals the count of a writer that died between its commit and its Redis apply
+
+# Points, then goal difference, then goals scored in one exact integer score (< 2^53):
+# points * 10^10 + (goal difference + 50000) * 10^5 + goals scored.
+# Equal scores are ordered by member, the team id zero-padded so that it compares as a number (like team_id in the
+# MySQL fallback's ORDER BY), not as a string where "9" comes after "10".
+rank_score_lua = """
+local function rank_score(points, goals_for, goals_against)
+    return string.format('%.0f', points * 1e10 + (goals_for - goals_against + 50000) * 1e5 + goals_for)
+end
+local function rank_member(team_id)
+    return string.format('%010d', tonumber(team_id))
+end
+"""
+
+# KEYS: the sorted set, ready flag, version, pending count; ARGV: team hash prefix, then per team its id and one
+# delta per standing_fields. Skipped (0) until the table was loaded into Redis, the next read loads it from MySQL.
+standings_apply_lua = rank_score_lua + """
+redis.call('INCR', KEYS[3])
+if tonumber(redis.call('GET', KEYS[4]) or '0') > 0 then
+    redis.call('DECR', KEYS[4])
+end
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return 0
+end
+local fields = {'played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points'}
+for i = 2, #ARGV, 8 do
+    local key = ARGV[1] .. ARGV[i]
+    for j, field in ipairs(fields) do
+        redis.call('HINCRBY', key, field, ARGV[i + j])
+    end
+    local row = redis.call('HMGET', key, 'points', 'goals_for', 'goals_against')
+    redis.call('ZADD', KEYS[1], rank_score(tonumber(row[1]), tonumber(row[2]), tonumber(row[3])), rank_member(ARGV[i]))
+end
+return 1
+"""
+
+# KEYS: the sorted set, ready flag, version, pending count; ARGV: version read before loading from MySQL, team hash
+# prefix, then per team its id and its counters. Replaces the whole table unless a writer ran in the meantime.
+standings_load_lua = rank_score_lua + """
+if (redis.call('GET', KEYS[3]) or '0') ~= ARGV[1] or (redis.call('GET', KEYS[4]) or '0') ~= '0' then
+    return 0
+end
+local fields = {'played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points'}
+redis.call('DEL', KEYS[1])
+for i = 3, #ARGV, 8 do
+    local key = ARGV[2] .. ARGV[i]
+    redis.call('DEL', key)
+    for j, field in ipairs(fields) do
+        redis.call('HSET', key, field, ARGV[i + j])
+    end
+    redis.call('ZADD', KEYS[1], rank_score(tonumber(ARGV[i + 7]), tonumber(ARGV[i + 5]), tonumber(ARGV[i + 6])), rank_member(ARGV[i]))
+end
+redis.call('SET', KEYS[2], 1)
+return 1
+"""
+
+# KEYS: the sorted set, ready flag; ARGV: team hash prefix, N. The top N team ids (zero-padded) with their counters.
+standings_top_lua = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return false
+end
+local ids = redis.call('ZREVRANGE', KEYS[1], 0, tonumber(ARGV[2]) - 1)
+local rows = {}
+for i, id in ipairs(ids) do
+    rows[i] = redis.call('HMGET', ARGV[1] .. tonumber(id), 'played', 'wins', 'draws', 'losses', 'goals_for', 'goals_against', 'points')
+end
+return {ids, rows}
+"""
+
+standings_load_lock = asyncio.Lock()
+
+
+def match_result(match: Any) -> dict[int, dict]:
+    """
+    What a match counts for in the table: nothing unless it's at full time.
+
+    Args:
+        match: A Match or anything with its status, team ids and scores, None for a match not counted.
+
+    Returns:
+        dict[int, dict]: Team id to its standing_fields counts.
+    """
+    if match is None or MatchStatus(match.status) != MatchStatus.FULL_TIME:
+        return {}
+
+    def side(goals_for: int, goals_against: int) -> dict:
+        won, drawn = goals_for > goals_against, goals_for == goals_against
+        return {
+            "played": 1, "wins": int(won), "draws": int(drawn), "losses": int(not won and not drawn),
+            "goals_for": goals_for, "goals_against": goals_against, "points": 3 if won else 1 if drawn else 0,
+        }
+
+    return {
+        match.team1_id: side(match.score_team1, match.score_team2),
+        match.team2_id: side(match.score_team2, match.score_team1),
+    }
+
+
+def standing_deltas(changes: Iterable[tuple[Any, Any]]) -> dict[int, dict]:
+    """
+    Changes to the table for matches going from one state to another.
+
+    Args:
+        changes: (before, after) pairs of matches (or anything with the same fields). A match reaching full time
+            adds its result, a corrected score (or team) of a finished match swaps the old result for the new one.
+
+    Returns:
+        dict[int, dict]: Team id to the standing_fields deltas, teams without a change left out.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(standing_fields, 0))
+    for before, after in changes:
+        for sign, match in ((-1, before), (1, after)):
+            for team_id, counts in match_result(match).items():
+                for field, count in counts.items():
+                    deltas[team_id][field] += sign * count
+    return {team_id: delta for team_id, delta in deltas.items() if any(delta.values())}
+
+
+async def apply_standings(redis: Redis, session: AsyncSession, deltas: Mapping[int, dict]):
+    """
+    Add deltas to the MySQL table in the caller's transaction, creating the rows of teams not in it yet.
+    Call publish_standings with the same deltas once committed.
+    """
+    if not deltas:
+        return
+    async with redis.pipeline() as pipe:
+        pipe.incr(standings_version_key)
+        pipe.incr(standings_pending_key)
+        pipe.expire(standings_pending_key, standings_pending_ex)
+        await pipe.execute()
+
+    existing = set((await session.exec(select(Standing.team_id).where(Standing.team_id.in_(deltas)))).all())
+    missing = [team_id for team_id in deltas if team_id not in existing]
+    if missing:
+        await session.exec(insert(Standing), params=[{"team_id": team_id} for team_id in missing])
+
+    for team_id, delta in deltas.items():
+        values = {field: getattr(Standing, field) + count for field, count in delta.items() if count}
+        values["goal_difference"] = Standing.goal_difference + delta["goals_for"] - delta["goals_against"]
+        await session.exec(
+            update(Standing).where(Standing.team_id == team_id).values(values).execution_options(synchronize_session=False)
+        )
+
+
+async def publish_standings(redis: Redis, deltas: Mapping[int, dict]):
+    """Apply committed deltas to the Redis table in one atomic step"""
+    if not deltas:
+        return
+    args = [standings_team_prefix]
+    for team_id, delta in deltas.items():
+        args += [team_id, *(delta[field] for field in standing_fields)]
+    await redis.register_script(standings_apply_lua)(
+        keys=[standings_key, standings_ready_key, standings_version_key, standings_pending_key], args=args
+    )
+
+
+async def load_standings(redis: Redis) -> List[Standing]:
+    """
+    Copy the MySQL table into Redis, unless a match result was being counted meanwhile (the next read retries).
+
+    Returns:
+        List[Standing]: The rows read from MySQL.
+    """
+    version = await redis.get(standings_version_key) or b"0"
+    async with async_session() as session:
+        rows = (await session.exec(select(Standing))).all()
+
+    args = [version, standings_team_prefix]
+    for row in rows:
+        args += [row.team_id, *(getattr(row, field) for field in standing_fields)]
+    await redis.register_script(standings_load_lua)(
+        keys=[standings_key, standings_ready_key, standings_version_key, standings_pending_key], args=args
+    )
+    return rows
+
+
+def standing_row(rank: int, team_id: int, counts: Mapping[str, int]) -> dict:
+    return {
+        "rank": rank, "team_id": team_id, **counts, "goal_difference": counts["goals_for"] - counts["goals_against"],
+    }
+
+
+async def get_standings(redis: Redis, limit: int) -> List[dict]:
+    """
+    The top `limit` teams: a sorted set range (O(log n + limit)) and their counters in one round trip.
+
+    The first read after a Redis restart (or a rebuild) copies the MySQL table into Redis first; while that copy
+    loses races with new results the top N is read from MySQL through its rank index instead.
+
+    Returns:
+        List[dict]: Rows in StandingResponse shape, best first.
+    """
+    top_script = redis.register_script(standings_top_lua)
+    for _ in range(2):
+        top = await top_script(keys=[standings_key, standings_ready_key], args=[standings_team_prefix, limit])
+        if top:
+            ids, rows = top
+            return [
+                standing_row(rank, int(team_id), dict(zip(standing_fields, map(int, row))))
+                for rank, (team_id, row) in enumerate(zip(ids, rows), start=1)
+            ]
+        async with standings_load_lock:  # One load per worker, concurrent readers wait for it
+            if not await redis.exists(standings_ready_key):
+                await load_standings(redis)
+
+    statement = select(Standing).order_by(
+        Standing.points.desc(), Standing.goal_difference.desc(), Standing.goals_for.desc(), Standing.team_id.desc()
+    ).limit(limit)
+    async with async_session() as session:
+        rows = (await session.exec(statement)).all()
+    return [
+        standing_row(rank, row.team_id, {field: getattr(row, field) for field in standing_fields})
+        for rank, row in enumerate(rows, start=1)
+    ]
+
+
+async def rebuild_standings(redis: Redis) -> int:
+    """
+    Recompute the whole table from the finished matches (backfill, or after changing the rules), one aggregate query.
+
+    Replaces the MySQL table in one transaction, every team listed even without a finished match, then drops the
+    Redis copy so the next read loads the new one.
+
+    Returns:
+        int: Number of teams in the table.
+    """
+    finished = Match.status == MatchStatus.FULL_TIME
+    sides = union_all(
+        select(Match.team1_id.label("team_id"), Match.score_team1.label("goals_for"), Match.score_team2.label("goals_against")).where(finished),
+        select(Match.team2_id.label("team_id"), Match.score_team2.label("goals_for"), Match.score_team1.label("goals_against")).where(finished),
+    ).subquery()
+    won, drawn, lost = (
+        sides.c.goals_for > sides.c.goals_against, sides.c.goals_for == sides.c.goals_against,
+        sides.c.goals_for < sides.c.goals_against,
+    )
+    results = select(
+        sides.c.team_id,
+        func.count().label("played"),
+        func.sum(case((won, 1), else_=0)).label("wins"),
+        func.sum(case((drawn, 1), else_=0)).label("draws"),
+        func.sum(case((lost, 1), else_=0)).label("losses"),
+        func.sum(sides.c.goals_for).label("goals_for"),
+        func.sum(sides.c.goals_against).label("goals_against"),
+        func.sum(case((won, 3), (drawn, 1), else_=0)).label("points"),
+    ).group_by(sides.c.team_id)
+
+    async with async_session() as session:
+        counts = {row.team_id: row._asdict() for row in (await session.exec(results)).all()}
+        team_ids = (await session.exec(select(Team.id))).all()
+        rows = []
+        for team_id in team_ids:
+            row = {field: int(counts.get(team_id, {}).get(field) or 0) for field in standing_fields}
+            rows.append({"team_id": team_id, **row, "goal_difference": row["goals_for"] - row["goals_against"]})
+
+        await session.exec(delete(Standing))
+        if rows:
+            await session.exec(insert(Standing), params=rows)
+        await session.commit()
+
+    async with redis.pipeline() as pipe:
+        pipe.delete(standings_ready_key)
+        pipe.incr(standings_version_key)
+        await pipe.execute()
+    return len(rows)
@@ -0,0 +1,36 @@
+import os
+from redis.asyncio.client import Redis
+from sqlmodel import select
+from src.config.database import async_session
+from src.models import Match, match_detail_load_options
+from src.utils.cache import warm_matches
+from src.utils.helpers import MatchStatus
+
+warm_on_startup = os.getenv("CACHE_WARM_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+warm_limit = int(os.getenv("CACHE_WARM_LIMIT", 200))
+
+
+async def warm_cache(redis: Redis, limit: int = warm_limit) -> int:
+    """
+    Preload live and upcoming matches with their teams, so a fresh worker doesn't send its first requests to MySQL.
+
+    Args:
+        redis (Redis): The Redis instance to fill.
+        limit (int): Most matches to preload, live ones first, then by kick-off time.
+
+    Returns:
+        int: Number of matches cached.
+    """
+    live = (MatchStatus.RUNNING, MatchStatus.HALF_TIME)
+    statement = (
+        select(Match)
+        .where(Match.status != MatchStatus.FULL_TIME)
+        .options(*match_detail_load_options)
+        .order_by(Match.status.not_in(live), Match.start_time.is_(None), Match.start_time, Match.id)
+        .limit(limit)
+    )
+    async with async_session() as session:
+        matches = (await session.exec(statement)).all()
+
+    await warm_matches(redis, matches)
+    return len(matches)